@@ -0,0 +1,141 @@
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+import onboarding_pipeline
+import pdf_financials
+from batch_screening import discover_companies
+
+DEFAULT_CONCURRENCY = int(os.environ.get('KYC_IO_CONCURRENCY', '32'))
+
+_executor = None
+
+
+def _io_executor():
+    # Blocking open()/read() calls run here so a slow network mount only
+    # stalls a worker thread, never the event loop.
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=DEFAULT_CONCURRENCY * 3, thread_name_prefix='kyc-io')
+    return _executor
+
+
+def _read_bytes(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def _read_financials(folder):
+    # onboarding_pipeline.financials_path()'s choice, made on a worker thread
+    # from the PDF bytes read once: the filing if it has financial fields,
+    # else financials.txt, else the PDF regardless.
+    pdf_path = os.path.join(folder, 'financials.pdf')
+    try:
+        pdf = _read_bytes(pdf_path)
+    except FileNotFoundError:
+        pdf = None
+    if pdf is not None:
+        text = pdf_financials.statement_text_for_bytes(pdf)
+        if text is not None:
+            return text
+    try:
+        return _read_bytes(os.path.join(folder, 'financials.txt')).decode('utf-8')
+    except FileNotFoundError:
+        if pdf is None:
+            raise
+    return pdf_financials.EXTRACTION_CACHE.text_for_bytes(pdf)
+
+
+async def read_company_files(company_name, data_dir=None):
+    # (directors, financials, court_cases) as text. All three reads are issued
+    # at once, so latency is set by the slowest file.
+    loop = asyncio.get_running_loop()
+    folder = os.path.join(data_dir or onboarding_pipeline.DATA_DIR, company_name)
+    directors, financials, court_cases = await asyncio.gather(
+        loop.run_in_executor(_io_executor(), _read_bytes, os.path.join(folder, 'directors.csv')),
+        loop.run_in_executor(_io_executor(), _read_financials, folder),
+        loop.run_in_executor(_io_executor(), _read_bytes, os.path.join(folder, 'court_cases.txt')),
+    )
+    return directors.decode('utf-8'), financials, court_cases.decode('utf-8')
+
+
+async def generate_report_async(company_name, data_dir=None, semaphore=None):
+    if semaphore is not None:
+        async with semaphore:
+            directors, financials, court_cases = await read_company_files(company_name, data_dir)
+    else:
+        directors, financials, court_cases = await read_company_files(company_name, data_dir)
+    json_report, summary, _ = onboarding_pipeline.report_from_text(company_name, directors, financials, court_cases)
+    return json_report, summary
+
+
+async def iter_reports_async(companies, data_dir=None, concurrency=DEFAULT_CONCURRENCY):
+    # Yields (company, json_report, summary, error) as reports complete; at most
+    # `concurrency` companies have file reads in flight at any time.
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(company):
+        try:
+            json_report, summary = await generate_report_async(company, data_dir, semaphore)
+            return company, json_report, summary, None
+        except Exception as e:
+            return company, None, None, f'{type(e).__name__}: {e}'
+
+    pending = set()
+    # Keep the task set bounded too, so millions of companies never become
+    # millions of live coroutines.
+    for company in companies:
+        pending.add(asyncio.ensure_future(one(company)))
+        if len(pending) >= concurrency * 2:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                yield task.result()
+    while pending:
+        done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            yield task.result()
+
+
+async def run_batch_async(output_path, data_dir=None, concurrency=DEFAULT_CONCURRENCY, companies=None):
+    data_dir = data_dir or onboarding_pipeline.DATA_DIR
+    if companies is None:
+        companies = discover_companies(data_dir)
+    stats = {'companies': 0, 'ok': 0, 'failed': 0}
+    start = time.perf_counter()
+    with open(output_path, 'w', encoding='utf-8') as out:
+        async for company, json_report, summary, error in iter_reports_async(companies, data_dir, concurrency):
+            stats['companies'] += 1
+            if error is None:
+                stats['ok'] += 1
+                record = {'company_id': company, 'ok': True, 'report': json_report, 'summary': summary}
+            else:
+                stats['failed'] += 1
+                record = {'company_id': company, 'ok': False, 'error': error}
+            out.write(json.dumps(record, ensure_ascii=False))
+            out.write('\n')
+    elapsed = time.perf_counter() - start
+    stats['concurrency'] = concurrency
+    stats['elapsed_s'] = round(elapsed, 3)
+    stats['companies_per_s'] = round(stats['companies'] / elapsed, 1) if elapsed > 0 else 0.0
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Screen every company with concurrent asyncio file ingestion.')
+    parser.add_argument('-o', '--output', default='kyc_reports.jsonl', help='JSON-lines output file')
+    parser.add_argument('-d', '--data-dir', default=onboarding_pipeline.DATA_DIR)
+    parser.add_argument('-c', '--concurrency', type=int, default=DEFAULT_CONCURRENCY,
+                        help='companies with file reads in flight at once')
+    args = parser.parse_args(argv)
+
+    stats = asyncio.run(run_batch_async(args.output, args.data_dir, args.concurrency))
+    print(json.dumps(stats, ensure_ascii=False))
+    return 0 if stats['failed'] == 0 else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
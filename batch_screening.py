@@ -0,0 +1,131 @@
+import os
+import sys
+import json
+import time
+import argparse
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+
+import onboarding_pipeline
+
+
+def discover_companies(data_dir=None):
+    data_dir = data_dir or onboarding_pipeline.DATA_DIR
+    companies = []
+    with os.scandir(data_dir) as it:
+        for entry in it:
+            if entry.is_dir() and not entry.name.startswith('.'):
+                companies.append(entry.name)
+    companies.sort()
+    return companies
+
+
+_stores = {}
+
+
+def _open_store(store_dir):
+    # One memory-mapped store per worker process, opened on first use.
+    if store_dir not in _stores:
+        import portfolio_store
+        _stores[store_dir] = portfolio_store.PortfolioStore(store_dir)
+    return _stores[store_dir]
+
+
+def screen_company(company, data_dir=None, store_dir=None, max_pending=onboarding_pipeline.MAX_PENDING_CASES,
+                   max_flags=onboarding_pipeline.MAX_FLAGS):
+    # Runs inside a worker process: never let one company take down the pool.
+    start = time.perf_counter()
+    try:
+        store = _open_store(store_dir) if store_dir else None
+        json_report, summary = onboarding_pipeline.generate_report(company, data_dir, store,
+                                                                   max_pending=max_pending, max_flags=max_flags)
+        record = {'company_id': company, 'ok': True, 'report': json_report, 'summary': summary}
+    except Exception as e:
+        record = {
+            'company_id': company,
+            'ok': False,
+            'error': f'{type(e).__name__}: {e}',
+            'traceback': traceback.format_exc(limit=3),
+        }
+    record['elapsed_ms'] = round((time.perf_counter() - start) * 1000, 3)
+    return record
+
+
+def _screen_chunk(args):
+    # (companies, data_dir, store_dir[, limits]); limits holds max_pending/max_flags.
+    companies, data_dir, store_dir = args[:3]
+    limits = args[3] if len(args) > 3 else {}
+    return [screen_company(c, data_dir, store_dir, **limits) for c in companies]
+
+
+def _chunks(items, size):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def run_batch(output_path, data_dir=None, workers=None, chunksize=64, companies=None, store_dir=None,
+              max_pending=onboarding_pipeline.MAX_PENDING_CASES, max_flags=onboarding_pipeline.MAX_FLAGS):
+    data_dir = data_dir or onboarding_pipeline.DATA_DIR
+    if companies is None:
+        if store_dir:
+            companies = list(_open_store(store_dir).index)
+        else:
+            companies = discover_companies(data_dir)
+    workers = workers or os.cpu_count() or 1
+    limits = {'max_pending': max_pending, 'max_flags': max_flags}
+
+    stats = {'companies': len(companies), 'ok': 0, 'failed': 0, 'risk_levels': {}}
+    start = time.perf_counter()
+    with open(output_path, 'w', encoding='utf-8') as out:
+        if workers == 1:
+            results = (_screen_chunk((chunk, data_dir, store_dir, limits)) for chunk in _chunks(companies, chunksize))
+            _write_results(results, out, stats)
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                jobs = ((chunk, data_dir, store_dir, limits) for chunk in _chunks(companies, chunksize))
+                _write_results(pool.map(_screen_chunk, jobs), out, stats)
+    elapsed = time.perf_counter() - start
+
+    stats['workers'] = workers
+    stats['elapsed_s'] = round(elapsed, 3)
+    stats['companies_per_s'] = round(len(companies) / elapsed, 1) if elapsed > 0 else 0.0
+    return stats
+
+
+def _write_results(chunk_results, out, stats):
+    for records in chunk_results:
+        for record in records:
+            if record['ok']:
+                stats['ok'] += 1
+                level = record['report']['risk_level']
+                stats['risk_levels'][level] = stats['risk_levels'].get(level, 0) + 1
+            else:
+                stats['failed'] += 1
+            out.write(json.dumps(record, ensure_ascii=False))
+            out.write('\n')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Screen every company folder under the data directory.')
+    parser.add_argument('-o', '--output', default='kyc_reports.jsonl', help='JSON-lines output file')
+    parser.add_argument('-d', '--data-dir', default=onboarding_pipeline.DATA_DIR)
+    parser.add_argument('-w', '--workers', type=int, default=None, help='worker processes (default: CPU count)')
+    parser.add_argument('--chunksize', type=int, default=64, help='companies per task sent to a worker')
+    parser.add_argument('--store', default=None, help='read from a compacted portfolio store instead of data/')
+    parser.add_argument('--max-pending', type=int, default=onboarding_pipeline.MAX_PENDING_CASES or 0,
+                        help='pending cases listed per report (0: no cap)')
+    parser.add_argument('--max-flags', type=int, default=onboarding_pipeline.MAX_FLAGS or 0,
+                        help='litigation flags listed per report (0: no cap)')
+    args = parser.parse_args(argv)
+
+    stats = run_batch(args.output, args.data_dir, args.workers, args.chunksize, store_dir=args.store,
+                      max_pending=args.max_pending or None, max_flags=args.max_flags or None)
+    print(f"Screened {stats['companies']} companies ({stats['ok']} ok, {stats['failed']} failed) "
+          f"in {stats['elapsed_s']}s with {stats['workers']} workers "
+          f"– {stats['companies_per_s']} companies/s", file=sys.stderr)
+    print(json.dumps(stats, ensure_ascii=False))
+    return 0 if stats['failed'] == 0 else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,66 @@
+import os
+import sys
+import random
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import onboarding_pipeline
+
+BASE_TERMS = ['pending', 'fraud', 'default', 'insolvency', 'npa', 'sarfaesi',
+              'wilful defaulter', 'recovery', 'winding up', 'money laundering']
+STATUSES = ['Pending', 'Closed', 'Disposed', 'Admitted']
+WORDS = ['alleged', 'gst', 'tax', 'appeal', 'loan', 'suit', 'vendor', 'payment',
+         'dispute', 'contract', 'merger', 'approved', 'resolved', 'notice']
+
+
+def make_keywords(n, rng):
+    keywords = list(BASE_TERMS[:n])
+    while len(keywords) < n:
+        keywords.append(''.join(rng.choice('abcdefghijklmnopqrstuvwxyz') for _ in range(rng.randint(5, 12))))
+    return keywords
+
+
+def make_cases(n, keywords, rng):
+    cases = []
+    for _ in range(n):
+        desc = ' '.join(rng.choice(WORDS) for _ in range(rng.randint(3, 8)))
+        if rng.random() < 0.2:
+            desc += ' ' + rng.choice(keywords)
+        cases.append((rng.choice(STATUSES), desc))
+    return cases
+
+
+def loop_scan(cases, keywords):
+    # The per-keyword loop scan_court_cases used before the compiled matcher.
+    flags = []
+    for status, desc in cases:
+        for kw in keywords:
+            if kw in status.lower() or kw in desc.lower():
+                flags.append(f"{status} litigation: {desc}")
+    return flags
+
+
+def matcher_scan(cases, matcher):
+    flags = []
+    for status, desc in cases:
+        if matcher.match(status, desc):
+            flags.append(f"{status} litigation: {desc}")
+    return flags
+
+
+def main(n_cases=5000, repeat=3):
+    rng = random.Random(42)
+    print(f"{'keywords':>9} {'loop ms':>10} {'matcher ms':>11} {'speedup':>8}")
+    for n_keywords in (10, 100, 1000):
+        keywords = make_keywords(n_keywords, rng)
+        cases = make_cases(n_cases, keywords, rng)
+        matcher = onboarding_pipeline.KeywordMatcher(keywords)
+        assert len(set(loop_scan(cases, keywords))) == len(set(matcher_scan(cases, matcher)))
+        loop_t = min(timeit.repeat(lambda: loop_scan(cases, keywords), number=1, repeat=repeat))
+        match_t = min(timeit.repeat(lambda: matcher_scan(cases, matcher), number=1, repeat=repeat))
+        print(f"{n_keywords:>9} {loop_t * 1000:>10.1f} {match_t * 1000:>11.1f} {loop_t / match_t:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import resource
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import onboarding_pipeline
+import pipeline_metrics
+import batch_screening
+from synthetic_data import generate_portfolio
+
+DEFAULT_SIZES = (1000, 100000, 1000000)
+PERCENTILES = (50, 90, 99)
+
+
+def _percentiles(values):
+    if not values:
+        return {}
+    values = sorted(values)
+    result = {f'p{p}': round(values[min(len(values) - 1, int(len(values) * p / 100))], 4) for p in PERCENTILES}
+    result['max'] = round(values[-1], 4)
+    result['mean'] = round(sum(values) / len(values), 4)
+    return result
+
+
+def _peak_rss_mb(who=resource.RUSAGE_SELF):
+    # ru_maxrss is KiB on Linux, bytes on macOS.
+    peak = resource.getrusage(who).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def _prepare(work_dir, n, args):
+    # Generated trees are reused between runs when the parameters match.
+    folder = os.path.join(work_dir, f'portfolio_{n}')
+    params = {'companies': n, 'directors': args.directors, 'cases': args.cases,
+              'keyword_density': args.keyword_density, 'seed': args.seed}
+    marker = os.path.join(folder, '.params.json')
+    try:
+        with open(marker, 'r', encoding='utf-8') as f:
+            if json.load(f) == params:
+                return folder, 0.0
+    except (OSError, ValueError):
+        pass
+    shutil.rmtree(folder, ignore_errors=True)
+    start = time.perf_counter()
+    generate_portfolio(folder, n, tuple(args.directors), tuple(args.cases), args.keyword_density, args.seed)
+    with open(marker, 'w', encoding='utf-8') as f:
+        json.dump(params, f)
+    return folder, time.perf_counter() - start
+
+
+def bench_size(n, args, work_dir):
+    folder, gen_s = _prepare(work_dir, n, args)
+    companies = batch_screening.discover_companies(folder)
+    if args.sample and len(companies) > args.sample:
+        step = len(companies) / args.sample
+        sample = [companies[int(i * step)] for i in range(args.sample)]
+    else:
+        sample = companies
+
+    stage_ms = {}
+    report_ms = []
+    start = time.perf_counter()
+    for company in sample:
+        metrics = pipeline_metrics.ReportMetrics(company)
+        onboarding_pipeline.generate_report(company, folder, metrics=metrics)
+        report_ms.append(metrics.total_ms)
+        for s in metrics.stages:
+            stage_ms.setdefault(s['stage'], []).append(s['wall_ms'])
+    serial_s = time.perf_counter() - start
+
+    result = {
+        'companies': n,
+        'sampled': len(sample),
+        'generate_s': round(gen_s, 3),
+        'report_ms': _percentiles(report_ms),
+        'stage_ms': {stage: _percentiles(v) for stage, v in stage_ms.items()},
+        'serial_companies_per_s': round(len(sample) / serial_s, 1) if serial_s else None,
+    }
+    if args.workers:
+        stats = batch_screening.run_batch(os.devnull, folder, args.workers, companies=companies)
+        result['batch'] = {k: stats[k] for k in ('workers', 'elapsed_s', 'companies_per_s', 'failed')}
+    result['peak_rss_mb'] = _peak_rss_mb()
+    result['peak_rss_children_mb'] = _peak_rss_mb(resource.RUSAGE_CHILDREN)
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the onboarding pipeline on synthetic portfolios.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(DEFAULT_SIZES))
+    parser.add_argument('--directors', type=int, nargs=2, default=[2, 6], metavar=('MIN', 'MAX'))
+    parser.add_argument('--cases', type=int, nargs=2, default=[0, 5], metavar=('MIN', 'MAX'))
+    parser.add_argument('--keyword-density', type=float, default=0.3)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--sample', type=int, default=10000,
+                        help='companies timed stage by stage per size (0 = all)')
+    parser.add_argument('--workers', type=int, default=0,
+                        help='also run batch_screening over the full portfolio with this many workers')
+    parser.add_argument('--work-dir', default=None, help='where synthetic portfolios are generated and kept')
+    parser.add_argument('-o', '--output', default='bench_results.json')
+    args = parser.parse_args(argv)
+
+    work_dir = args.work_dir or tempfile.mkdtemp(prefix='kyc_bench_')
+    os.makedirs(work_dir, exist_ok=True)
+    results = {
+        'env': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+        },
+        'params': {k: v for k, v in vars(args).items() if k not in ('output', 'work_dir')},
+        'results': [],
+    }
+    for n in args.sizes:
+        result = bench_size(n, args, work_dir)
+        results['results'].append(result)
+        print(f"{n:>9} companies: report p50 {result['report_ms'].get('p50')} ms, "
+              f"p99 {result['report_ms'].get('p99')} ms, "
+              f"{result['serial_companies_per_s']} companies/s serial, peak RSS {result['peak_rss_mb']} MB",
+              file=sys.stderr)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f'Results written to {args.output}', file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
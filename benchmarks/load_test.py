@@ -0,0 +1,99 @@
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+import http.client
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import batch_screening
+
+
+def _percentile(values, p):
+    if not values:
+        return None
+    values = sorted(values)
+    return round(values[min(len(values) - 1, int(len(values) * p / 100))], 3)
+
+
+def _worker(host, port, companies, deadline, bulk, rng, latencies, statuses, lock):
+    conn = http.client.HTTPConnection(host, port, timeout=60)
+    local_lat = []
+    local_status = {}
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            if bulk:
+                body = json.dumps({'companies': rng.sample(companies, min(bulk, len(companies)))})
+                conn.request('POST', '/reports', body, {'Content-Type': 'application/json'})
+            else:
+                conn.request('GET', f'/reports/{rng.choice(companies)}')
+            resp = conn.getresponse()
+            resp.read()
+            status = resp.status
+        except (OSError, http.client.HTTPException):
+            status = 'error'
+            conn.close()
+            conn = http.client.HTTPConnection(host, port, timeout=60)
+        local_lat.append((time.perf_counter() - start) * 1000)
+        local_status[status] = local_status.get(status, 0) + 1
+    conn.close()
+    with lock:
+        latencies.extend(local_lat)
+        for k, v in local_status.items():
+            statuses[k] = statuses.get(k, 0) + v
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Load-test a running report_service instance.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('-c', '--concurrency', type=int, default=32, help='concurrent client connections')
+    parser.add_argument('-t', '--duration', type=float, default=10.0, help='seconds to run')
+    parser.add_argument('--bulk', type=int, default=0, help='companies per bulk POST (0 = single GETs)')
+    parser.add_argument('-d', '--data-dir', default=None, help='company folders to request (default: data/)')
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('-o', '--output', default=None, help='write results as JSON')
+    args = parser.parse_args(argv)
+
+    companies = batch_screening.discover_companies(args.data_dir)
+    latencies = []
+    statuses = {}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + args.duration
+    threads = [
+        threading.Thread(target=_worker, args=(args.host, args.port, companies, deadline, args.bulk,
+                                               random.Random(args.seed + i), latencies, statuses, lock))
+        for i in range(args.concurrency)
+    ]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    requests = len(latencies)
+    result = {
+        'requests': requests,
+        'reports': requests * (args.bulk or 1),
+        'elapsed_s': round(elapsed, 3),
+        'requests_per_s': round(requests / elapsed, 1),
+        'reports_per_s': round(requests * (args.bulk or 1) / elapsed, 1),
+        'latency_ms': {f'p{p}': _percentile(latencies, p) for p in (50, 90, 99)},
+        'statuses': {str(k): v for k, v in statuses.items()},
+        'concurrency': args.concurrency,
+        'bulk': args.bulk,
+    }
+    print(json.dumps(result, indent=2))
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,72 @@
+import os
+import sys
+import random
+import argparse
+
+FIRST_NAMES = ['Rajesh', 'Meena', 'Sandeep', 'Ankit', 'Ritika', 'Vikas', 'Neha', 'Arjun', 'Sneha',
+               'Manish', 'Pooja', 'Amit', 'Kavita', 'Suresh', 'Divya', 'Rahul', 'Priya', 'Anil']
+LAST_NAMES = ['Verma', 'Rathi', 'Kumar', 'Desai', 'Shah', 'Jain', 'Kapoor', 'Mehta', 'Pillai',
+              'Gupta', 'Sinha', 'Rao', 'Iyer', 'Reddy', 'Nair', 'Chopra', 'Bose', 'Patel']
+COURTS = [('Delhi HC', 'DEL'), ('Bombay HC', 'BOM'), ('Madras HC', 'MAD'), ('NCLT Mumbai', 'NCLT'),
+          ('NCLT Chennai', 'NCLT'), ('NCLT Delhi', 'NCLT'), ('ITAT Delhi', 'ITAT')]
+STATUSES = ['Pending', 'Closed']
+NEUTRAL_TERMS = ['GST', 'vendor payment dispute', 'contract dispute', 'merger approved',
+                 'compliance review', 'tax appeal', 'labour claim', 'lease termination']
+RISK_TERMS = ['fraud', 'default', 'insolvency', 'NPA recovery', 'wilful defaulter', 'SARFAESI notice']
+
+
+def write_company(folder, rng, n_directors, n_cases, keyword_density, year=2024):
+    os.makedirs(folder, exist_ok=True)
+    with open(os.path.join(folder, 'directors.csv'), 'w', encoding='utf-8') as f:
+        f.write('name,din,tenure\n')
+        for _ in range(n_directors):
+            start = rng.randint(2005, 2023)
+            f.write(f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)},'
+                    f'{rng.randint(0, 99999999):08d},{start}-2025\n')
+    assets = round(rng.uniform(1, 200), 1)
+    liabilities = round(assets * rng.uniform(0.1, 1.3), 1)
+    with open(os.path.join(folder, 'financials.txt'), 'w', encoding='utf-8') as f:
+        f.write(f'Assets: ₹{assets}Cr\n')
+        f.write(f'Liabilities: ₹{liabilities}Cr\n')
+        f.write(f'Net Worth: ₹{round(assets - liabilities, 1)}Cr\n')
+        f.write(f'Year: {year}\n')
+    with open(os.path.join(folder, 'court_cases.txt'), 'w', encoding='utf-8') as f:
+        for _ in range(n_cases):
+            court, code = rng.choice(COURTS)
+            terms = RISK_TERMS if rng.random() < keyword_density else NEUTRAL_TERMS
+            f.write(f'{court} | {rng.choice(STATUSES)} | Case {rng.randint(2015, year)}/{code}/'
+                    f'{rng.randint(1000, 9999)} | {rng.choice(terms).capitalize()}\n')
+
+
+def generate_portfolio(out_dir, n_companies, directors=(2, 6), cases=(0, 5), keyword_density=0.3, seed=42):
+    # Deterministic for a given seed: company i always gets the same files.
+    rng = random.Random(seed)
+    names = []
+    width = max(6, len(str(n_companies)))
+    for i in range(n_companies):
+        name = f'SynCo{i:0{width}d}'
+        write_company(os.path.join(out_dir, name), rng,
+                      rng.randint(*directors), rng.randint(*cases), keyword_density)
+        names.append(name)
+    return names
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Generate a synthetic data/ tree in the pipeline input formats.')
+    parser.add_argument('out_dir')
+    parser.add_argument('-n', '--companies', type=int, default=1000)
+    parser.add_argument('--min-directors', type=int, default=2)
+    parser.add_argument('--max-directors', type=int, default=6)
+    parser.add_argument('--min-cases', type=int, default=0)
+    parser.add_argument('--max-cases', type=int, default=5)
+    parser.add_argument('--keyword-density', type=float, default=0.3, help='share of cases citing a risk keyword')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args(argv)
+    generate_portfolio(args.out_dir, args.companies, (args.min_directors, args.max_directors),
+                       (args.min_cases, args.max_cases), args.keyword_density, args.seed)
+    print(f'Wrote {args.companies} companies to {args.out_dir}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,103 @@
+import os
+
+import numpy as np
+
+import onboarding_pipeline
+import financial_parser
+import risk_scoring
+from disk_cache import LruDiskCache, file_fingerprint
+
+
+class CompanyHistory:
+    # Per-company time series on a shared, sorted year axis. Financial
+    # columns hold NaN for years without a statement; litigation columns are
+    # counts of cases by filing year.
+    __slots__ = ('company', 'years', 'assets', 'liabilities', 'net_worth', 'debt_ratio',
+                 'debt_ratio_change', 'cases_filed', 'pending_filed', 'pending_backlog')
+
+    def __init__(self, company, statement, cases):
+        self.company = company
+        fin_years = [r.year for r in statement.records if r.year is not None]
+        filing = np.array([c.filing_year or 0 for c in cases], dtype=np.int64)
+        pending = np.array([c.is_pending for c in cases], dtype=bool)
+        case_years = filing[filing > 0]
+        self.years = np.union1d(np.asarray(fin_years, dtype=np.int64), case_years)
+
+        def column(attr):
+            # Paise per year; NaN where there is no value.
+            col = np.full(self.years.shape, np.nan)
+            for r in statement.records:
+                value = getattr(r, attr)
+                if r.year is not None and value is not None:
+                    col[np.searchsorted(self.years, r.year)] = value
+            return col
+
+        assets = column('assets')
+        liabilities = column('liabilities')
+        # Ratios come from paise, exactly as assess_risk computes them; the
+        # crore columns are for display.
+        self.debt_ratio = risk_scoring.debt_ratios(assets, liabilities)
+        self.assets = assets / financial_parser.CRORE_PAISE
+        self.liabilities = liabilities / financial_parser.CRORE_PAISE
+        self.net_worth = column('net_worth') / financial_parser.CRORE_PAISE
+        # Year-over-year change against the previous year that has a ratio.
+        self.debt_ratio_change = np.full(self.years.shape, np.nan)
+        known = np.flatnonzero(~np.isnan(self.debt_ratio))
+        if known.size > 1:
+            self.debt_ratio_change[known[1:]] = np.diff(self.debt_ratio[known])
+
+        idx = np.searchsorted(self.years, filing[filing > 0])
+        self.cases_filed = np.bincount(idx, minlength=len(self.years))
+        self.pending_filed = np.bincount(idx[pending[filing > 0]], minlength=len(self.years))
+        # Cases filed up to each year that are still pending today.
+        self.pending_backlog = np.cumsum(self.pending_filed)
+
+    def to_dict(self):
+        def clean(values):
+            return [None if isinstance(v, float) and np.isnan(v) else v for v in values.tolist()]
+
+        return {
+            'company': self.company,
+            'years': self.years.tolist(),
+            'assets_cr': clean(self.assets),
+            'liabilities_cr': clean(self.liabilities),
+            'net_worth_cr': clean(self.net_worth),
+            'debt_ratio': clean(self.debt_ratio),
+            'debt_ratio_change': clean(self.debt_ratio_change),
+            'cases_filed': self.cases_filed.tolist(),
+            'pending_filed': self.pending_filed.tolist(),
+            'pending_backlog': self.pending_backlog.tolist(),
+        }
+
+
+def build_history(company_name, data_dir=None):
+    folder = os.path.join(data_dir or onboarding_pipeline.DATA_DIR, company_name)
+    _, financials_path, court_cases_path = onboarding_pipeline._input_paths(folder)
+    statement = onboarding_pipeline.parse_financial_statement(financials_path)
+    cases = list(onboarding_pipeline.iter_court_cases(court_cases_path))
+    return CompanyHistory(company_name, statement, cases)
+
+
+class HistoryCache(LruDiskCache):
+    # LRU of CompanyHistory keyed on the fingerprints of the financials source
+    # and court_cases.txt, so dashboard reruns reuse the parsed series.
+    # Memory only: the numpy series are cheaper to rebuild than to persist.
+    def key(self, company_name, data_dir=None):
+        folder = os.path.abspath(os.path.join(data_dir or onboarding_pipeline.DATA_DIR, company_name))
+        _, financials_path, court_cases_path = onboarding_pipeline._input_paths(folder)
+        return file_fingerprint(financials_path), file_fingerprint(court_cases_path)
+
+    def get(self, company_name, data_dir=None):
+        key = self.key(company_name, data_dir)
+        history = self.lookup(key)
+        if history is None:
+            history = build_history(company_name, data_dir)
+            self.add(key, history)
+        return history
+
+
+HISTORY_CACHE = HistoryCache(maxsize=int(os.environ.get('KYC_HISTORY_CACHE_SIZE', '256')))
+
+
+def company_history(company_name, data_dir=None):
+    return HISTORY_CACHE.get(company_name, data_dir)
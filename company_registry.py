@@ -0,0 +1,104 @@
+import os
+import json
+import threading
+
+import onboarding_pipeline
+
+MANIFEST_NAME = 'companies.json'
+
+
+def _default_record(folder):
+    return {
+        'folder': folder,
+        'cin': '',
+        'full_name': f'{folder} Pvt Ltd',
+        'industry': 'Unclassified',
+    }
+
+
+class CompanyRegistry:
+    # Company folders under data/ merged with the metadata in data/companies.json.
+    # Manifest entries without a folder are kept (has_data=False) so they stay
+    # searchable; folders without an entry get default metadata.
+    def __init__(self, data_dir=None, manifest_path=None):
+        self.data_dir = data_dir or onboarding_pipeline.DATA_DIR
+        self.manifest_path = manifest_path or os.path.join(self.data_dir, MANIFEST_NAME)
+        self.signature = _signature(self.data_dir, self.manifest_path)
+
+        entries = {}
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                for entry in json.load(f).get('companies', []):
+                    entries[entry['folder']] = entry
+        except FileNotFoundError:
+            pass
+
+        folders = set()
+        with os.scandir(self.data_dir) as it:
+            for entry in it:
+                if entry.is_dir() and not entry.name.startswith('.'):
+                    folders.add(entry.name)
+
+        records = []
+        for folder in folders | set(entries):
+            record = _default_record(folder)
+            record.update(entries.get(folder, {}))
+            record['has_data'] = folder in folders
+            records.append(record)
+        records.sort(key=lambda r: (r['full_name'].lower(), r['folder']))
+        self.records = records
+        self.by_folder = {r['folder']: r for r in records}
+
+    def __len__(self):
+        return len(self.records)
+
+    def __iter__(self):
+        return iter(self.records)
+
+    def __contains__(self, folder):
+        return folder in self.by_folder
+
+    def get(self, folder, default=None):
+        return self.by_folder.get(folder, default)
+
+    def folders(self):
+        return [r['folder'] for r in self.records if r['has_data']]
+
+    def page_count(self, page_size=25):
+        return max(1, -(-len(self.records) // page_size))
+
+    def page(self, number, page_size=25):
+        # 1-based page of records in display order, plus the page count.
+        total_pages = self.page_count(page_size)
+        number = min(max(1, number), total_pages)
+        start = (number - 1) * page_size
+        return self.records[start:start + page_size], total_pages
+
+
+def _signature(data_dir, manifest_path):
+    # Adding/removing a folder changes the directory mtime; editing the
+    # manifest changes its own.
+    sig = [os.stat(data_dir).st_mtime_ns]
+    try:
+        st = os.stat(manifest_path)
+        sig += [st.st_mtime_ns, st.st_size]
+    except FileNotFoundError:
+        sig.append(None)
+    return tuple(sig)
+
+
+_registries = {}
+_registries_lock = threading.Lock()
+
+
+def get_registry(data_dir=None):
+    # Loaded lazily, then reused across Streamlit reruns and sessions until
+    # the data directory or the manifest changes on disk.
+    data_dir = data_dir or onboarding_pipeline.DATA_DIR
+    manifest_path = os.path.join(data_dir, MANIFEST_NAME)
+    with _registries_lock:
+        registry = _registries.get(data_dir)
+        if registry is None or registry.signature != _signature(data_dir, manifest_path):
+            registry = CompanyRegistry(data_dir, manifest_path)
+            _registries[data_dir] = registry
+        return registry
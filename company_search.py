@@ -0,0 +1,218 @@
+import os
+import re
+import bisect
+import pickle
+import threading
+from array import array
+from itertools import chain
+from collections import Counter
+
+import disk_cache
+
+INDEX_VERSION = 2
+
+_CAMEL_RE = re.compile(r'(?<=[a-z0-9])(?=[A-Z])')
+_NON_ALNUM_RE = re.compile(r'[^0-9a-z]+')
+_LEGAL_SUFFIXES = {'pvt', 'private', 'ltd', 'limited', 'llp', 'co', 'company', 'inc'}
+
+
+def normalize_id(value):
+    # CIN / LLPIN keys: case- and separator-insensitive ('aab 1234' == 'AAB-1234').
+    return re.sub(r'[^0-9A-Z]', '', (value or '').upper())
+
+
+def _name_words(value):
+    value = _CAMEL_RE.sub(' ', value or '').lower().replace('&', ' and ')
+    return _NON_ALNUM_RE.sub(' ', value).split()
+
+
+def normalize_name(value):
+    # Only the trailing legal form is dropped ('Triveni Agro Pvt Ltd' ->
+    # 'triveni agro'); suffix words elsewhere are part of the name
+    # ('CompanyA' -> 'company a'), and a name that is nothing but a legal
+    # form keeps its first word.
+    words = _name_words(value)
+    end = len(words)
+    while end > 1 and words[end - 1] in _LEGAL_SUFFIXES:
+        end -= 1
+    return ' '.join(words[:end])
+
+
+def _trigrams(text):
+    padded = f'  {text} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _dice(a, b):
+    return 2 * len(a & b) / (len(a) + len(b)) if a and b else 0.0
+
+
+class CompanySearchIndex:
+    # Prebuilt lookup structures over the company registry:
+    #   - exact CIN/LLPIN and exact normalized-name dicts (O(1)),
+    #   - a sorted key list for prefix/typeahead search (bisect),
+    #   - a trigram inverted index for fuzzy full-name matching.
+    # `records` are dicts with at least 'folder', 'cin' and 'full_name'.
+    def __init__(self, records, source_version=None):
+        self.source_version = source_version
+        self.records = [dict(r) for r in records]
+        self.by_id = {}
+        self.by_name = {}
+        prefix_keys = set()
+        self.trigrams = {}
+        for i, rec in enumerate(self.records):
+            cin = normalize_id(rec.get('cin'))
+            if cin:
+                self.by_id[cin] = i
+            names = {normalize_name(rec.get('full_name')), normalize_name(rec['folder'])}
+            names.discard('')
+            # The unstripped names are extra prefix keys, so a query typed up
+            # to and into the legal form ('triveni agro pvt l') still matches.
+            for source in (rec.get('full_name'), rec['folder']):
+                full = ' '.join(_name_words(source))
+                if full and full not in names:
+                    prefix_keys.add((full, i))
+                    prefix_keys.add((full.replace(' ', ''), i))
+            for name in names:
+                self.by_name.setdefault(name, i)
+                words = name.split()
+                # Every word suffix is a key, so 'agro' finds 'triveni agro products'.
+                for w in range(len(words)):
+                    prefix_keys.add((' '.join(words[w:]), i))
+                prefix_keys.add((name.replace(' ', ''), i))
+                for gram in _trigrams(name):
+                    self.trigrams.setdefault(gram, []).append(i)
+            if cin:
+                prefix_keys.add((cin.lower(), i))
+        self.prefix_keys = sorted(prefix_keys)
+        self._prefix_strings = [k for k, _ in self.prefix_keys]
+        self.trigrams = {gram: array('i', ids) for gram, ids in self.trigrams.items()}
+        self._names = [
+            (normalize_name(r.get('full_name')), normalize_name(r['folder'])) for r in self.records
+        ]
+
+    def __len__(self):
+        return len(self.records)
+
+    def lookup_cin(self, cin):
+        i = self.by_id.get(normalize_id(cin))
+        return self.records[i] if i is not None else None
+
+    def lookup_name(self, name):
+        i = self.by_name.get(normalize_name(name))
+        return self.records[i] if i is not None else None
+
+    def prefix(self, query, limit=10):
+        # Name keys are camel-split ('U01122MH' -> 'u01122 mh') while CIN keys
+        # are not, so the query is probed in both forms.
+        keys = []
+        for key in (normalize_name(query), normalize_id(query).lower()):
+            if key and key not in keys:
+                keys.append(key)
+        found = []
+        seen = set()
+        for key in keys:
+            start = bisect.bisect_left(self._prefix_strings, key)
+            for j in range(start, len(self.prefix_keys)):
+                k, i = self.prefix_keys[j]
+                if not k.startswith(key) or len(found) >= limit:
+                    break
+                if i not in seen:
+                    seen.add(i)
+                    found.append(self.records[i])
+        return found
+
+    def fuzzy(self, query, limit=10, cutoff=0.45, max_candidates=50, posting_budget=20000):
+        key = normalize_name(query)
+        if not key:
+            return []
+        grams = _trigrams(key)
+        # Candidates come from the rarest trigrams first; common ones say little
+        # about the match and dominate the cost, so stop once the budget is spent.
+        postings = sorted((self.trigrams[g] for g in grams if g in self.trigrams), key=len)
+        used = []
+        total = 0
+        for p in postings:
+            if used and total + len(p) > posting_budget:
+                break
+            used.append(p)
+            total += len(p)
+        counts = Counter(chain.from_iterable(used))
+        scored = []
+        for i, _ in counts.most_common(max_candidates):
+            # Dice similarity against the whole name and against its leading
+            # characters, so partially typed names still rank well.
+            score = max(
+                _dice(grams, _trigrams(text))
+                for name in self._names[i]
+                for text in (name, name[:len(key)])
+            )
+            if score >= cutoff:
+                scored.append((score, i))
+        scored.sort(key=lambda t: (-t[0], t[1]))
+        return [dict(self.records[i], score=round(s, 3)) for s, i in scored[:limit]]
+
+    def search(self, query, limit=10):
+        # Exact CIN or name, then typeahead prefixes; fuzzy only when neither hits.
+        query = (query or '').strip()
+        if not query:
+            return []
+        exact = self.lookup_cin(query) or self.lookup_name(query)
+        results = [dict(exact, match='exact')] if exact else []
+        seen = {r['folder'] for r in results}
+        for rec in self.prefix(query, limit):
+            if rec['folder'] not in seen:
+                seen.add(rec['folder'])
+                results.append(dict(rec, match='prefix'))
+        if not results:
+            for rec in self.fuzzy(query, limit):
+                if rec['folder'] not in seen:
+                    seen.add(rec['folder'])
+                    results.append(dict(rec, match='fuzzy'))
+        return results[:limit]
+
+    def save(self, path):
+        with disk_cache.atomic_write(path, 'wb') as f:
+            pickle.dump((INDEX_VERSION, self), f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as f:
+            version, index = pickle.load(f)
+        if version != INDEX_VERSION:
+            raise ValueError(f'Unsupported search index version: {version}')
+        return index
+
+
+_shared_index = None
+_shared_lock = threading.Lock()
+
+
+def get_search_index(records_loader, path=None, source_version=None):
+    # Built (or loaded from `path`) once per process and shared by every
+    # Streamlit session. `records_loader` is only called on a cold start or
+    # when `source_version` (e.g. the registry signature) changes.
+    global _shared_index
+    with _shared_lock:
+        if _shared_index is not None and _shared_index.source_version == source_version:
+            return _shared_index
+        _shared_index = None
+        path = path or os.environ.get('KYC_SEARCH_INDEX_PATH')
+        if path and os.path.exists(path):
+            try:
+                loaded = CompanySearchIndex.load(path)
+                if loaded.source_version == source_version:
+                    _shared_index = loaded
+            except (OSError, ValueError, pickle.UnpicklingError):
+                pass
+        if _shared_index is None:
+            _shared_index = CompanySearchIndex(records_loader(), source_version)
+            if path:
+                _shared_index.save(path)
+        return _shared_index
+
+
+def reset_search_index():
+    global _shared_index
+    with _shared_lock:
+        _shared_index = None
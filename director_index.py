@@ -0,0 +1,218 @@
+import os
+import re
+import hashlib
+import threading
+import unicodedata
+
+import onboarding_pipeline
+
+DEFAULT_WATCHLIST = ['Meena Rathi', 'Ritika Shah']
+
+_TITLE_RE = re.compile(r'^(?:mr|mrs|ms|dr|shri|smt)\s+')
+_NON_ALNUM_RE = re.compile(r'[^0-9a-z]+')
+
+
+def normalize_name(name):
+    name = unicodedata.normalize('NFKD', name or '')
+    name = ''.join(ch for ch in name if not unicodedata.combining(ch)).casefold()
+    name = _NON_ALNUM_RE.sub(' ', name).strip()
+    return _TITLE_RE.sub('', name)
+
+
+def normalize_din(din):
+    din = (din or '').strip()
+    return din.zfill(8) if din.isdigit() else din
+
+
+class Watchlist:
+    # Normalized-name set: membership is O(1) regardless of list size.
+    def __init__(self, names=()):
+        self._names = {}
+        self._digest = None
+        for name in names:
+            self.add(name)
+
+    def add(self, name):
+        key = normalize_name(name)
+        if key:
+            self._names.setdefault(key, name.strip())
+            self._digest = None
+
+    @property
+    def digest(self):
+        # Identifies the screened names, so cached reports (which carry the
+        # watchlist hits) are rebuilt when the list changes.
+        if self._digest is None:
+            self._digest = hashlib.sha256('\n'.join(sorted(self._names)).encode('utf-8')).hexdigest()
+        return self._digest
+
+    def __len__(self):
+        return len(self._names)
+
+    def __contains__(self, name):
+        return normalize_name(name) in self._names
+
+    def contains_normalized(self, key):
+        # Membership for a key already passed through normalize_name.
+        return key in self._names
+
+    def match(self, names):
+        return [n for n in names if normalize_name(n) in self._names]
+
+    @classmethod
+    def from_file(cls, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(line.strip() for line in f if line.strip() and not line.startswith('#'))
+
+
+def load_watchlist(path=None):
+    path = path or os.environ.get('KYC_WATCHLIST_PATH')
+    if path:
+        return Watchlist.from_file(path)
+    return Watchlist(DEFAULT_WATCHLIST)
+
+
+_watchlists = {}
+_watchlists_lock = threading.Lock()
+
+
+def get_watchlist(path=None):
+    # Loaded once per process and reused until the file's mtime or size
+    # changes, so a large watchlist is not re-read for every report.
+    path = path or os.environ.get('KYC_WATCHLIST_PATH')
+    if path:
+        st = os.stat(path)
+        signature = (st.st_mtime_ns, st.st_size)
+    else:
+        signature = None
+    with _watchlists_lock:
+        cached = _watchlists.get(path)
+        if cached is None or cached[0] != signature:
+            cached = _watchlists[path] = (signature, load_watchlist(path))
+        return cached[1]
+
+
+class DirectorIndex:
+    # Inverted index over every company's directors.csv:
+    #   DIN -> companies, normalized name -> DINs, company -> its (DIN, name) rows.
+    # refresh() re-reads only the CSVs whose mtime/size changed.
+    def __init__(self, data_dir=None):
+        self.data_dir = data_dir or onboarding_pipeline.DATA_DIR
+        self.din_companies = {}
+        self.name_dins = {}
+        self.din_names = {}
+        self.company_directors = {}
+        self._signatures = {}
+        self._lock = threading.RLock()
+
+    def refresh(self):
+        with self._lock:
+            seen = set()
+            with os.scandir(self.data_dir) as it:
+                for entry in it:
+                    if not entry.is_dir() or entry.name.startswith('.'):
+                        continue
+                    path = os.path.join(entry.path, 'directors.csv')
+                    try:
+                        st = os.stat(path)
+                    except FileNotFoundError:
+                        continue
+                    seen.add(entry.name)
+                    sig = (st.st_mtime_ns, st.st_size)
+                    if self._signatures.get(entry.name) != sig:
+                        self.update_company(entry.name, onboarding_pipeline.load_director_records(path))
+                        self._signatures[entry.name] = sig
+            for company in set(self.company_directors) - seen:
+                self.remove_company(company)
+        return self
+
+    def update_company(self, company, records):
+        with self._lock:
+            self.remove_company(company)
+            rows = []
+            for row in records:
+                din = normalize_din(row.get('din'))
+                name = (row.get('name') or '').strip()
+                if not din:
+                    continue
+                rows.append((din, name))
+                self.din_companies.setdefault(din, set()).add(company)
+                self.din_names.setdefault(din, name)
+                key = normalize_name(name)
+                if key:
+                    self.name_dins.setdefault(key, set()).add(din)
+            self.company_directors[company] = rows
+
+    def remove_company(self, company):
+        # Companies can spell a shared DIN's name differently, so a name key
+        # is dropped only when no remaining company lists the DIN under it.
+        with self._lock:
+            self._signatures.pop(company, None)
+            rows = self.company_directors.pop(company, ())
+            for din in {din for din, _ in rows}:
+                companies = self.din_companies.get(din)
+                if companies is None:
+                    continue
+                companies.discard(company)
+                remaining = [n for c in companies for d, n in self.company_directors.get(c, ()) if d == din]
+                if not companies:
+                    del self.din_companies[din]
+                    self.din_names.pop(din, None)
+                elif self.din_names.get(din) not in remaining:
+                    self.din_names[din] = remaining[0]
+                keep = {normalize_name(n) for n in remaining}
+                for key in {normalize_name(n) for d, n in rows if d == din} - keep:
+                    dins = self.name_dins.get(key)
+                    if dins is not None:
+                        dins.discard(din)
+                        if not dins:
+                            del self.name_dins[key]
+
+    def companies_for_din(self, din):
+        return sorted(self.din_companies.get(normalize_din(din), ()))
+
+    def dins_for_name(self, name):
+        return sorted(self.name_dins.get(normalize_name(name), ()))
+
+    def interlocks(self):
+        with self._lock:
+            return {
+                din: sorted(companies)
+                for din, companies in self.din_companies.items() if len(companies) > 1
+            }
+
+    def connected_companies(self, company):
+        with self._lock:
+            linked = {}
+            for din, _ in self.company_directors.get(company, ()):
+                for other in self.din_companies.get(din, ()):
+                    if other != company:
+                        linked.setdefault(other, []).append(din)
+            return linked
+
+    def screen_watchlist(self, watchlist):
+        # One pass over the indexed names; each probe is a set lookup.
+        with self._lock:
+            hits = []
+            for key, dins in self.name_dins.items():
+                if not watchlist.contains_normalized(key):
+                    continue
+                for din in sorted(dins):
+                    hits.append({
+                        'din': din,
+                        'name': self.din_names.get(din, ''),
+                        'companies': sorted(self.din_companies.get(din, ())),
+                    })
+            return hits
+
+
+_shared_index = None
+_shared_lock = threading.Lock()
+
+
+def get_director_index(data_dir=None):
+    global _shared_index
+    with _shared_lock:
+        if _shared_index is None or (data_dir and _shared_index.data_dir != data_dir):
+            _shared_index = DirectorIndex(data_dir)
+        return _shared_index.refresh()
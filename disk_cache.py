@@ -0,0 +1,149 @@
+import os
+import json
+import hashlib
+import threading
+from contextlib import contextmanager
+from collections import OrderedDict
+
+
+@contextmanager
+def atomic_write(path, mode='w', encoding='utf-8'):
+    # Writes go to a temporary file next to `path` (unique per process and
+    # thread) that replaces `path` only once the block completes, so readers
+    # never see a partial file.
+    tmp = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+    try:
+        with open(tmp, mode, encoding=None if 'b' in mode else encoding) as f:
+            yield f
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def write_json(path, data, **kwargs):
+    with atomic_write(path) as f:
+        json.dump(data, f, ensure_ascii=False, **kwargs)
+
+
+_fingerprints = {}
+_fingerprints_lock = threading.Lock()
+
+
+def file_fingerprint(path, previous=None):
+    # (path, mtime, size, sha256). The digest is only recomputed when the
+    # stat signature changes, so a warm lookup costs one os.stat per file.
+    # `previous` is a fingerprint known from elsewhere (e.g. a manifest) that
+    # is trusted the same way.
+    st = os.stat(path)
+    sig = (st.st_mtime_ns, st.st_size)
+    if previous is not None and tuple(previous[1:3]) == sig:
+        return (path,) + tuple(previous[1:])
+    with _fingerprints_lock:
+        known = _fingerprints.get(path)
+    if known is not None and known[0] == sig:
+        return known[1]
+    with open(path, 'rb') as f:
+        digest = hashlib.sha256(f.read()).hexdigest()
+    fp = (path, st.st_mtime_ns, st.st_size, digest)
+    with _fingerprints_lock:
+        _fingerprints[path] = (sig, fp)
+    return fp
+
+
+class LruDiskCache:
+    # Thread-safe LRU shared between callers, optionally persisted as one JSON
+    # file per key under `persist_dir`. Values must be treated as read-only.
+    # Subclasses name the files and convert values to and from JSON.
+    def __init__(self, maxsize=256, persist_dir=None):
+        self.maxsize = maxsize
+        self.persist_dir = persist_dir
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        if persist_dir:
+            os.makedirs(persist_dir, exist_ok=True)
+
+    def _disk_path(self, key):
+        digest = hashlib.sha256(repr(key).encode('utf-8')).hexdigest()
+        return os.path.join(self.persist_dir, f'{digest}.json')
+
+    def _encode(self, value):
+        return value
+
+    def _decode(self, data):
+        return data
+
+    def __contains__(self, key):
+        with self._lock:
+            if key in self._entries:
+                return True
+        return bool(self.persist_dir) and os.path.exists(self._disk_path(key))
+
+    def lookup(self, key):
+        # Memory first, then disk; None on a miss (counted by add()).
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+        value = self._load(key)
+        if value is not None:
+            self._remember(key, value)
+            with self._lock:
+                self.disk_hits += 1
+        return value
+
+    def add(self, key, value):
+        self._store(key, value)
+        self._remember(key, value)
+        with self._lock:
+            self.misses += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.disk_hits = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'hit_rate': (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+            }
+
+    def _remember(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def _load(self, key):
+        if not self.persist_dir:
+            return None
+        try:
+            with open(self._disk_path(key), 'r', encoding='utf-8') as f:
+                return self._decode(json.load(f))
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def _store(self, key, value):
+        # Best effort: a cache that cannot be written is still a cache.
+        if not self.persist_dir:
+            return
+        try:
+            write_json(self._disk_path(key), self._encode(value))
+        except OSError:
+            pass
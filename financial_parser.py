@@ -0,0 +1,224 @@
+import re
+import sys
+import json
+import argparse
+from decimal import Decimal, InvalidOperation
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor
+
+PAISE_PER_RUPEE = 100
+LAKH_PAISE = 100000 * PAISE_PER_RUPEE
+CRORE_PAISE = 10000000 * PAISE_PER_RUPEE
+
+FIELDS = {
+    'assets': 'assets',
+    'total assets': 'assets',
+    'liabilities': 'liabilities',
+    'total liabilities': 'liabilities',
+    'net worth': 'net_worth',
+    'networth': 'net_worth',
+    'year': 'year',
+    'financial year': 'year',
+    'fy': 'year',
+}
+
+_UNITS = {
+    'cr': CRORE_PAISE, 'crore': CRORE_PAISE, 'crores': CRORE_PAISE,
+    'l': LAKH_PAISE, 'lakh': LAKH_PAISE, 'lakhs': LAKH_PAISE, 'lac': LAKH_PAISE, 'lacs': LAKH_PAISE,
+    '': PAISE_PER_RUPEE,
+}
+
+# '₹12.5Cr', 'Rs. 12,50,000', '-₹3.2 Lakh', '(₹1.1Cr)', 'INR 4,000'
+_AMOUNT_RE = re.compile(
+    r'^\s*(?P<open>\()?\s*(?P<sign>[-+])?\s*(?:₹|rs\.?|inr)?\s*(?P<sign2>[-+])?\s*'
+    r'(?P<num>\d{1,3}(?:,\d{2})*,\d{3}|\d{1,3}(?:,\d{3})+|\d+)(?P<frac>\.\d+)?\s*'
+    r'(?P<unit>crores?|cr|lakhs?|lacs?|l)?\.?\s*(?P<close>\))?\s*$',
+    re.IGNORECASE,
+)
+_FIELD_RE = re.compile(r'^\s*(?P<key>[A-Za-z][A-Za-z ]*?)\s*:\s*(?P<value>.*?)\s*$')
+_YEAR_RE = re.compile(r'(?:19|20)\d{2}')
+
+
+class FinancialParseError(ValueError):
+    pass
+
+
+@lru_cache(maxsize=65536)
+def parse_amount(text):
+    # Integer paise for an Indian-format amount; raises FinancialParseError.
+    # Cached, so the same source string is only parsed once per process.
+    m = _AMOUNT_RE.match(text or '')
+    if m is None or bool(m.group('open')) != bool(m.group('close')):
+        raise FinancialParseError(f'Unrecognised amount: {text!r}')
+    try:
+        value = Decimal(m.group('num').replace(',', '') + (m.group('frac') or ''))
+    except InvalidOperation:
+        raise FinancialParseError(f'Unrecognised amount: {text!r}')
+    paise = int((value * _UNITS[(m.group('unit') or '').lower()]).to_integral_value())
+    negative = m.group('open') or (m.group('sign') or m.group('sign2')) == '-'
+    return -paise if negative else paise
+
+
+def parse_year(text):
+    m = _YEAR_RE.search(text or '')
+    if m is None:
+        raise FinancialParseError(f'Unrecognised year: {text!r}')
+    return int(m.group(0))
+
+
+def paise_to_crore(paise):
+    return None if paise is None else paise / CRORE_PAISE
+
+
+class FinancialRecord:
+    # One reporting period. Amounts are integer paise (None when absent);
+    # `raw` keeps the source strings for display.
+    __slots__ = ('year', 'assets', 'liabilities', 'net_worth', 'raw')
+
+    def __init__(self, year=None, assets=None, liabilities=None, net_worth=None, raw=None):
+        self.year = year
+        self.assets = assets
+        self.liabilities = liabilities
+        self.net_worth = net_worth
+        self.raw = raw if raw is not None else {}
+
+    def __repr__(self):
+        return (f'FinancialRecord(year={self.year!r}, assets={self.assets!r}, '
+                f'liabilities={self.liabilities!r}, net_worth={self.net_worth!r})')
+
+    def __eq__(self, other):
+        return isinstance(other, FinancialRecord) and self.to_dict() == other.to_dict()
+
+    @property
+    def debt_ratio(self):
+        if self.assets is None or self.liabilities is None:
+            return None
+        return self.liabilities / self.assets if self.assets else 0
+
+    def to_dict(self):
+        return {
+            'year': self.year,
+            'assets': self.assets,
+            'liabilities': self.liabilities,
+            'net_worth': self.net_worth,
+            'raw': dict(self.raw),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data.get('year'), data.get('assets'), data.get('liabilities'),
+                   data.get('net_worth'), data.get('raw'))
+
+
+class FinancialStatement:
+    # All periods found in one financials file, oldest first, plus any
+    # lines that could not be parsed (never silently dropped).
+    __slots__ = ('records', 'errors')
+
+    def __init__(self, records=None, errors=None):
+        self.records = sorted(records or [], key=lambda r: (r.year is None, r.year or 0))
+        self.errors = errors or []
+
+    def __len__(self):
+        return len(self.records)
+
+    def __iter__(self):
+        return iter(self.records)
+
+    @property
+    def latest(self):
+        return self.records[-1] if self.records else FinancialRecord()
+
+    def years(self):
+        return [r.year for r in self.records]
+
+    def to_dict(self):
+        return {'records': [r.to_dict() for r in self.records], 'errors': list(self.errors)}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls([FinancialRecord.from_dict(r) for r in data['records']], data.get('errors'))
+
+
+def parse_statement_lines(lines, strict=False):
+    # A period ends when a field repeats or a second Year line appears, so
+    # both "fields then Year" and "Year then fields" layouts are accepted.
+    records = []
+    errors = []
+    current = None
+
+    def flush():
+        if current is not None and (current.raw or current.year is not None):
+            records.append(current)
+
+    for lineno, line in enumerate(lines, 1):
+        m = _FIELD_RE.match(line)
+        if m is None:
+            continue
+        field = FIELDS.get(m.group('key').lower())
+        if field is None:
+            continue
+        value = m.group('value')
+        if current is None:
+            current = FinancialRecord()
+        if field == 'year':
+            if current.year is not None:
+                flush()
+                current = FinancialRecord()
+        elif field in current.raw:
+            flush()
+            current = FinancialRecord()
+        try:
+            if field == 'year':
+                current.year = parse_year(value)
+            else:
+                current.raw[field] = value
+                setattr(current, field, parse_amount(value))
+        except FinancialParseError as e:
+            if strict:
+                raise FinancialParseError(f'line {lineno}: {e}') from None
+            errors.append({'line': lineno, 'field': field, 'value': value, 'error': str(e)})
+    flush()
+    return FinancialStatement(records, errors)
+
+
+def parse_statement(path, strict=False):
+    with open(path, 'r', encoding='utf-8') as f:
+        return parse_statement_lines(f, strict)
+
+
+def _parse_path(path):
+    try:
+        return path, parse_statement(path).to_dict(), None
+    except (OSError, UnicodeDecodeError) as e:
+        return path, None, f'{type(e).__name__}: {e}'
+
+
+def parse_many(paths, workers=None, chunksize=256):
+    # Bulk API: yields (path, FinancialStatement or None, error) in input
+    # order. workers=None parses in-process; >1 fans out over a process pool.
+    if not workers or workers == 1:
+        for path in paths:
+            try:
+                yield path, parse_statement(path), None
+            except (OSError, UnicodeDecodeError) as e:
+                yield path, None, f'{type(e).__name__}: {e}'
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for path, data, error in pool.map(_parse_path, paths, chunksize=chunksize):
+            yield path, FinancialStatement.from_dict(data) if data else None, error
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Parse financials files into typed per-year records (paise).')
+    parser.add_argument('paths', nargs='+')
+    parser.add_argument('-w', '--workers', type=int, default=None)
+    args = parser.parse_args(argv)
+    for path, statement, error in parse_many(args.paths, args.workers):
+        record = {'path': path, 'error': error} if error else {'path': path, **statement.to_dict()}
+        print(json.dumps(record, ensure_ascii=False))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
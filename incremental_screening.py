@@ -0,0 +1,182 @@
+import os
+import sys
+import json
+import time
+import argparse
+
+import disk_cache
+import director_index
+import onboarding_pipeline
+import risk_rules
+from batch_screening import discover_companies
+
+MANIFEST_VERSION = 1
+
+# Input file -> the stage that consumes it. assess_risk and report assembly
+# always re-run for a touched company (and for every company when the
+# watchlist changes); they are cheap next to the parsers.
+# financials.pdf replaces financials.txt when a company has one.
+STAGE_FILES = {
+    'directors': 'directors.csv',
+    'financials': 'financials.txt',
+    'litigation': 'court_cases.txt',
+}
+
+
+def load_manifest(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        return {'version': MANIFEST_VERSION, 'companies': {}}
+    if manifest.get('version') != MANIFEST_VERSION:
+        return {'version': MANIFEST_VERSION, 'companies': {}}
+    return manifest
+
+
+def save_manifest(manifest, path):
+    disk_cache.write_json(path, manifest)
+
+
+def _fingerprint(path, previous=None):
+    # Manifest form of disk_cache.file_fingerprint: an unchanged
+    # (mtime, size) pair is trusted, only files whose stat moved are hashed.
+    known = (path, previous['mtime_ns'], previous['size'], previous['sha256']) if previous else None
+    _, mtime_ns, size, digest = disk_cache.file_fingerprint(path, known)
+    return {'mtime_ns': mtime_ns, 'size': size, 'sha256': digest}
+
+
+def _run_stage(stage, path):
+    if stage == 'directors':
+        return onboarding_pipeline.load_director_records(path)
+    if stage == 'financials':
+        return onboarding_pipeline.parse_financials(path)
+    return onboarding_pipeline.summarize_court_cases(path, max_pending=onboarding_pipeline.MAX_PENDING_CASES,
+                                                     max_flags=onboarding_pipeline.MAX_FLAGS).to_dict()
+
+
+def rescreen_company(company, data_dir, previous=None, rules_changed=False, watchlist_changed=False):
+    # A changed rules file can change keyword flags, so litigation re-runs too.
+    folder = os.path.join(data_dir, company)
+    files = {}
+    stages = {}
+    rerun = []
+    for stage, filename in STAGE_FILES.items():
+        if stage == 'financials':
+            path = onboarding_pipeline.financials_path(folder)
+            filename = os.path.basename(path)
+        else:
+            path = os.path.join(folder, filename)
+        old_fp = previous['files'].get(filename) if previous else None
+        fp = _fingerprint(path, old_fp)
+        files[filename] = fp
+        if old_fp and old_fp['sha256'] == fp['sha256'] and not (rules_changed and stage == 'litigation'):
+            stages[stage] = previous['stages'][stage]
+        else:
+            stages[stage] = _run_stage(stage, path)
+            rerun.append(stage)
+    if previous and not rerun and not watchlist_changed:
+        previous['files'] = files
+        return previous, rerun
+
+    json_report, summary = onboarding_pipeline.assemble_report(
+        company,
+        stages['directors'],
+        stages['financials'],
+        onboarding_pipeline.LitigationSummary.from_dict(stages['litigation']),
+    )
+    entry = {'files': files, 'stages': stages, 'json_report': json_report, 'summary': summary}
+    return entry, rerun
+
+
+def run_incremental(manifest_path, data_dir=None):
+    data_dir = data_dir or onboarding_pipeline.DATA_DIR
+    manifest = load_manifest(manifest_path)
+    known = manifest['companies']
+    start = time.perf_counter()
+
+    current = discover_companies(data_dir)
+    rules_digest = risk_rules.get_rules().digest
+    rules_changed = manifest.get('rules') != rules_digest
+    watchlist_digest = director_index.get_watchlist().digest
+    watchlist_changed = manifest.get('watchlist') != watchlist_digest
+    delta = []
+    stage_runs = {stage: 0 for stage in STAGE_FILES}
+    errors = {}
+    companies = {}
+    for company in current:
+        previous = known.get(company)
+        try:
+            entry, rerun = rescreen_company(company, data_dir, previous, rules_changed, watchlist_changed)
+        except Exception as e:
+            errors[company] = f'{type(e).__name__}: {e}'
+            if previous:
+                companies[company] = previous
+            continue
+        companies[company] = entry
+        for stage in rerun:
+            stage_runs[stage] += 1
+        if not rerun and not watchlist_changed:
+            continue
+        old_risk = previous['json_report']['risk_level'] if previous else None
+        new_risk = entry['json_report']['risk_level']
+        delta.append({
+            'company_id': company,
+            'change': 'changed' if previous else 'added',
+            'stages': rerun,
+            'old_risk': old_risk,
+            'new_risk': new_risk,
+            'risk_changed': old_risk != new_risk,
+        })
+    for company in sorted(set(known) - set(current)):
+        delta.append({
+            'company_id': company,
+            'change': 'deleted',
+            'stages': [],
+            'old_risk': known[company]['json_report']['risk_level'],
+            'new_risk': None,
+            'risk_changed': True,
+        })
+
+    manifest['companies'] = companies
+    manifest['rules'] = rules_digest
+    manifest['watchlist'] = watchlist_digest
+    save_manifest(manifest, manifest_path)
+    stats = {
+        'companies': len(current),
+        'recomputed': sum(1 for d in delta if d['change'] != 'deleted'),
+        'deleted': sum(1 for d in delta if d['change'] == 'deleted'),
+        'risk_changes': sum(1 for d in delta if d['risk_changed']),
+        'rules_changed': rules_changed,
+        'watchlist_changed': watchlist_changed,
+        'stage_runs': stage_runs,
+        'errors': errors,
+        'elapsed_s': round(time.perf_counter() - start, 3),
+    }
+    return delta, stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Re-screen only the companies whose input files changed.')
+    parser.add_argument('-m', '--manifest', default='kyc_manifest.json', help='fingerprint/report manifest')
+    parser.add_argument('-d', '--data-dir', default=onboarding_pipeline.DATA_DIR)
+    parser.add_argument('-o', '--delta', default=None, help='write the delta as JSON lines (default: stdout)')
+    parser.add_argument('--all-changes', action='store_true', help='also emit recomputed companies whose risk level did not move')
+    args = parser.parse_args(argv)
+
+    delta, stats = run_incremental(args.manifest, args.data_dir)
+    if not args.all_changes:
+        delta = [d for d in delta if d['risk_changed']]
+    out = open(args.delta, 'w', encoding='utf-8') if args.delta else sys.stdout
+    try:
+        for record in delta:
+            out.write(json.dumps(record, ensure_ascii=False) + '\n')
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    print(json.dumps(stats, ensure_ascii=False), file=sys.stderr)
+    return 0 if not stats['errors'] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
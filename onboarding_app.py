@@ -1,9 +1,109 @@
 import streamlit as st
+import os
 import json
+import tempfile
 import onboarding_pipeline
+import director_index
+import company_search
+import company_registry
+import company_history
+import report_export
+import risk_scoring
+import risk_rules
+import pipeline_metrics
 import pandas as pd
 from datetime import datetime
 import re
+import time
+from collections import deque
+
+# Injected once per rerun as a single unchanged element, so Streamlit does not
+# rebuild it.
+APP_CSS = """
+    <style>
+    .main-header {
+        background: linear-gradient(135deg, #003366, #004d99);
+        color: white;
+        padding: 1.5em 2em;
+        border-radius: 15px;
+        margin-bottom: 1.5em;
+        box-shadow: 0 4px 20px rgba(0,51,102,0.3);
+    }
+    .card {
+        background: #ffffff;
+        padding: 1.5em;
+        border-radius: 12px;
+        box-shadow: 0 4px 12px rgba(0,0,0,0.1);
+        margin-bottom: 1.5em;
+        border-left: 4px solid #003366;
+    }
+    .risk-badge {
+        font-size: 1.2em;
+        font-weight: bold;
+        padding: 0.5em 1.2em;
+        border-radius: 25px;
+        display: inline-block;
+        text-align: center;
+        box-shadow: 0 2px 8px rgba(0,0,0,0.2);
+    }
+    .metric-card {
+        background: linear-gradient(135deg, #f8f9fa, #e9ecef);
+        padding: 1em;
+        border-radius: 10px;
+        text-align: center;
+        margin: 0.5em 0;
+    }
+    .footer {
+        text-align: center;
+        color: #6c757d;
+        margin-top: 3em;
+        padding: 1em;
+        border-top: 1px solid #dee2e6;
+    }
+    .search-hint {
+        background: #e7f3ff;
+        padding: 0.8em;
+        border-radius: 8px;
+        border-left: 4px solid #007bff;
+        margin: 1em 0;
+    }
+    .status-indicator {
+        display: inline-block;
+        width: 12px;
+        height: 12px;
+        border-radius: 50%;
+        margin-right: 8px;
+    }
+    .success { background-color: #28a745; }
+    .warning { background-color: #ffc107; }
+    .danger { background-color: #dc3545; }
+    </style>
+"""
+
+# st.fragment reruns only the decorated function when a widget inside it
+# changes; older Streamlit releases ship it as experimental_fragment.
+fragment = getattr(st, "fragment", None) or st.experimental_fragment
+
+RERUN_LOG_SIZE = 100
+
+# Bulk exports get one file per export in a shared directory; files older
+# than EXPORT_MAX_AGE_S are removed whenever a new export starts.
+EXPORT_DIR = os.path.join(tempfile.gettempdir(), "kyc_exports")
+EXPORT_MAX_AGE_S = 3600
+
+def new_export_path(fmt, previous=None):
+    os.makedirs(EXPORT_DIR, exist_ok=True)
+    cutoff = time.time() - EXPORT_MAX_AGE_S
+    with os.scandir(EXPORT_DIR) as it:
+        for entry in it:
+            try:
+                if entry.path == previous or entry.stat().st_mtime < cutoff:
+                    os.remove(entry.path)
+            except OSError:
+                pass
+    fd, path = tempfile.mkstemp(prefix="kyc_reports-", suffix=report_export.FORMATS[fmt], dir=EXPORT_DIR)
+    os.close(fd)
+    return path
 
 def main():
     st.set_page_config(
@@ -13,67 +113,11 @@ def main():
         initial_sidebar_state="expanded"
     )
     
+    rerun_start = time.perf_counter()
+    report_built = False
+
     # Enhanced CSS styling
-    st.markdown("""
-        <style>
-        .main-header {
-            background: linear-gradient(135deg, #003366, #004d99);
-            color: white;
-            padding: 1.5em 2em;
-            border-radius: 15px;
-            margin-bottom: 1.5em;
-            box-shadow: 0 4px 20px rgba(0,51,102,0.3);
-        }
-        .card {
-            background: #ffffff;
-            padding: 1.5em;
-            border-radius: 12px;
-            box-shadow: 0 4px 12px rgba(0,0,0,0.1);
-            margin-bottom: 1.5em;
-            border-left: 4px solid #003366;
-        }
-        .risk-badge {
-            font-size: 1.2em;
-            font-weight: bold;
-            padding: 0.5em 1.2em;
-            border-radius: 25px;
-            display: inline-block;
-            text-align: center;
-            box-shadow: 0 2px 8px rgba(0,0,0,0.2);
-        }
-        .metric-card {
-            background: linear-gradient(135deg, #f8f9fa, #e9ecef);
-            padding: 1em;
-            border-radius: 10px;
-            text-align: center;
-            margin: 0.5em 0;
-        }
-        .footer {
-            text-align: center;
-            color: #6c757d;
-            margin-top: 3em;
-            padding: 1em;
-            border-top: 1px solid #dee2e6;
-        }
-        .search-hint {
-            background: #e7f3ff;
-            padding: 0.8em;
-            border-radius: 8px;
-            border-left: 4px solid #007bff;
-            margin: 1em 0;
-        }
-        .status-indicator {
-            display: inline-block;
-            width: 12px;
-            height: 12px;
-            border-radius: 50%;
-            margin-right: 8px;
-        }
-        .success { background-color: #28a745; }
-        .warning { background-color: #ffc107; }
-        .danger { background-color: #dc3545; }
-        </style>
-    """, unsafe_allow_html=True)
+    st.markdown(APP_CSS, unsafe_allow_html=True)
 
     # Header with enhanced design
     st.markdown("""
@@ -87,56 +131,48 @@ def main():
     with st.sidebar:
         st.markdown("### 🔍 Company Search")
         
-        # Company mapping with more realistic data
-        company_map = {
-            "TriveniAgro": {
-                "cin": "U01122MH2012PTC123456",
-                "full_name": "Triveni Agro Products Pvt Ltd",
-                "industry": "Agriculture"
-            },
-            "UrbanEdgeTech": {
-                "cin": "AAB-1234",
-                "full_name": "UrbanEdge Technologies LLP",
-                "industry": "Technology"
-            },
-            "ShreeFinance": {
-                "cin": "L65910DL2010PLC234567",
-                "full_name": "Shree Finance & Leasing Ltd",
-                "industry": "Financial Services"
-            },
-            "GreenLeafFoods": {
-                "cin": "U15122TN2018PTC345678",
-                "full_name": "GreenLeaf Foods Pvt Ltd",
-                "industry": "Food Processing"
-            },
-            "ZenithInfra": {
-                "cin": "U45201MH2012PLC456789",
-                "full_name": "Zenith Infrastructure Projects Ltd",
-                "industry": "Infrastructure"
-            }
-        }
+        # Company registry discovered from data/ and data/companies.json, cached between reruns
+        registry = company_registry.get_registry()
+        company_map = registry.by_folder
         
+        # Built once per process from the registry and shared across sessions
+        search_index = company_search.get_search_index(lambda: registry.records, source_version=registry.signature)
+
         # Search options
         search_type = st.radio("Search by:", ["Company Name", "CIN", "Browse All"], horizontal=True)
         
         if search_type == "Company Name":
-            company_input = st.text_input("Enter Company Name", placeholder="e.g., TriveniAgro, UrbanEdgeTech")
+            company_input = st.text_input("Enter Company Name", placeholder="e.g., TriveniAgro, triveni agro")
+            if company_input:
+                matches = search_index.search(company_input, limit=8)
+                if matches and matches[0]["match"] == "exact":
+                    company_input = matches[0]["folder"]
+                elif matches:
+                    choice = st.selectbox(
+                        "Matching companies", matches,
+                        format_func=lambda r: f"{r['full_name']} ({r['cin']})"
+                    )
+                    company_input = choice["folder"]
             cin_input = company_map.get(company_input, {}).get("cin", "") if company_input else ""
             
         elif search_type == "CIN":
             cin_input = st.text_input("Enter CIN", placeholder="e.g., U01122MH2012PTC123456")
-            company_input = ""
             # Auto-detect company from CIN
-            for name, data in company_map.items():
-                if data["cin"] == cin_input:
-                    company_input = name
-                    break
+            cin_match = search_index.lookup_cin(cin_input) if cin_input else None
+            company_input = cin_match["folder"] if cin_match else ""
                     
         else:  # Browse All
             st.markdown("#### Available Companies:")
-            for name, data in company_map.items():
-                if st.button(f"📊 {data['full_name']}", key=f"btn_{name}", use_container_width=True):
-                    st.session_state.selected_company = name
+            page_size = 20
+            total_pages = registry.page_count(page_size)
+            page_number = 1
+            if total_pages > 1:
+                page_number = int(st.number_input("Page", min_value=1, max_value=total_pages, value=1, step=1))
+            page_records, total_pages = registry.page(page_number, page_size)
+            st.caption(f"Page {page_number} of {total_pages} · {len(registry)} companies")
+            for data in page_records:
+                if st.button(f"📊 {data['full_name']}", key=f"btn_{data['folder']}", use_container_width=True):
+                    st.session_state.selected_company = data['folder']
             company_input = st.session_state.get('selected_company', '')
             cin_input = company_map.get(company_input, {}).get("cin", "")
         
@@ -166,21 +202,27 @@ def main():
         
         st.markdown("---")
         st.markdown("### 📋 Quick Actions")
-        export_format = st.selectbox("Export Format", ["PDF", "Excel", "JSON"])
+        export_format = st.selectbox("Export Format", ["PDF", "Excel", "JSON"], key="export_format")
+        render_bulk_export(registry, export_format)
+        collect_metrics = st.checkbox("⏱️ Collect performance metrics", value=pipeline_metrics.ENABLED)
         
         # Company statistics
         st.markdown("### 📊 Database Stats")
         st.metric("Companies", len(company_map))
         st.metric("Last Updated", datetime.now().strftime("%Y-%m-%d"))
+        cache_stats = onboarding_pipeline.REPORT_CACHE.stats()
+        st.caption(f"Report cache: {cache_stats['hits'] + cache_stats['disk_hits']} hits / {cache_stats['misses']} misses")
+        history_stats = company_history.HISTORY_CACHE.stats()
+        st.caption(f"History cache: {history_stats['hits']} hits / {history_stats['misses']} misses")
     
-    # Reverse mapping CIN to folder
-    cin_to_folder = {data["cin"]: name for name, data in company_map.items()}
+    # Reverse lookup CIN to folder
+    cin_match = search_index.lookup_cin(cin_input) if cin_input else None
 
     # Display company name if found
     display_name = company_input
     full_company_name = "Unknown Company"
-    if cin_input in cin_to_folder:
-        display_name = cin_to_folder[cin_input]
+    if cin_match:
+        display_name = cin_match["folder"]
         full_company_name = company_map[display_name]["full_name"]
     elif company_input in company_map:
         full_company_name = company_map[company_input]["full_name"]
@@ -198,174 +240,39 @@ def main():
         st.markdown("<h2 style='color:#6c757d;'>Select a company to begin analysis</h2>", unsafe_allow_html=True)
         generate_report = False
 
+    # Priority: CIN search, then name
+    folder = None
+    if cin_match:
+        folder = cin_match["folder"]
+    elif company_input in company_map:
+        folder = company_input
+
+    # The report view lives in session_state, so reruns from other widgets
+    # (export format, downloads, paging) redraw it without touching the pipeline.
     if generate_report:
-        import os
-        folder = None
-        # Priority: CIN search, then name
-        if cin_input in cin_to_folder:
-            folder = cin_to_folder[cin_input]
-        elif company_input in company_map:
-            folder = company_input
         if folder:
             data_path = f"{onboarding_pipeline.DATA_DIR}/{folder}"
             if not os.path.exists(data_path):
+                st.session_state.pop("report_view", None)
                 st.error(f"❌ Company '{display_name}' not found in records.")
             else:
                 with st.spinner("🔄 Analyzing company data..."):
                     try:
-                        json_report, summary = onboarding_pipeline.generate_report(folder)
-                        directors = onboarding_pipeline.load_directors(f"{onboarding_pipeline.DATA_DIR}/{folder}/directors.csv")
-
-                        # --- Director Watchlist ---
-                        watchlist = ["Meena Rathi", "Ritika Shah"]
-                        flagged_directors = [d for d in directors if d in watchlist]
-
-                        # --- Compliance Score Calculation ---
-                        assets = json_report["financial_health"].get("assets", "0").replace('₹','').replace('Cr','').replace(',','')
-                        liabilities = json_report["financial_health"].get("liabilities", "0").replace('₹','').replace('Cr','').replace(',','')
-                        try:
-                            assets_val = float(assets)
-                            liab_val = float(liabilities)
-                            debt_ratio = liab_val / assets_val if assets_val > 0 else 0
-                        except:
-                            debt_ratio = 0
-                        pending_cases = len([case for case in json_report.get("legal_cases", []) if case.get("status", "").lower() == "pending"])
-                        score = 100
-                        score -= int(debt_ratio * 50)
-                        score -= pending_cases * 10
-                        score -= len(flagged_directors) * 20
-                        score = max(0, min(100, score))
-                        score_color = "#28a745" if score >= 70 else ("#ffc107" if score > 40 else "#dc3545")
-                        # Set risk level from score
-                        if score >= 70:
-                            ui_risk_level = "Low"
-                        elif score > 40:
-                            ui_risk_level = "Medium"
-                        else:
-                            ui_risk_level = "High"
-
-                        # --- Risk Trend Visualization (Mock Data) ---
-                        years = [2021, 2022, 2023, 2024]
-                        debt_trend = [debt_ratio * (0.8 + 0.05*i) for i in range(len(years))]
-                        case_trend = [max(0, pending_cases - i) for i in range(len(years))]
-
-                        st.success("✅ Analysis completed successfully!")
-                        metrics_col1, metrics_col2, metrics_col3, metrics_col4, metrics_col5 = st.columns(5)
-                        with metrics_col1:
-                            risk_color_bg = {"Low": "#d4edda", "Medium": "#fff3cd", "High": "#f8d7da"}
-                            risk_icon = {"Low": "✅", "Medium": "⚠️", "High": "❌"}
-                            st.markdown(f"""
-                                <div class='metric-card' style='background:{risk_color_bg.get(ui_risk_level, '#f8f9fa')};'>
-                                    <h3 style='margin:0; color:#003366;'>{risk_icon.get(ui_risk_level, 'ℹ️')} {ui_risk_level}</h3>
-                                    <p style='margin:0; font-size:0.9em;'>Risk Level</p>
-                                </div>
-                            """, unsafe_allow_html=True)
-                        with metrics_col2:
-                            st.markdown(f"""
-                                <div class='metric-card'>
-                                    <h3 style='margin:0; color:#003366;'>{len(directors)}</h3>
-                                    <p style='margin:0; font-size:0.9em;'>Active Directors</p>
-                                </div>
-                            """, unsafe_allow_html=True)
-                        with metrics_col3:
-                            st.markdown(f"""
-                                <div class='metric-card'>
-                                    <h3 style='margin:0; color:#003366;'>{pending_cases}</h3>
-                                    <p style='margin:0; font-size:0.9em;'>Pending Cases</p>
-                                </div>
-                            """, unsafe_allow_html=True)
-                        with metrics_col4:
-                            flag_count = len(json_report.get("flags", []))
-                            st.markdown(f"""
-                                <div class='metric-card'>
-                                    <h3 style='margin:0; color:#003366;'>{flag_count}</h3>
-                                    <p style='margin:0; font-size:0.9em;'>Alert Flags</p>
-                                </div>
-                            """, unsafe_allow_html=True)
-                        with metrics_col5:
-                            st.markdown(f"""
-                                <div class='metric-card' style='background:{score_color}; color:white;'>
-                                    <h3 style='margin:0;'>{score}</h3>
-                                    <p style='margin:0; font-size:0.9em;'>Compliance Score</p>
-                                </div>
-                            """, unsafe_allow_html=True)
-
-                        tab1, tab2, tab3, tab4, tab5 = st.tabs(["📋 Summary", "👥 Directors", "💰 Financials", "⚖️ Legal Cases", "📊 Raw Data"])
-                        with tab1:
-                            col1, col2 = st.columns([2, 1])
-                            with col1:
-                                # Replace risk level in summary with UI risk level
-                                summary_ui = re.sub(r"Risk Level: [A-Za-z]+", f"Risk Level: {ui_risk_level}", summary)
-                                st.markdown(f"""
-                                    <div class='card'>
-                                        <h4>📋 Executive Summary</h4>
-                                        {summary_ui.replace(chr(10), '<br>')}
-                                        <br><br><b>Compliance Score:</b> <span style='color:{score_color}; font-weight:bold;'>{score}/100</span>
-                                    </div>
-                                """, unsafe_allow_html=True)
-                            with col2:
-                                if flagged_directors:
-                                    st.markdown("<div class='card'><h4>🚨 Watchlist Directors</h4>", unsafe_allow_html=True)
-                                    for d in flagged_directors:
-                                        st.markdown(f"<div style='margin: 0.5em 0; padding: 0.5em; background: #f8d7da; border-radius: 5px;'><span class='status-indicator danger'></span>{d} <b>(Watchlist)</b></div>", unsafe_allow_html=True)
-                                    st.markdown("</div>", unsafe_allow_html=True)
-                                if json_report["flags"]:
-                                    st.markdown("<div class='card'><h4>🚨 Alert Flags</h4>", unsafe_allow_html=True)
-                                    for i, flag in enumerate(json_report["flags"]):
-                                        status_class = "danger" if "fraud" in flag.lower() or "high" in flag.lower() else "warning"
-                                        st.markdown(f"<div style='margin: 0.5em 0; padding: 0.5em; background: #fff3cd; border-radius: 5px;'><span class='status-indicator {status_class}'></span>{flag}</div>", unsafe_allow_html=True)
-                                    st.markdown("</div>", unsafe_allow_html=True)
-                        with tab2:
-                            st.markdown("<div class='card'><h4>👥 Board of Directors</h4>", unsafe_allow_html=True)
-                            directors_df = pd.read_csv(f"{onboarding_pipeline.DATA_DIR}/{folder}/directors.csv")
-                            if not directors_df.empty:
-                                directors_df['Status'] = directors_df['name'].apply(lambda x: '🔴 Watchlist' if x in watchlist else '🟢 Active')
-                                st.dataframe(directors_df, use_container_width=True, hide_index=True)
-                            else:
-                                st.info("No director information available.")
-                            st.markdown("</div>", unsafe_allow_html=True)
-                        with tab3:
-                            st.markdown("<div class='card'><h4>💰 Financial Health</h4>", unsafe_allow_html=True)
-                            fin_col1, fin_col2, fin_col3 = st.columns(3)
-                            financials = json_report["financial_health"]
-                            assets = financials.get("assets", "N/A")
-                            liabilities = financials.get("liabilities", "N/A")
-                            net_worth = financials.get("net_worth", "N/A")
-                            with fin_col1:
-                                st.metric("Total Assets", assets)
-                            with fin_col2:
-                                st.metric("Total Liabilities", liabilities)
-                            with fin_col3:
-                                st.metric("Net Worth", net_worth)
-                            try:
-                                st.markdown(f"<div style='background: {'#f8d7da' if debt_ratio > 0.7 else '#d4edda'}; padding: 1em; border-radius: 8px; margin: 1em 0;'><strong>Debt-to-Asset Ratio: {debt_ratio:.2%}</strong><br><small>{'⚠️ Above recommended threshold' if debt_ratio > 0.7 else '✅ Within healthy range'}</small></div>", unsafe_allow_html=True)
-                                st.line_chart(pd.DataFrame({"Debt Ratio": debt_trend}, index=years))
-                            except:
-                                pass
-                            st.markdown("</div>", unsafe_allow_html=True)
-                        with tab4:
-                            st.markdown("<div class='card'><h4>⚖️ Legal Cases & Litigation</h4>", unsafe_allow_html=True)
-                            if json_report["legal_cases"]:
-                                for case in json_report["legal_cases"]:
-                                    status_color = "#fff3cd" if case.get("status", "").lower() == "pending" else "#d4edda"
-                                    st.markdown(f"<div style='background: {status_color}; padding: 1em; border-radius: 8px; margin: 0.5em 0; border-left: 4px solid #003366;'><strong>🏛️ {case.get('court', 'N/A')}</strong><br><strong>Case ID:</strong> {case.get('case_id', 'N/A')}<br><strong>Status:</strong> {case.get('status', 'N/A')}<br></div>", unsafe_allow_html=True)
-                                st.line_chart(pd.DataFrame({"Pending Cases": case_trend}, index=years))
-                            else:
-                                st.info("✅ No pending legal cases found.")
-                            st.markdown("</div>", unsafe_allow_html=True)
-                        with tab5:
-                            st.markdown("<div class='card'><h4>📊 Raw JSON Data</h4>", unsafe_allow_html=True)
-                            st.json(json_report)
-                            st.markdown("#### Export Options")
-                            if st.button("📥 Download JSON Report"):
-                                st.download_button(label="Download as JSON", data=json.dumps(json_report, indent=2), file_name=f"{folder}_kyc_report.json", mime="application/json")
-                            st.markdown("</div>", unsafe_allow_html=True)
+                        st.session_state.report_view = build_report_view(folder, collect_metrics)
+                        report_built = True
                     except Exception as e:
+                        st.session_state.pop("report_view", None)
                         st.error(f"❌ Error generating report: {str(e)}")
                         st.exception(e)
         else:
             st.error("❌ No matching company found for the given name or CIN.")
 
+    view = st.session_state.get("report_view")
+    if view is not None and view["folder"] == folder:
+        if report_built:
+            st.success("✅ Analysis completed successfully!")
+        render_report(view)
+
     # Enhanced footer with additional information
     current_date = datetime.now().strftime("%B %d, %Y")
     st.markdown(f"""
@@ -389,5 +296,264 @@ def main():
         </div>
     """, unsafe_allow_html=True)
 
+    rerun_log = st.session_state.setdefault("rerun_log", deque(maxlen=RERUN_LOG_SIZE))
+    rerun_log.append({"ms": (time.perf_counter() - rerun_start) * 1000, "report_built": report_built})
+
+def build_report_view(folder, collect_metrics=False):
+    # Everything the report panels need, computed once per "Generate Report"
+    # click and kept in st.session_state["report_view"].
+    lookup_start = time.perf_counter()
+    misses_before = onboarding_pipeline.REPORT_CACHE.stats()["misses"]
+    report = onboarding_pipeline.cached_report(folder, metrics=collect_metrics)
+    lookup_ms = (time.perf_counter() - lookup_start) * 1000
+    served_from_cache = onboarding_pipeline.REPORT_CACHE.stats()["misses"] == misses_before
+    json_report, summary = report.json_report, report.summary
+    directors = json_report["directors"]
+
+    # --- Director Watchlist ---
+    watchlist = director_index.get_watchlist()
+    flagged_directors = json_report["watchlist_hits"]
+    linked_companies = director_index.get_director_index().connected_companies(folder)
+
+    # --- Compliance Score ---
+    # Scored once by onboarding_pipeline.assemble_report (with the watchlist
+    # hits); the dashboard only displays the report's values.
+    pending_cases = json_report["litigation"]["pending"]
+    amounts, _ = onboarding_pipeline.financial_amounts(json_report["financial_health"])
+    debt_ratio = risk_scoring.debt_ratio(amounts.get("assets"), amounts.get("liabilities")) or 0
+    score = json_report["compliance_score"]
+    ui_risk_level = json_report["risk_level"]
+    score_color = {"Low": "#28a745", "Medium": "#ffc107", "High": "#dc3545"}[json_report["score_level"]]
+
+    # --- Risk Trend Visualization (per-year history, cached on file fingerprints) ---
+    history = company_history.company_history(folder)
+    debt_trend = pd.DataFrame({"Debt Ratio": history.debt_ratio, "YoY Change": history.debt_ratio_change}, index=history.years)
+    case_trend = pd.DataFrame({"Cases Filed": history.cases_filed, "Pending Cases": history.pending_backlog}, index=history.years)
+
+    return {
+        "folder": folder,
+        "report": report,
+        "json_report": json_report,
+        "summary": summary,
+        "directors": directors,
+        "watchlist": watchlist,
+        "flagged_directors": flagged_directors,
+        "linked_companies": linked_companies,
+        "pending_cases": pending_cases,
+        "debt_ratio": debt_ratio,
+        "score": score,
+        "ui_risk_level": ui_risk_level,
+        "score_color": score_color,
+        "debt_trend": debt_trend,
+        "case_trend": case_trend,
+        "lookup_ms": lookup_ms,
+        "served_from_cache": served_from_cache,
+        "exports": {},
+    }
+
+def render_report(view):
+    report, json_report, summary = view["report"], view["json_report"], view["summary"]
+    directors, watchlist, flagged_directors = view["directors"], view["watchlist"], view["flagged_directors"]
+    linked_companies, pending_cases, debt_ratio = view["linked_companies"], view["pending_cases"], view["debt_ratio"]
+    score, ui_risk_level, score_color = view["score"], view["ui_risk_level"], view["score_color"]
+    debt_trend, case_trend = view["debt_trend"], view["case_trend"]
+
+    metrics_col1, metrics_col2, metrics_col3, metrics_col4, metrics_col5 = st.columns(5)
+    with metrics_col1:
+        risk_color_bg = {"Low": "#d4edda", "Medium": "#fff3cd", "High": "#f8d7da"}
+        risk_icon = {"Low": "✅", "Medium": "⚠️", "High": "❌"}
+        st.markdown(f"""
+            <div class='metric-card' style='background:{risk_color_bg.get(ui_risk_level, '#f8f9fa')};'>
+                <h3 style='margin:0; color:#003366;'>{risk_icon.get(ui_risk_level, 'ℹ️')} {ui_risk_level}</h3>
+                <p style='margin:0; font-size:0.9em;'>Risk Level</p>
+            </div>
+        """, unsafe_allow_html=True)
+    with metrics_col2:
+        st.markdown(f"""
+            <div class='metric-card'>
+                <h3 style='margin:0; color:#003366;'>{len(directors)}</h3>
+                <p style='margin:0; font-size:0.9em;'>Active Directors</p>
+            </div>
+        """, unsafe_allow_html=True)
+    with metrics_col3:
+        st.markdown(f"""
+            <div class='metric-card'>
+                <h3 style='margin:0; color:#003366;'>{pending_cases}</h3>
+                <p style='margin:0; font-size:0.9em;'>Pending Cases</p>
+            </div>
+        """, unsafe_allow_html=True)
+    with metrics_col4:
+        flag_count = len(json_report.get("flags", []))
+        st.markdown(f"""
+            <div class='metric-card'>
+                <h3 style='margin:0; color:#003366;'>{flag_count}</h3>
+                <p style='margin:0; font-size:0.9em;'>Alert Flags</p>
+            </div>
+        """, unsafe_allow_html=True)
+    with metrics_col5:
+        st.markdown(f"""
+            <div class='metric-card' style='background:{score_color}; color:white;'>
+                <h3 style='margin:0;'>{score}</h3>
+                <p style='margin:0; font-size:0.9em;'>Compliance Score</p>
+            </div>
+        """, unsafe_allow_html=True)
+
+    tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs(["📋 Summary", "👥 Directors", "💰 Financials", "⚖️ Legal Cases", "📊 Raw Data", "⏱️ Performance"])
+    with tab1:
+        col1, col2 = st.columns([2, 1])
+        with col1:
+            st.markdown(f"""
+                <div class='card'>
+                    <h4>📋 Executive Summary</h4>
+                    {summary.replace(chr(10), '<br>')}
+                </div>
+            """, unsafe_allow_html=True)
+        with col2:
+            if flagged_directors:
+                st.markdown("<div class='card'><h4>🚨 Watchlist Directors</h4>", unsafe_allow_html=True)
+                for d in flagged_directors:
+                    st.markdown(f"<div style='margin: 0.5em 0; padding: 0.5em; background: #f8d7da; border-radius: 5px;'><span class='status-indicator danger'></span>{d} <b>(Watchlist)</b></div>", unsafe_allow_html=True)
+                st.markdown("</div>", unsafe_allow_html=True)
+            if json_report["flags"]:
+                st.markdown("<div class='card'><h4>🚨 Alert Flags</h4>", unsafe_allow_html=True)
+                for i, flag in enumerate(json_report["flags"]):
+                    status_class = "danger" if "fraud" in flag.lower() or "high" in flag.lower() else "warning"
+                    st.markdown(f"<div style='margin: 0.5em 0; padding: 0.5em; background: #fff3cd; border-radius: 5px;'><span class='status-indicator {status_class}'></span>{flag}</div>", unsafe_allow_html=True)
+                st.markdown("</div>", unsafe_allow_html=True)
+    with tab2:
+        st.markdown("<div class='card'><h4>👥 Board of Directors</h4>", unsafe_allow_html=True)
+        directors_df = pd.DataFrame(report.director_records)
+        if not directors_df.empty:
+            directors_df['Status'] = directors_df['name'].apply(lambda x: '🔴 Watchlist' if x in watchlist else '🟢 Active')
+            other_boards = {}
+            for other, dins in linked_companies.items():
+                for din in dins:
+                    other_boards.setdefault(din, []).append(other)
+            directors_df['Other Boards'] = directors_df['din'].map(
+                lambda din: ', '.join(sorted(other_boards.get(director_index.normalize_din(din), []))) or '—'
+            )
+            st.dataframe(directors_df, use_container_width=True, hide_index=True)
+        else:
+            st.info("No director information available.")
+        st.markdown("</div>", unsafe_allow_html=True)
+    with tab3:
+        st.markdown("<div class='card'><h4>💰 Financial Health</h4>", unsafe_allow_html=True)
+        fin_col1, fin_col2, fin_col3 = st.columns(3)
+        financials = json_report["financial_health"]
+        assets = financials.get("assets", "N/A")
+        liabilities = financials.get("liabilities", "N/A")
+        net_worth = financials.get("net_worth", "N/A")
+        with fin_col1:
+            st.metric("Total Assets", assets)
+        with fin_col2:
+            st.metric("Total Liabilities", liabilities)
+        with fin_col3:
+            st.metric("Net Worth", net_worth)
+        try:
+            above_threshold = debt_ratio > risk_rules.get_rules().threshold("debt_ratio_warning", float("inf"))
+            st.markdown(f"<div style='background: {'#f8d7da' if above_threshold else '#d4edda'}; padding: 1em; border-radius: 8px; margin: 1em 0;'><strong>Debt-to-Asset Ratio: {debt_ratio:.2%}</strong><br><small>{'⚠️ Above recommended threshold' if above_threshold else '✅ Within healthy range'}</small></div>", unsafe_allow_html=True)
+            if debt_trend["Debt Ratio"].count() > 1:
+                st.line_chart(debt_trend)
+            else:
+                st.caption("Debt ratio history needs statements for more than one year.")
+        except:
+            pass
+        st.markdown("</div>", unsafe_allow_html=True)
+    with tab4:
+        st.markdown("<div class='card'><h4>⚖️ Legal Cases & Litigation</h4>", unsafe_allow_html=True)
+        if json_report["legal_cases"]:
+            for case in json_report["legal_cases"]:
+                status_color = "#fff3cd" if case.get("status", "").lower() == "pending" else "#d4edda"
+                st.markdown(f"<div style='background: {status_color}; padding: 1em; border-radius: 8px; margin: 0.5em 0; border-left: 4px solid #003366;'><strong>🏛️ {case.get('court', 'N/A')}</strong><br><strong>Case ID:</strong> {case.get('case_id', 'N/A')}<br><strong>Status:</strong> {case.get('status', 'N/A')}<br></div>", unsafe_allow_html=True)
+            if json_report["litigation"]["pending"] > len(json_report["legal_cases"]):
+                st.caption(f"Showing {len(json_report['legal_cases'])} of {json_report['litigation']['pending']} pending cases.")
+            st.bar_chart(case_trend)
+        else:
+            st.info("✅ No pending legal cases found.")
+        st.markdown("</div>", unsafe_allow_html=True)
+    with tab5:
+        st.markdown("<div class='card'><h4>📊 Raw JSON Data</h4>", unsafe_allow_html=True)
+        st.json(json_report)
+        render_export(view)
+        st.markdown("</div>", unsafe_allow_html=True)
+    with tab6:
+        render_performance(view)
+
+@fragment
+def render_bulk_export(registry, export_format):
+    # The export and its download rerun only this fragment. The download
+    # button (which reads the file) only exists once an export has finished
+    # in this session.
+    if st.button("📦 Export All Companies", use_container_width=True):
+        fmt = report_export.export_format(export_format)
+        previous_export = st.session_state.get("bulk_export")
+        export_path = new_export_path(fmt, previous_export["path"] if previous_export else None)
+        export_progress = st.progress(0.0, text="Exporting reports...")
+        stats = report_export.export_reports(
+            export_path, fmt, registry.folders(),
+            progress=lambda done, total: export_progress.progress(done / total if total else 1.0, text=f"Exported {done}/{total} companies"),
+        )
+        st.session_state.bulk_export = stats
+    bulk_export = st.session_state.get("bulk_export")
+    if bulk_export and os.path.exists(bulk_export["path"]):
+        st.caption(f"{bulk_export['ok']} reports exported ({bulk_export['failed']} failed) in {bulk_export['elapsed_s']}s")
+        with open(bulk_export["path"], "rb") as f:
+            st.download_button("Download Bulk Export", data=f, file_name=f"kyc_reports{report_export.FORMATS[bulk_export['format']]}", mime=report_export.MIME_TYPES[bulk_export["format"]], use_container_width=True)
+
+@fragment
+def render_export(view):
+    # Downloads and format changes rerun only this fragment.
+    st.markdown("#### Export Options")
+    export_format = st.session_state.get("export_format", "JSON")
+    fmt = report_export.export_format(export_format)
+    if fmt not in view["exports"]:
+        if fmt == "json":
+            view["exports"][fmt] = json.dumps(view["json_report"], indent=2)
+        else:
+            record = {"company_id": view["folder"], "ok": True, "report": view["json_report"], "summary": view["summary"]}
+            view["exports"][fmt] = report_export.render_single(record, fmt)
+    extension = ".json" if fmt == "json" else report_export.FORMATS[fmt]
+    mime = "application/json" if fmt == "json" else report_export.MIME_TYPES[fmt]
+    st.download_button(label=f"📥 Download {export_format} Report", data=view["exports"][fmt], file_name=f"{view['folder']}_kyc_report{extension}", mime=mime)
+
+@fragment
+def render_performance(view):
+    report = view["report"]
+    st.markdown("<div class='card'><h4>⏱️ Performance</h4>", unsafe_allow_html=True)
+    perf_col1, perf_col2 = st.columns(2)
+    with perf_col1:
+        st.metric("Report Lookup", f"{view['lookup_ms']:.2f} ms")
+    with perf_col2:
+        st.metric("Source", "Cache" if view["served_from_cache"] else "Pipeline")
+    # Full-script rerun latency for this session, split by whether the rerun
+    # rebuilt the report or redrew it from session_state.
+    rerun_log = list(st.session_state.get("rerun_log", ()))
+    if rerun_log:
+        rerun_df = pd.DataFrame(rerun_log)
+        rerun_col1, rerun_col2, rerun_col3 = st.columns(3)
+        with rerun_col1:
+            st.metric("Last Rerun", f"{rerun_df['ms'].iloc[-1]:.1f} ms")
+        with rerun_col2:
+            built = rerun_df.loc[rerun_df["report_built"], "ms"]
+            st.metric("Median Rerun (report built)", f"{built.median():.1f} ms" if len(built) else "—")
+        with rerun_col3:
+            reused = rerun_df.loc[~rerun_df["report_built"], "ms"]
+            st.metric("Median Rerun (from session)", f"{reused.median():.1f} ms" if len(reused) else "—")
+        st.button("🔄 Refresh timings")
+    rules = risk_rules.get_rules()
+    # Rule timing is part of the assess_risk stage in the breakdown below.
+    st.caption(f"Risk rules ({len(rules.rules)} from {os.path.basename(rules.source or 'rules')}) · fired: {', '.join(view['json_report']['rules_fired']) or 'none'}")
+    if report.metrics:
+        metrics = pipeline_metrics.ReportMetrics.from_dict(report.metrics)
+        stages_df = pd.DataFrame(metrics.stages).set_index("stage")
+        st.caption(f"Stage breakdown from the last pipeline run for this company: {metrics.total_ms:.3f} ms total")
+        st.bar_chart(stages_df["wall_ms"])
+        st.dataframe(stages_df, use_container_width=True)
+        with st.expander("Prometheus metrics"):
+            st.code(metrics.to_prometheus(), language="text")
+    else:
+        st.info("No stage timings recorded for this report. Enable 'Collect performance metrics' and regenerate an uncached report.")
+    st.markdown("</div>", unsafe_allow_html=True)
+
 if __name__ == "__main__":
     main()
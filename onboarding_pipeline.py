@@ -1,118 +1,527 @@
+import io
 import os
+import re
 import csv
 import json
+import pstats
+import cProfile
+from collections import namedtuple
+
+import risk_rules
+import risk_scoring
+import financial_parser
+import pdf_financials
+import pipeline_metrics
+import director_index
+from disk_cache import LruDiskCache, file_fingerprint
 
 DATA_DIR = os.path.join(os.path.dirname(__file__), 'data')
 
-KEYWORDS = ['pending', 'fraud', 'default']
 
+def _cap(name, default):
+    # 0 (or a negative value) turns the cap off.
+    value = int(os.environ.get(name, default))
+    return value if value > 0 else None
 
-def load_directors(path):
-    directors = []
+
+# Per-report caps on the pending cases and litigation flags that are kept;
+# totals are always exact and the report records when a list was cut short.
+MAX_PENDING_CASES = _cap('KYC_MAX_PENDING_CASES', 500)
+MAX_FLAGS = _cap('KYC_MAX_FLAGS', 500)
+
+
+class KeywordMatcher:
+    # All keywords are compiled into one trie-shaped regex, so each text
+    # position costs a single branch per character rather than one attempt
+    # per keyword. The trie is emitted longest-branch first inside a
+    # zero-width lookahead, so every start position reports its longest
+    # keyword; shorter keywords contained in a hit come from `_implied`.
+    def __init__(self, keywords):
+        self.keywords = sorted({k.lower() for k in keywords if k})
+        self._implied = {
+            k: [o for o in self.keywords if o != k and o in k] for k in self.keywords
+        }
+        if self.keywords:
+            trie = _trie_pattern(self.keywords)
+            self._search = re.compile(trie).search
+            self._pattern = re.compile('(?=(' + trie + '))')
+        else:
+            self._pattern = None
+
+    def match(self, *texts):
+        if self._pattern is None:
+            return []
+        text = '\n'.join(texts).lower()
+        first = self._search(text)
+        if first is None:
+            return []
+        found = set()
+        for m in self._pattern.finditer(text, first.start()):
+            kw = m.group(1)
+            if kw not in found:
+                found.add(kw)
+                found.update(self._implied[kw])
+        return sorted(found)
+
+
+def _trie_pattern(words):
+    trie = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[''] = {}
+    return _node_pattern(trie)
+
+
+def _node_pattern(node):
+    branches = []
+    for ch in sorted(k for k in node if k):
+        branches.append(re.escape(ch) + _node_pattern(node[ch]))
+    if not branches:
+        return ''
+    terminal = '' in node
+    if len(branches) == 1 and not terminal:
+        return branches[0]
+    # Longer continuations first; an empty alternative ends the keyword here.
+    return '(?:' + '|'.join(branches) + ('|' if terminal else '') + ')'
+
+
+_matchers = {}
+
+
+def keyword_matcher(keywords=None):
+    # Matcher for the keywords in the current rules file (risk_rules). It is
+    # compiled once per distinct keyword list, so a hot-reloaded rules file
+    # only pays for a new matcher when its keywords actually change.
+    if keywords is None:
+        keywords = risk_rules.get_rules().keywords
+    key = tuple(keywords)
+    matcher = _matchers.get(key)
+    if matcher is None:
+        if len(_matchers) >= 16:
+            _matchers.clear()
+        matcher = _matchers[key] = KeywordMatcher(key)
+    return matcher
+
+
+def load_director_records(path):
     with open(path, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            directors.append(row['name'])
-    return directors
+        return read_director_records(f)
+
+
+def read_director_records(lines):
+    return list(csv.DictReader(lines))
+
+
+def load_directors(path):
+    return [row['name'] for row in load_director_records(path)]
 
 
 def parse_financials(path):
-    result = {}
+    if path.endswith('.pdf'):
+        return parse_financial_lines(pdf_financials.pdf_text(path).splitlines())
     with open(path, 'r', encoding='utf-8') as f:
-        for line in f:
-            if 'Assets:' in line:
-                result['assets'] = line.split(':')[1].strip()
-            elif 'Liabilities:' in line:
-                result['liabilities'] = line.split(':')[1].strip()
-            elif 'Net Worth:' in line:
-                result['net_worth'] = line.split(':')[1].strip()
-    return result
+        return parse_financial_lines(f)
+
+
+def parse_financial_statement(path):
+    # Typed, multi-year view of either financials source.
+    if path.endswith('.pdf'):
+        return pdf_financials.parse_pdf_statement(path)
+    return financial_parser.parse_statement(path)
+
+
+def parse_financial_lines(lines):
+    # Source strings of the most recent period; financial_parser has the
+    # typed, multi-year view of the same file. Values that fail to parse are
+    # kept as-is and reported by financial_errors().
+    return dict(financial_parser.parse_statement_lines(lines).latest.raw)
+
+
+def financial_amounts(financials):
+    # Paise per field of a financial_health dict, plus the fields whose
+    # value is present but could not be parsed.
+    amounts = {}
+    errors = []
+    for field, value in financials.items():
+        if not value:
+            continue
+        try:
+            amounts[field] = financial_parser.parse_amount(value)
+        except ValueError as e:
+            errors.append({'field': field, 'value': value, 'error': str(e)})
+    return amounts, errors
+
+
+def financial_errors(financials):
+    return financial_amounts(financials)[1]
+
+
+_CASE_YEAR_RE = re.compile(r'\b((?:19|20)\d{2})/')
+
+
+class CourtCase(namedtuple('CourtCase', 'court status case_id desc keywords')):
+    __slots__ = ()
+
+    @property
+    def is_pending(self):
+        return self.status.lower() == 'pending'
+
+    def flag(self):
+        return f"{self.status} litigation: {self.desc}"
+
+    @property
+    def filing_year(self):
+        # 'Case 2024/DEL/5678' -> 2024
+        m = _CASE_YEAR_RE.search(self.case_id)
+        return int(m.group(1)) if m else None
+
+
+def iter_court_cases(path, matcher=None):
+    with open(path, 'r', encoding='utf-8') as f:
+        yield from iter_court_case_lines(f, matcher)
+
+
+def iter_court_case_lines(lines, matcher=None):
+    matcher = matcher or keyword_matcher()
+    for line in lines:
+        parts = line.strip().split('|', 3)
+        if len(parts) >= 4:
+            court, status, case_id, desc = [p.strip() for p in parts]
+            yield CourtCase(court, status, case_id, desc, matcher.match(status, desc))
+
+
+class LitigationSummary:
+    # Running totals over a case stream. Only pending cases (needed for the
+    # report) and flags are retained, and both can be capped so a multi-million
+    # line export is summarized in constant memory.
+    __slots__ = ('total', 'pending', 'flagged', 'keyword_counts', 'pending_cases', 'flags',
+                 '_max_pending', '_max_flags')
 
+    def __init__(self, max_pending=None, max_flags=None):
+        self.total = 0
+        self.pending = 0
+        self.flagged = 0
+        self.keyword_counts = {}
+        self.pending_cases = []
+        self.flags = []
+        self._max_pending = max_pending
+        self._max_flags = max_flags
 
-def scan_court_cases(path):
+    def add(self, case):
+        self.total += 1
+        if case.is_pending:
+            self.pending += 1
+            if self._max_pending is None or len(self.pending_cases) < self._max_pending:
+                self.pending_cases.append(case)
+        if case.keywords:
+            self.flagged += 1
+            for kw in case.keywords:
+                self.keyword_counts[kw] = self.keyword_counts.get(kw, 0) + 1
+            if self._max_flags is None or len(self.flags) < self._max_flags:
+                self.flags.append(case.flag())
+
+    @property
+    def has_pending(self):
+        return self.pending > 0
+
+    @property
+    def truncated(self):
+        return self.pending > len(self.pending_cases) or self.flagged > len(self.flags)
+
+    def to_dict(self):
+        return {
+            'total': self.total,
+            'pending': self.pending,
+            'flagged': self.flagged,
+            'keyword_counts': self.keyword_counts,
+            'pending_cases': [list(c) for c in self.pending_cases],
+            'flags': self.flags,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        summary = cls()
+        summary.total = data['total']
+        summary.pending = data['pending']
+        summary.flagged = data['flagged']
+        summary.keyword_counts = dict(data['keyword_counts'])
+        summary.pending_cases = [CourtCase(*c) for c in data['pending_cases']]
+        summary.flags = list(data['flags'])
+        return summary
+
+
+def summarize_court_cases(path, matcher=None, max_pending=None, max_flags=None):
+    with open(path, 'r', encoding='utf-8') as f:
+        return summarize_court_case_lines(f, matcher, max_pending, max_flags)
+
+
+def summarize_court_case_lines(lines, matcher=None, max_pending=None, max_flags=None):
+    summary = LitigationSummary(max_pending, max_flags)
+    for case in iter_court_case_lines(lines, matcher):
+        summary.add(case)
+    return summary
+
+
+def scan_court_cases(path, matcher=None):
     cases = []
     flags = []
-    with open(path, 'r', encoding='utf-8') as f:
-        for line in f:
-            parts = line.strip().split('|')
-            if len(parts) >= 4:
-                court, status, case_id, desc = [p.strip() for p in parts]
-                cases.append({
-                    'court': court,
-                    'status': status,
-                    'case_id': case_id,
-                    'desc': desc
-                })
-                for kw in KEYWORDS:
-                    if kw in status.lower() or kw in desc.lower():
-                        flags.append(f"{status} litigation: {desc}")
+    for case in iter_court_cases(path, matcher):
+        cases.append({
+            'court': case.court,
+            'status': case.status,
+            'case_id': case.case_id,
+            'desc': case.desc,
+            'keywords': case.keywords
+        })
+        if case.keywords:
+            flags.append(case.flag())
     return cases, flags
 
 
-def assess_risk(financials, cases):
-    debt_ratio = None
+def assess_risk(financials, cases, watchlist_hits=0):
+    # Level, flags and compliance score come from the compiled rules
+    # (data/risk_rules.json); returns risk_scoring.score_company's dict.
+    # A missing amount leaves the ratio unknown; an unparseable one is also
+    # counted in 'financial_errors' so the rules can flag it.
+    amounts, errors = financial_amounts(financials)
+    assets = amounts.get('assets')
+    liabilities = amounts.get('liabilities')
+    # `cases` is either the list from scan_court_cases or a LitigationSummary.
+    if isinstance(cases, LitigationSummary):
+        litigation = cases
+    else:
+        litigation = LitigationSummary(max_pending=0, max_flags=0)
+        for c in cases:
+            litigation.add(CourtCase(c['court'], c['status'], c['case_id'], c['desc'], c.get('keywords') or []))
+    return risk_scoring.score_company(
+        assets, liabilities, litigation.pending, watchlist_hits,
+        cases=litigation.total, flagged_cases=litigation.flagged,
+        financial_errors=len(errors), keyword_counts=litigation.keyword_counts,
+    )
+
+
+def financials_path(folder):
+    # The PDF filing is the source of truth; financials.txt is the fallback
+    # for companies without one, or whose PDF has no readable financials
+    # (scanned or encrypted). With no .txt, the PDF is used regardless.
+    pdf_path = os.path.join(folder, 'financials.pdf')
+    txt_path = os.path.join(folder, 'financials.txt')
+    if os.path.exists(pdf_path) and (pdf_financials.has_statement(pdf_path) or not os.path.exists(txt_path)):
+        return pdf_path
+    return txt_path
+
+
+def _input_paths(folder):
+    return (
+        os.path.join(folder, 'directors.csv'),
+        financials_path(folder),
+        os.path.join(folder, 'court_cases.txt'),
+    )
+
+
+def generate_report(company_name, data_dir=None, store=None, metrics=None,
+                    max_pending=MAX_PENDING_CASES, max_flags=MAX_FLAGS):
+    json_report, summary, _ = _build_report(company_name, data_dir, store, metrics, max_pending, max_flags)
+    return json_report, summary
+
+
+def _build_report(company_name, data_dir=None, store=None, metrics=None,
+                  max_pending=MAX_PENDING_CASES, max_flags=MAX_FLAGS):
+    # `store` is an optional portfolio_store.PortfolioStore to read from
+    # instead of the company's raw files. `metrics` is a
+    # pipeline_metrics.ReportMetrics to fill in; KYC_PIPELINE_METRICS=1 turns
+    # it on for every report. `max_pending`/`max_flags` cap the case and flag
+    # lists kept in the report (None keeps everything).
+    if metrics is None and pipeline_metrics.ENABLED:
+        metrics = pipeline_metrics.ReportMetrics(company_name)
+    stage = metrics.stage if metrics is not None else pipeline_metrics.no_stage
+    if store is not None:
+        if metrics is not None:
+            metrics.source = 'store'
+        with stage('load_directors') as s:
+            director_records = store.director_records(company_name)
+            s.add(records=len(director_records))
+        with stage('parse_financials') as s:
+            financials = store.financials(company_name)
+            s.add(records=len(financials))
+        with stage('scan_court_cases') as s:
+            litigation = store.litigation(company_name, max_pending=max_pending, max_flags=max_flags)
+            s.add(records=litigation.total)
+    else:
+        folder = os.path.join(data_dir or DATA_DIR, company_name)
+        directors_path, financials_path, court_cases_path = _input_paths(folder)
+        with stage('load_directors') as s:
+            director_records = load_director_records(directors_path)
+            s.add_file(directors_path, len(director_records))
+        with stage('parse_financials') as s:
+            financials = parse_financials(financials_path)
+            s.add_file(financials_path, len(financials))
+        with stage('scan_court_cases') as s:
+            litigation = summarize_court_cases(court_cases_path, max_pending=max_pending, max_flags=max_flags)
+            s.add_file(court_cases_path, litigation.total)
+    json_report, summary = assemble_report(company_name, director_records, financials, litigation, stage)
+    if metrics is not None:
+        pipeline_metrics.REGISTRY.observe(metrics)
+    return json_report, summary, director_records
+
+
+def report_from_text(company_name, directors_text, financials_text, court_cases_text, metrics=None,
+                     max_pending=MAX_PENDING_CASES, max_flags=MAX_FLAGS):
+    # Same stages as _build_report, over file contents that were already read
+    # (e.g. fetched concurrently by async_ingest).
+    if metrics is None and pipeline_metrics.ENABLED:
+        metrics = pipeline_metrics.ReportMetrics(company_name)
+    stage = metrics.stage if metrics is not None else pipeline_metrics.no_stage
+    if metrics is not None:
+        metrics.source = 'text'
+    with stage('load_directors') as s:
+        director_records = read_director_records(io.StringIO(directors_text))
+        s.add(len(directors_text), len(director_records))
+    with stage('parse_financials') as s:
+        financials = parse_financial_lines(financials_text.splitlines())
+        s.add(len(financials_text), len(financials))
+    with stage('scan_court_cases') as s:
+        litigation = summarize_court_case_lines(court_cases_text.splitlines(), max_pending=max_pending,
+                                                 max_flags=max_flags)
+        s.add(len(court_cases_text), litigation.total)
+    json_report, summary = assemble_report(company_name, director_records, financials, litigation, stage)
+    if metrics is not None:
+        pipeline_metrics.REGISTRY.observe(metrics)
+    return json_report, summary, director_records
+
+
+def profile_report(company_name, data_dir=None, store=None, cprofile=False, limit=25):
+    # Builds one report with instrumentation forced on; with cprofile=True the
+    # top `limit` cumulative-time entries are attached as metrics.profile.
+    metrics = pipeline_metrics.ReportMetrics(company_name)
+    if not cprofile:
+        json_report, summary, _ = _build_report(company_name, data_dir, store, metrics)
+        return json_report, summary, metrics
+    profiler = cProfile.Profile()
+    profiler.enable()
     try:
-        assets = float(financials['assets'].replace('₹','').replace('Cr',''))
-        liabilities = float(financials['liabilities'].replace('₹','').replace('Cr',''))
-        debt_ratio = liabilities / assets if assets else 0
-    except Exception:
-        debt_ratio = None
-    risk = 'Low'
-    flags = []
-    if debt_ratio is not None:
-        if debt_ratio > 0.7:
-            risk = 'Medium'
-            flags.append('High debt ratio')
-        if debt_ratio > 1:
-            risk = 'High'
-            flags.append('Very high debt ratio')
-    if any(c['status'].lower() == 'pending' for c in cases):
-        risk = 'Medium'
-        flags.append('Ongoing litigation')
-    return risk, flags, debt_ratio
-
-
-def generate_report(company_name):
-    folder = os.path.join(DATA_DIR, company_name)
-    directors_path = os.path.join(folder, 'directors.csv')
-    financials_path = os.path.join(folder, 'financials.txt')
-    court_cases_path = os.path.join(folder, 'court_cases.txt')
-
-    directors = load_directors(directors_path)
-    financials = parse_financials(financials_path)
-    cases, case_flags = scan_court_cases(court_cases_path)
-    risk_level, risk_flags, debt_ratio = assess_risk(financials, cases)
-
-    all_flags = risk_flags + case_flags
+        json_report, summary, _ = _build_report(company_name, data_dir, store, metrics)
+    finally:
+        profiler.disable()
+    out = io.StringIO()
+    pstats.Stats(profiler, stream=out).sort_stats('cumulative').print_stats(limit)
+    metrics.profile = out.getvalue()
+    return json_report, summary, metrics
+
+
+def assemble_report(company_name, director_records, financials, litigation, stage=pipeline_metrics.no_stage):
+    directors = [row['name'] for row in director_records]
+    with stage('assess_risk'):
+        watchlist_hits = director_index.get_watchlist().match(directors)
+        scored = assess_risk(financials, litigation, len(watchlist_hits))
+
+    with stage('build_summary'):
+        json_report, summary = _render_report(company_name, directors, financials, litigation, scored, watchlist_hits)
+    return json_report, summary
+
+
+def _render_report(company_name, directors, financials, litigation, scored, watchlist_hits):
+    risk_level, debt_ratio = scored['risk_level'], scored['debt_ratio']
+    all_flags = scored['flags'] + litigation.flags
+    fin_errors = financial_errors(financials)
 
     json_report = {
         'company': f'{company_name} Pvt Ltd',
         'risk_level': risk_level,
+        'compliance_score': scored['compliance_score'],
+        'score_level': scored['score_level'],
         'directors': directors,
+        'watchlist_hits': watchlist_hits,
         'financial_health': financials,
         'legal_cases': [
-            {'court': c['court'], 'status': c['status'], 'case_id': c['case_id']} for c in cases if c['status'].lower() == 'pending'
+            {'court': c.court, 'status': c.status, 'case_id': c.case_id} for c in litigation.pending_cases
         ],
-        'flags': all_flags
+        'flags': all_flags,
+        'rules_fired': scored['fired'],
+        'financial_errors': fin_errors,
+        'litigation': {
+            'cases': litigation.total,
+            'pending': litigation.pending,
+            'flagged': litigation.flagged,
+            'keyword_counts': litigation.keyword_counts,
+            'truncated': litigation.truncated,
+        },
     }
 
     summary = f"{company_name} Pvt Ltd – Risk Level: {risk_level}\n"
     summary += f"- {len(directors)} active directors, compliant with MCA filings\n"
+    if watchlist_hits:
+        summary += f"- Watchlist directors: {', '.join(watchlist_hits)}\n"
     summary += f"- Net worth {financials.get('net_worth','N/A')}, debt ratio {debt_ratio if debt_ratio is not None else 'N/A'}"
-    if debt_ratio is not None and debt_ratio > 0.7:
+    warning = risk_rules.get_rules().threshold('debt_ratio_warning')
+    if debt_ratio is not None and warning is not None and debt_ratio > warning:
         summary += " (above safe threshold)"
     summary += "\n"
-    for c in cases:
-        if c['status'].lower() == 'pending':
-            summary += f"- Pending litigation at {c['court']} (Case {c['case_id']})\n"
+    if fin_errors:
+        unparsed = ', '.join(f"{e['field']} {e['value']!r}" for e in fin_errors)
+        summary += f"- Unparseable financials: {unparsed}\n"
+    for c in litigation.pending_cases:
+        summary += f"- Pending litigation at {c.court} (Case {c.case_id})\n"
+    if litigation.pending > len(litigation.pending_cases):
+        summary += f"- ... and {litigation.pending - len(litigation.pending_cases)} more pending cases not listed\n"
+    summary += f"- Compliance score {scored['compliance_score']}/100 ({scored['score_level']})\n"
     summary += "Recommendation: Onboard with conditions (monitor litigation)"
 
     return json_report, summary
 
 
+CachedReport = namedtuple('CachedReport', 'json_report summary director_records metrics', defaults=(None,))
+
+class ReportCache(LruDiskCache):
+    # LRU of CachedReport entries keyed on the fingerprints of a company's
+    # input files. Entries are shared between callers (and Streamlit sessions)
+    # and must be treated as read-only.
+    def key(self, company_name, data_dir=None):
+        folder = os.path.abspath(os.path.join(data_dir or DATA_DIR, company_name))
+        # Reports also depend on the rules and the watchlist, so reloading
+        # either invalidates them.
+        return tuple(file_fingerprint(p) for p in _input_paths(folder)) + (
+            risk_rules.get_rules().digest, director_index.get_watchlist().digest)
+
+    def get(self, company_name, data_dir=None, metrics=False):
+        # With metrics=True (or KYC_PIPELINE_METRICS=1) a miss records per-stage
+        # timings into entry.metrics; hits return whatever the build recorded.
+        key = self.key(company_name, data_dir)
+        entry = self.lookup(key)
+        if entry is None:
+            report_metrics = None
+            if metrics or pipeline_metrics.ENABLED:
+                report_metrics = pipeline_metrics.ReportMetrics(company_name)
+            json_report, summary, director_records = _build_report(company_name, data_dir, metrics=report_metrics)
+            entry = CachedReport(json_report, summary, director_records,
+                                 report_metrics.to_dict() if report_metrics is not None else None)
+            self.add(key, entry)
+        return entry
+
+    def _encode(self, entry):
+        return entry._asdict()
+
+    def _decode(self, data):
+        return CachedReport(**data)
+
+
+REPORT_CACHE = ReportCache(
+    maxsize=int(os.environ.get('KYC_REPORT_CACHE_SIZE', '256')),
+    persist_dir=os.environ.get('KYC_REPORT_CACHE_DIR') or None,
+)
+
+
+def cached_report(company_name, data_dir=None, metrics=False):
+    return REPORT_CACHE.get(company_name, data_dir, metrics)
+
+
 def main():
-    company = input('Enter company name (CompanyA, CompanyB): ').strip()
-    if company not in ['CompanyA', 'CompanyB']:
+    import company_registry
+    folders = company_registry.get_registry().folders()
+    company = input(f"Enter company name ({', '.join(folders)}): ").strip()
+    if company not in folders:
         print('Invalid company name.')
         return
     json_report, summary = generate_report(company)
@@ -0,0 +1,350 @@
+import os
+import re
+import sys
+import json
+import zlib
+import base64
+import hashlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+import financial_parser
+from disk_cache import LruDiskCache, file_fingerprint
+
+# Bumped whenever extraction output can change, so persisted text from an
+# older extractor is not reused.
+EXTRACTOR_VERSION = 1
+
+
+class PdfExtractError(ValueError):
+    pass
+
+
+# Streams that never carry page text.
+_SKIP_STREAM_RE = re.compile(rb'/Subtype\s*/Image|/Length[123]\b|/Type\s*/(?:XRef|ObjStm|Metadata|EmbeddedFile)')
+_STREAM_RE = re.compile(rb'(?<!end)stream\r?\n')
+_FILTER_RE = re.compile(rb'/Filter\s*(\[[^\]]*\]|/\w+)')
+_FILTER_NAME_RE = re.compile(rb'/(\w+)')
+_TOKEN_RE = re.compile(
+    rb'\s*(?:(?P<string>\()|(?P<hex><[0-9A-Fa-f\s]*>)|(?P<dict><<|>>)|(?P<array>[\[\]])'
+    rb'|(?P<name>/[^\s/\[\]()<>{}%]*)|(?P<number>[+-]?(?:\d+\.?\d*|\.\d+))(?![^\s/\[\]()<>{}%])'
+    rb'|(?P<op>[^\s/\[\]()<>{}%]+)|(?P<comment>%[^\r\n]*))'
+)
+_ESCAPES = {b'n': b'\n', b'r': b'\r', b't': b'\t', b'b': b'\b', b'f': b'\f',
+            b'(': b'(', b')': b')', b'\\': b'\\'}
+# A TJ kerning adjustment wider than this (thousandths of an em) is a word gap.
+_WORD_GAP = 200
+
+
+def _decode_stream(header, raw):
+    m = _FILTER_RE.search(header)
+    for name in _FILTER_NAME_RE.findall(m.group(1)) if m else ():
+        if name in (b'FlateDecode', b'Fl'):
+            try:
+                raw = zlib.decompress(raw)
+            except zlib.error:
+                # Truncated or padded streams: keep whatever inflates cleanly.
+                raw = zlib.decompressobj().decompress(raw)
+        elif name in (b'ASCIIHexDecode', b'AHx'):
+            hexdigits = re.sub(rb'\s+', b'', raw.split(b'>', 1)[0])
+            raw = bytes.fromhex((hexdigits + b'0' * (len(hexdigits) % 2)).decode('ascii'))
+        elif name in (b'ASCII85Decode', b'A85'):
+            raw = base64.a85decode(raw.split(b'~>', 1)[0].strip().removeprefix(b'<~'))
+        else:
+            return None
+    return raw
+
+
+def _content_streams(data):
+    for m in _STREAM_RE.finditer(data):
+        header = data[data.rfind(b'obj', 0, m.start()):m.start()]
+        end = data.find(b'endstream', m.end())
+        if end < 0:
+            break
+        if _SKIP_STREAM_RE.search(header):
+            continue
+        try:
+            content = _decode_stream(header, data[m.end():end].rstrip(b'\r\n'))
+        except (ValueError, zlib.error):
+            continue
+        if content is not None and b'BT' in content:
+            yield content
+
+
+def _literal_string(data, pos):
+    # `pos` is just past the opening parenthesis; returns (bytes, next_pos).
+    out = bytearray()
+    depth = 1
+    n = len(data)
+    while pos < n:
+        c = data[pos:pos + 1]
+        pos += 1
+        if c == b'\\':
+            nxt = data[pos:pos + 1]
+            if nxt in _ESCAPES:
+                out += _ESCAPES[nxt]
+                pos += 1
+            elif nxt.isdigit():
+                octal = re.match(rb'[0-7]{1,3}', data[pos:pos + 3]).group(0)
+                out.append(int(octal, 8) & 0xFF)
+                pos += len(octal)
+            elif nxt in (b'\r', b'\n'):
+                pos += 2 if data[pos:pos + 2] == b'\r\n' else 1
+            continue
+        if c == b'(':
+            depth += 1
+        elif c == b')':
+            depth -= 1
+            if depth == 0:
+                break
+        out += c
+    return bytes(out), pos
+
+
+def _text(raw):
+    if raw.startswith(b'\xfe\xff'):
+        return raw[2:].decode('utf-16-be', errors='ignore')
+    return raw.decode('cp1252', errors='ignore')
+
+
+def _content_text(content):
+    # Walks the operators of one content stream and lays text out line by
+    # line: Tj/TJ/'/" show text, a vertical Td/TD/Tm move, T* or ET starts a
+    # new line, a horizontal move inserts a space.
+    parts = []
+    operands = []
+    arrays = []
+    last_y = None
+    pos = 0
+    n = len(content)
+
+    def newline():
+        if parts and parts[-1] != '\n':
+            parts.append('\n')
+
+    def space():
+        if parts and parts[-1] not in ('\n', ' '):
+            parts.append(' ')
+
+    while pos < n:
+        m = _TOKEN_RE.match(content, pos)
+        if m is None or m.end() == pos:
+            break
+        pos = m.end()
+        kind = m.lastgroup
+        if kind == 'string':
+            value, pos = _literal_string(content, pos)
+            (arrays[-1] if arrays else operands).append(value)
+        elif kind == 'hex':
+            digits = re.sub(rb'\s+', b'', m.group(kind)[1:-1])
+            value = bytes.fromhex((digits + b'0' * (len(digits) % 2)).decode('ascii'))
+            (arrays[-1] if arrays else operands).append(value)
+        elif kind == 'number':
+            (arrays[-1] if arrays else operands).append(float(m.group(kind)))
+        elif kind == 'array':
+            if m.group(kind) == b'[':
+                arrays.append([])
+            elif arrays:
+                done = arrays.pop()
+                (arrays[-1] if arrays else operands).append(done)
+        elif kind == 'op':
+            op = m.group(kind)
+            if op == b'Tj' and operands and isinstance(operands[-1], bytes):
+                parts.append(_text(operands[-1]))
+            elif op == b'TJ' and operands and isinstance(operands[-1], list):
+                for item in operands[-1]:
+                    if isinstance(item, bytes):
+                        parts.append(_text(item))
+                    elif item < -_WORD_GAP:
+                        space()
+            elif op in (b"'", b'"') and operands and isinstance(operands[-1], bytes):
+                newline()
+                parts.append(_text(operands[-1]))
+            elif op in (b'Td', b'TD') and len(operands) >= 2:
+                newline() if operands[-1] else space()
+            elif op == b'Tm' and len(operands) >= 6:
+                if last_y is not None and operands[-1] != last_y:
+                    newline()
+                else:
+                    space()
+                last_y = operands[-1]
+            elif op in (b'T*', b'ET'):
+                newline()
+            operands = []
+    newline()
+    return ''.join(parts)
+
+
+def extract_text(data):
+    # Text layer of a PDF, one line per text line. The bundled sample filings
+    # are plain-text exports without a PDF header; those are returned as-is.
+    if b'%PDF-' not in data[:1024]:
+        try:
+            return data.decode('utf-8-sig')
+        except UnicodeDecodeError:
+            raise PdfExtractError('not a PDF and not UTF-8 text') from None
+    if re.search(rb'/Encrypt\s', data):
+        raise PdfExtractError('encrypted PDFs are not supported')
+    return ''.join(_content_text(content) for content in _content_streams(data))
+
+
+def statement_from_text(text):
+    return financial_parser.parse_statement_lines(text.splitlines())
+
+
+class ExtractionCache(LruDiskCache):
+    # Extracted text keyed on the SHA-256 of the PDF bytes, so a filing is
+    # parsed once no matter how many paths or copies point at it. Optionally
+    # persisted as one small JSON file per digest.
+    def digest(self, path):
+        # Only re-hashed when the file's (mtime, size) changes.
+        return file_fingerprint(path)[3]
+
+    def text(self, path):
+        digest = self.digest(path)
+        text = self.lookup(digest)
+        if text is None:
+            with open(path, 'rb') as f:
+                text = extract_text(f.read())
+            self.add(digest, text)
+        return text
+
+    def text_for_bytes(self, data):
+        digest = hashlib.sha256(data).hexdigest()
+        text = self.lookup(digest)
+        if text is None:
+            text = extract_text(data)
+            self.add(digest, text)
+        return text
+
+    def _disk_path(self, digest):
+        return os.path.join(self.persist_dir, f'v{EXTRACTOR_VERSION}-{digest}.json')
+
+    def _encode(self, text):
+        return {'text': text}
+
+    def _decode(self, data):
+        return data['text']
+
+
+EXTRACTION_CACHE = ExtractionCache(
+    maxsize=int(os.environ.get('KYC_PDF_CACHE_SIZE', '4096')),
+    persist_dir=os.environ.get('KYC_PDF_CACHE_DIR') or None,
+)
+
+
+def pdf_text(path):
+    return EXTRACTION_CACHE.text(path)
+
+
+def parse_pdf_statement(path):
+    return statement_from_text(pdf_text(path))
+
+
+_has_statement = {}
+
+
+def has_statement(path):
+    # False for PDFs without a usable text layer (scanned, encrypted, or no
+    # financial fields), so callers can fall back to another source. Cached
+    # per content digest.
+    try:
+        digest = EXTRACTION_CACHE.digest(path)
+    except OSError:
+        return False
+    known = _has_statement.get(digest)
+    if known is None:
+        try:
+            known = len(statement_from_text(EXTRACTION_CACHE.text(path))) > 0
+        except (OSError, PdfExtractError):
+            known = False
+        if len(_has_statement) >= 4096:
+            _has_statement.clear()
+        _has_statement[digest] = known
+    return known
+
+
+def statement_text_for_bytes(data):
+    # has_statement() for bytes already in hand: the extracted text when the
+    # filing has financial fields, otherwise None.
+    try:
+        text = EXTRACTION_CACHE.text_for_bytes(data)
+    except PdfExtractError:
+        return None
+    return text if len(statement_from_text(text)) > 0 else None
+
+
+def _extract_path(path):
+    try:
+        with open(path, 'rb') as f:
+            return extract_text(f.read()), None
+    except (OSError, PdfExtractError) as e:
+        return None, f'{type(e).__name__}: {e}'
+
+
+def extract_many(paths, workers=None, chunksize=16):
+    # Bulk backfill: yields (path, FinancialStatement or None, error) in input
+    # order. Cached digests are served directly and each distinct uncached
+    # PDF is extracted once, in-process or over a pool of `workers`.
+    paths = list(paths)
+    digests = []
+    pending = []
+    queued = set()
+    for path in paths:
+        try:
+            digest = EXTRACTION_CACHE.digest(path)
+        except OSError:
+            digest = None
+        digests.append(digest)
+        if digest is not None and digest not in queued and digest not in EXTRACTION_CACHE:
+            queued.add(digest)
+            pending.append(path)
+
+    if workers and workers > 1 and len(pending) > 1:
+        pool = ProcessPoolExecutor(max_workers=workers)
+        results = pool.map(_extract_path, pending, chunksize=chunksize)
+    else:
+        pool = None
+        results = map(_extract_path, pending)
+    try:
+        for path, digest in zip(paths, digests):
+            if digest is None:
+                yield path, None, f'FileNotFoundError: {path}'
+                continue
+            text = EXTRACTION_CACHE.lookup(digest) if digest not in queued else None
+            if digest in queued:
+                queued.discard(digest)
+                text, error = next(results)
+                if error:
+                    yield path, None, error
+                    continue
+                EXTRACTION_CACHE.add(digest, text)
+            if text is None:
+                yield path, None, 'PdfExtractError: extraction failed'
+            else:
+                yield path, statement_from_text(text), None
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Extract typed financials from text-layer PDF filings.')
+    parser.add_argument('paths', nargs='+')
+    parser.add_argument('-w', '--workers', type=int, default=None)
+    parser.add_argument('--text', action='store_true', help='print the extracted text layer instead')
+    args = parser.parse_args(argv)
+    if args.text:
+        for path in args.paths:
+            print(pdf_text(path), end='')
+        return 0
+    failed = 0
+    for path, statement, error in extract_many(args.paths, args.workers):
+        failed += bool(error)
+        record = {'path': path, 'error': error} if error else {'path': path, **statement.to_dict()}
+        print(json.dumps(record, ensure_ascii=False))
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
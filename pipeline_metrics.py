@@ -0,0 +1,175 @@
+import os
+import json
+import time
+import threading
+
+ENABLED = os.environ.get('KYC_PIPELINE_METRICS', '').lower() in ('1', 'true', 'yes', 'on')
+
+
+class _NullStage:
+    # Shared no-op used when instrumentation is off: entering it costs a
+    # method call and nothing is recorded.
+    def __call__(self, name):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def add(self, nbytes=0, records=0):
+        pass
+
+    def add_file(self, path, records=0):
+        pass
+
+
+no_stage = _NullStage()
+
+
+class _Stage:
+    __slots__ = ('metrics', 'name', 'bytes', 'records', '_start')
+
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+        self.bytes = 0
+        self.records = 0
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self._start
+        self.metrics.stages.append({
+            'stage': self.name,
+            'wall_ms': round(elapsed * 1000, 4),
+            'bytes': self.bytes,
+            'records': self.records,
+        })
+        return False
+
+    def add(self, nbytes=0, records=0):
+        self.bytes += nbytes
+        self.records += records
+
+    def add_file(self, path, records=0):
+        try:
+            self.bytes += os.path.getsize(path)
+        except OSError:
+            pass
+        self.records += records
+
+
+class ReportMetrics:
+    def __init__(self, company):
+        self.company = company
+        self.stages = []
+        self.source = 'files'
+        self.profile = None
+
+    def stage(self, name):
+        return _Stage(self, name)
+
+    @property
+    def total_ms(self):
+        return round(sum(s['wall_ms'] for s in self.stages), 4)
+
+    def to_dict(self):
+        data = {
+            'company': self.company,
+            'source': self.source,
+            'total_ms': self.total_ms,
+            'stages': self.stages,
+        }
+        if self.profile is not None:
+            data['profile'] = self.profile
+        return data
+
+    def to_json(self, **kwargs):
+        return json.dumps(self.to_dict(), ensure_ascii=False, **kwargs)
+
+    @classmethod
+    def from_dict(cls, data):
+        metrics = cls(data['company'])
+        metrics.stages = list(data['stages'])
+        metrics.source = data.get('source', 'files')
+        metrics.profile = data.get('profile')
+        return metrics
+
+    def to_prometheus(self):
+        lines = []
+        for name, key, help_text in _PROM_SERIES:
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} gauge')
+            for s in self.stages:
+                value = s[key] / 1000 if key == 'wall_ms' else s[key]
+                lines.append(f'{name}{{company="{_escape(self.company)}",stage="{s["stage"]}"}} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+_PROM_SERIES = (
+    ('kyc_report_stage_seconds', 'wall_ms', 'Wall time of the stage for the last report.'),
+    ('kyc_report_stage_bytes', 'bytes', 'Bytes read by the stage for the last report.'),
+    ('kyc_report_stage_records', 'records', 'Records produced by the stage for the last report.'),
+)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class MetricsRegistry:
+    # Process-wide per-stage totals, exported as Prometheus counters.
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.reports = 0
+            self.totals = {}
+            self.last = None
+
+    def observe(self, metrics):
+        with self._lock:
+            self.reports += 1
+            self.last = metrics
+            for s in metrics.stages:
+                t = self.totals.setdefault(s['stage'], {'count': 0, 'seconds': 0.0, 'bytes': 0, 'records': 0})
+                t['count'] += 1
+                t['seconds'] += s['wall_ms'] / 1000
+                t['bytes'] += s['bytes']
+                t['records'] += s['records']
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                'reports': self.reports,
+                'stages': {k: dict(v) for k, v in self.totals.items()},
+                'last': self.last.to_dict() if self.last is not None else None,
+            }
+
+    def to_prometheus(self):
+        with self._lock:
+            lines = [
+                '# HELP kyc_reports_total Reports built with instrumentation enabled.',
+                '# TYPE kyc_reports_total counter',
+                f'kyc_reports_total {self.reports}',
+            ]
+            for name, key, help_text in (
+                ('kyc_stage_calls_total', 'count', 'Number of times the stage ran.'),
+                ('kyc_stage_seconds_total', 'seconds', 'Cumulative wall time spent in the stage.'),
+                ('kyc_stage_bytes_total', 'bytes', 'Cumulative bytes read by the stage.'),
+                ('kyc_stage_records_total', 'records', 'Cumulative records produced by the stage.'),
+            ):
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} counter')
+                for stage, t in self.totals.items():
+                    lines.append(f'{name}{{stage="{stage}"}} {t[key]}')
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = MetricsRegistry()
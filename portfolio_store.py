@@ -0,0 +1,291 @@
+import os
+import sys
+import json
+import argparse
+
+import numpy as np
+
+import onboarding_pipeline
+import risk_scoring
+import financial_parser
+from batch_screening import discover_companies
+
+STORE_VERSION = 3
+FIN_FIELDS = ('assets', 'liabilities', 'net_worth')
+
+
+def _paise(value):
+    # '₹12.5Cr' -> 125000000000; None when the field is missing or unparseable.
+    try:
+        return financial_parser.parse_amount(value)
+    except ValueError:
+        return None
+
+
+class _StringColumnWriter:
+    # Arrow-style variable-length strings: one UTF-8 blob plus int64 offsets.
+    def __init__(self):
+        self.offsets = [0]
+        self.chunks = []
+        self._end = 0
+
+    def append(self, value):
+        data = (value or '').encode('utf-8')
+        self.chunks.append(data)
+        self._end += len(data)
+        self.offsets.append(self._end)
+
+    def save(self, store_dir, name):
+        np.save(os.path.join(store_dir, f'{name}.offsets.npy'), np.asarray(self.offsets, dtype=np.int64))
+        with open(os.path.join(store_dir, f'{name}.blob'), 'wb') as f:
+            for chunk in self.chunks:
+                f.write(chunk)
+
+
+class StringColumn:
+    def __init__(self, store_dir, name):
+        self.offsets = np.load(os.path.join(store_dir, f'{name}.offsets.npy'), mmap_mode='r')
+        blob_path = os.path.join(store_dir, f'{name}.blob')
+        if os.path.getsize(blob_path):
+            self.blob = np.memmap(blob_path, dtype=np.uint8, mode='r')
+        else:
+            self.blob = np.zeros(0, dtype=np.uint8)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        return bytes(self.blob[self.offsets[i]:self.offsets[i + 1]]).decode('utf-8')
+
+
+def compact(store_dir, data_dir=None, companies=None):
+    data_dir = data_dir or onboarding_pipeline.DATA_DIR
+    if companies is None:
+        companies = discover_companies(data_dir)
+    os.makedirs(store_dir, exist_ok=True)
+
+    names = _StringColumnWriter()
+    fin_raw = {k: _StringColumnWriter() for k in FIN_FIELDS}
+    fin_num = {k: [] for k in FIN_FIELDS}
+    dir_cols = {k: _StringColumnWriter() for k in ('name', 'din', 'tenure')}
+    case_cols = {k: _StringColumnWriter() for k in ('court', 'status', 'case_id', 'desc')}
+    case_pending = []
+    case_flagged = []
+    matcher = onboarding_pipeline.keyword_matcher()
+    keyword_ids = {kw: j for j, kw in enumerate(matcher.keywords)}
+    keyword_rows = []
+    dir_offsets = [0]
+    case_offsets = [0]
+    skipped = {}
+
+    for company in companies:
+        directors_path, financials_path, court_cases_path = onboarding_pipeline._input_paths(
+            os.path.join(data_dir, company))
+        try:
+            directors = onboarding_pipeline.load_director_records(directors_path)
+            financials = onboarding_pipeline.parse_financials(financials_path)
+            cases = list(onboarding_pipeline.iter_court_cases(court_cases_path, matcher))
+        except Exception as e:
+            skipped[company] = f'{type(e).__name__}: {e}'
+            continue
+        names.append(company)
+        for key in fin_raw:
+            fin_raw[key].append(financials.get(key))
+            fin_num[key].append(_paise(financials.get(key)))
+        for row in directors:
+            for key, col in dir_cols.items():
+                col.append(row.get(key))
+        dir_offsets.append(dir_offsets[-1] + len(directors))
+        for case in cases:
+            case_cols['court'].append(case.court)
+            case_cols['status'].append(case.status)
+            case_cols['case_id'].append(case.case_id)
+            case_cols['desc'].append(case.desc)
+            case_pending.append(case.is_pending)
+            case_flagged.append(bool(case.keywords))
+        case_offsets.append(case_offsets[-1] + len(cases))
+        counts = [0] * len(keyword_ids)
+        for case in cases:
+            for kw in case.keywords:
+                counts[keyword_ids[kw]] += 1
+        keyword_rows.append(counts)
+
+    names.save(store_dir, 'company')
+    for key, col in fin_raw.items():
+        col.save(store_dir, f'fin_{key}_raw')
+        # Exact integer paise plus a mask of the values that parsed.
+        values = fin_num[key]
+        np.save(os.path.join(store_dir, f'fin_{key}.npy'),
+                np.asarray([v or 0 for v in values], dtype=np.int64))
+        np.save(os.path.join(store_dir, f'fin_{key}_known.npy'),
+                np.asarray([v is not None for v in values], dtype=np.bool_))
+    for key, col in dir_cols.items():
+        col.save(store_dir, f'director_{key}')
+    for key, col in case_cols.items():
+        col.save(store_dir, f'case_{key}')
+    np.save(os.path.join(store_dir, 'case_pending.npy'), np.asarray(case_pending, dtype=np.bool_))
+    # Keyword matches of the rules at compaction time (meta['keywords']);
+    # PortfolioStore rescans the case text when the rules' keywords change.
+    np.save(os.path.join(store_dir, 'case_flagged.npy'), np.asarray(case_flagged, dtype=np.bool_))
+    np.save(os.path.join(store_dir, 'keyword_counts.npy'),
+            np.asarray(keyword_rows, dtype=np.int64).reshape(len(keyword_rows), len(keyword_ids)))
+    np.save(os.path.join(store_dir, 'director_offsets.npy'), np.asarray(dir_offsets, dtype=np.int64))
+    np.save(os.path.join(store_dir, 'case_offsets.npy'), np.asarray(case_offsets, dtype=np.int64))
+
+    meta = {
+        'version': STORE_VERSION,
+        'data_dir': os.path.abspath(data_dir),
+        'companies': len(names.offsets) - 1,
+        'directors': dir_offsets[-1],
+        'cases': case_offsets[-1],
+        'keywords': matcher.keywords,
+        'skipped': skipped,
+    }
+    with open(os.path.join(store_dir, 'meta.json'), 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+    return meta
+
+
+class PortfolioStore:
+    # Memory-mapped view of a compacted portfolio. Numeric columns are plain
+    # NumPy arrays (one row per company) for whole-portfolio scans; the
+    # per-company accessors rebuild the records the pipeline stages produce.
+    def __init__(self, store_dir):
+        self.store_dir = store_dir
+        with open(os.path.join(store_dir, 'meta.json'), 'r', encoding='utf-8') as f:
+            self.meta = json.load(f)
+        if self.meta.get('version') != STORE_VERSION:
+            raise ValueError(f"Unsupported portfolio store version: {self.meta.get('version')}")
+
+        def load(name):
+            return np.load(os.path.join(store_dir, f'{name}.npy'), mmap_mode='r')
+
+        self.company = StringColumn(store_dir, 'company')
+        # int64 paise; *_known is False where the source value was missing.
+        self.assets = load('fin_assets')
+        self.liabilities = load('fin_liabilities')
+        self.net_worth = load('fin_net_worth')
+        self.assets_known = load('fin_assets_known')
+        self.liabilities_known = load('fin_liabilities_known')
+        self.net_worth_known = load('fin_net_worth_known')
+        self.director_offsets = load('director_offsets')
+        self.case_offsets = load('case_offsets')
+        self.case_pending = load('case_pending')
+        self.case_flagged = load('case_flagged')
+        self.keyword_counts = load('keyword_counts')
+        self._fin_raw = {k: StringColumn(store_dir, f'fin_{k}_raw') for k in FIN_FIELDS}
+        self._directors = {k: StringColumn(store_dir, f'director_{k}') for k in ('name', 'din', 'tenure')}
+        self._cases = {k: StringColumn(store_dir, f'case_{k}') for k in ('court', 'status', 'case_id', 'desc')}
+        self._index = None
+        self._rescanned = {}
+
+    def __len__(self):
+        return len(self.company)
+
+    def __contains__(self, company_name):
+        return company_name in self.index
+
+    @property
+    def index(self):
+        if self._index is None:
+            self._index = {self.company[i]: i for i in range(len(self.company))}
+        return self._index
+
+    def _per_company(self, case_mask):
+        # Per-company totals of a per-case boolean column in one cumulative-sum pass.
+        cum = np.concatenate(([0], np.cumsum(case_mask, dtype=np.int64)))
+        return cum[self.case_offsets[1:]] - cum[self.case_offsets[:-1]]
+
+    def pending_counts(self):
+        return self._per_company(self.case_pending)
+
+    def case_counts(self):
+        return np.diff(self.case_offsets)
+
+    def financial_error_counts(self):
+        # Fields with a source value that did not parse, as assess_risk counts them.
+        errors = np.zeros(len(self), dtype=np.int64)
+        for key, raw in self._fin_raw.items():
+            errors += (np.diff(raw.offsets) > 0) & ~getattr(self, f'{key}_known')
+        return errors
+
+    def litigation_counts(self, matcher=None):
+        # (flagged cases per company, {keyword: hits per company}) for the
+        # current rules' keywords. The compacted counts are used when the
+        # keywords are unchanged; otherwise the case text is rescanned once
+        # per keyword list.
+        matcher = matcher or onboarding_pipeline.keyword_matcher()
+        keywords = tuple(matcher.keywords)
+        if list(keywords) == self.meta.get('keywords'):
+            return (self._per_company(self.case_flagged),
+                    {kw: self.keyword_counts[:, j] for j, kw in enumerate(keywords)})
+        if keywords not in self._rescanned:
+            flagged = np.zeros(self.meta['cases'], dtype=np.bool_)
+            counts = np.zeros((len(self), len(keywords)), dtype=np.int64)
+            keyword_ids = {kw: j for j, kw in enumerate(keywords)}
+            company = np.repeat(np.arange(len(self)), self.case_counts())
+            for j in range(self.meta['cases']):
+                found = matcher.match(self._cases['status'][j], self._cases['desc'][j])
+                flagged[j] = bool(found)
+                for kw in found:
+                    counts[company[j], keyword_ids[kw]] += 1
+            self._rescanned = {keywords: (self._per_company(flagged),
+                                          {kw: counts[:, j] for j, kw in enumerate(keywords)})}
+        return self._rescanned[keywords]
+
+    def financials(self, company_name):
+        i = self.index[company_name]
+        return {k: col[i] for k, col in self._fin_raw.items() if col[i]}
+
+    def director_records(self, company_name):
+        i = self.index[company_name]
+        start, end = int(self.director_offsets[i]), int(self.director_offsets[i + 1])
+        cols = self._directors
+        return [{k: cols[k][j] for k in ('name', 'din', 'tenure')} for j in range(start, end)]
+
+    def iter_court_cases(self, company_name, matcher=None):
+        matcher = matcher or onboarding_pipeline.keyword_matcher()
+        i = self.index[company_name]
+        start, end = int(self.case_offsets[i]), int(self.case_offsets[i + 1])
+        cols = self._cases
+        for j in range(start, end):
+            status, desc = cols['status'][j], cols['desc'][j]
+            yield onboarding_pipeline.CourtCase(
+                cols['court'][j], status, cols['case_id'][j], desc, matcher.match(status, desc))
+
+    def paise(self, field):
+        # Float view of a paise column with NaN for missing values, as
+        # risk_scoring.debt_ratios expects (exact below 2**53 paise).
+        values = getattr(self, field).astype(np.float64)
+        values[~getattr(self, f'{field}_known')] = np.nan
+        return values
+
+    def score(self, watchlist_hits=0):
+        # Same rule fields as assess_risk builds for one company (see
+        # risk_scoring.rule_columns), so levels match generate_report.
+        flagged, keyword_counts = self.litigation_counts()
+        return risk_scoring.score_portfolio(
+            self.paise('assets'), self.paise('liabilities'), self.pending_counts(), watchlist_hits,
+            cases=self.case_counts(), flagged_cases=flagged,
+            financial_errors=self.financial_error_counts(), keyword_counts=keyword_counts,
+        )
+
+    def litigation(self, company_name, matcher=None, max_pending=None, max_flags=None):
+        summary = onboarding_pipeline.LitigationSummary(max_pending, max_flags)
+        for case in self.iter_court_cases(company_name, matcher):
+            summary.add(case)
+        return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Compact the data/ tree into a memory-mapped columnar store.')
+    parser.add_argument('store_dir')
+    parser.add_argument('-d', '--data-dir', default=onboarding_pipeline.DATA_DIR)
+    args = parser.parse_args(argv)
+    meta = compact(args.store_dir, args.data_dir)
+    print(json.dumps(meta, ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
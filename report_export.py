@@ -0,0 +1,477 @@
+import io
+import os
+import re
+import sys
+import gzip
+import json
+import time
+import zlib
+import shutil
+import zipfile
+import argparse
+import tempfile
+import textwrap
+from collections import deque
+from xml.sax.saxutils import escape
+from concurrent.futures import ProcessPoolExecutor
+
+import disk_cache
+import onboarding_pipeline
+import financial_parser
+import risk_scoring
+import batch_screening
+
+FORMATS = {
+    'json': '.jsonl.gz',
+    'excel': '.xlsx',
+    'pdf': '.pdf',
+}
+# Labels used by the dashboard's "Export Format" selectbox.
+FORMAT_ALIASES = {'json': 'json', 'jsonl': 'json', 'excel': 'excel', 'xlsx': 'excel', 'pdf': 'pdf'}
+MIME_TYPES = {
+    'json': 'application/gzip',
+    'excel': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    'pdf': 'application/pdf',
+}
+
+SHEETS = {
+    'Summary': ['company_id', 'company', 'risk_level', 'assets_cr', 'liabilities_cr', 'net_worth_cr',
+                'debt_ratio', 'directors', 'pending_cases', 'flags', 'error'],
+    'Directors': ['company_id', 'director'],
+    'Legal Cases': ['company_id', 'court', 'case_id', 'status'],
+    'Flags': ['company_id', 'flag'],
+}
+EXCEL_MAX_ROWS = 1048576
+
+
+def export_format(name):
+    try:
+        return FORMAT_ALIASES[name.lower()]
+    except KeyError:
+        raise ValueError(f'Unknown export format: {name!r}') from None
+
+
+def _paise(text):
+    try:
+        return financial_parser.parse_amount(text)
+    except ValueError:
+        return None
+
+
+def excel_rows(record):
+    # Sheet name -> rows for one screening record (see batch_screening.screen_company).
+    company_id = record['company_id']
+    if not record['ok']:
+        return {'Summary': [[company_id, None, None, None, None, None, None, None, None, None, record['error']]]}
+    report = record['report']
+    financials = report['financial_health']
+    assets = _paise(financials.get('assets'))
+    liabilities = _paise(financials.get('liabilities'))
+    debt_ratio = risk_scoring.debt_ratio(assets, liabilities)
+    crore = financial_parser.paise_to_crore
+    return {
+        'Summary': [[company_id, report['company'], report['risk_level'], crore(assets), crore(liabilities),
+                     crore(_paise(financials.get('net_worth'))),
+                     round(debt_ratio, 4) if debt_ratio is not None else None, len(report['directors']),
+                     report['litigation']['pending'], len(report['flags']), None]],
+        'Directors': [[company_id, name] for name in report['directors']],
+        'Legal Cases': [[company_id, c['court'], c['case_id'], c['status']] for c in report['legal_cases']],
+        'Flags': [[company_id, flag] for flag in report['flags']],
+    }
+
+
+def pdf_lines(record, width=92):
+    # (bold, text) lines for one report section of the PDF bundle.
+    lines = [(True, record['company_id'])]
+    if not record['ok']:
+        lines.append((False, f"Report failed: {record['error']}"))
+        return lines
+    report = record['report']
+    lines.append((True, f"{report['company']} - Risk Level: {report['risk_level']}"))
+    lines.append((False, ''))
+    for paragraph in record['summary'].splitlines():
+        lines.extend((False, part) for part in textwrap.wrap(paragraph, width) or [''])
+    sections = (
+        ('Directors', report['directors']),
+        ('Financial Health', [f"{k.replace('_', ' ').title()}: {v}" for k, v in report['financial_health'].items()]),
+        ('Pending Legal Cases', [f"{c['court']} - {c['case_id']} ({c['status']})" for c in report['legal_cases']]),
+        ('Flags', report['flags']),
+    )
+    for title, items in sections:
+        lines.append((False, ''))
+        lines.append((True, title))
+        for item in items or ['None']:
+            lines.extend((False, part) for part in textwrap.wrap(f'- {item}', width, subsequent_indent='  '))
+    return lines
+
+
+def json_line(record):
+    record = {k: v for k, v in record.items() if k != 'traceback'}
+    return json.dumps(record, ensure_ascii=False)
+
+
+_RENDERERS = {'json': json_line, 'excel': excel_rows, 'pdf': pdf_lines}
+
+
+def _render_chunk(args):
+    # Screening and rendering both happen in the worker; the parent only writes.
+    companies, data_dir, store_dir, fmt = args
+    render = _RENDERERS[fmt]
+    rendered = []
+    for record in batch_screening._screen_chunk((companies, data_dir, store_dir)):
+        meta = {'company_id': record['company_id'], 'ok': record['ok'],
+                'risk_level': record['report']['risk_level'] if record['ok'] else None}
+        rendered.append((meta, render(record)))
+    return rendered
+
+
+class JsonLinesWriter:
+    def __init__(self, out):
+        self._gz = gzip.GzipFile(fileobj=out, mode='wb')
+
+    def add(self, line):
+        self._gz.write(line.encode('utf-8'))
+        self._gz.write(b'\n')
+
+    def close(self, stats=None):
+        self._gz.close()
+
+
+_XML_INVALID_RE = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+
+def _column_letter(index):
+    letters = ''
+    index += 1
+    while index:
+        index, rem = divmod(index - 1, 26)
+        letters = chr(65 + rem) + letters
+    return letters
+
+
+class XlsxWriter:
+    # Streaming .xlsx writer: each sheet's rows are spooled as XML to its own
+    # temporary file (inline strings, no shared-string table), and the
+    # workbook is zipped together on close. Memory stays flat regardless of
+    # the number of rows.
+    def __init__(self, out, sheets=SHEETS):
+        self._out = out
+        self._sheets = {}
+        for name, headers in sheets.items():
+            spool = tempfile.TemporaryFile()
+            self._sheets[name] = {'spool': spool, 'rows': 0, 'columns': [_column_letter(i) for i in range(len(headers))]}
+            self._write_row(name, headers, style=1)
+
+    def _write_row(self, name, values, style=0):
+        sheet = self._sheets[name]
+        if sheet['rows'] >= EXCEL_MAX_ROWS:
+            raise ValueError(f'Sheet {name!r} exceeds the Excel row limit')
+        sheet['rows'] += 1
+        row = sheet['rows']
+        cells = []
+        for col, value in zip(sheet['columns'], values):
+            ref = f'{col}{row}'
+            style_attr = f' s="{style}"' if style else ''
+            if value is None:
+                continue
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                cells.append(f'<c r="{ref}"{style_attr}><v>{value}</v></c>')
+            else:
+                text = escape(_XML_INVALID_RE.sub('', str(value)))
+                cells.append(f'<c r="{ref}" t="inlineStr"{style_attr}><is><t xml:space="preserve">{text}</t></is></c>')
+        sheet['spool'].write(f'<row r="{row}">{"".join(cells)}</row>'.encode('utf-8'))
+
+    def add(self, sheet_rows):
+        for name, rows in sheet_rows.items():
+            for values in rows:
+                self._write_row(name, values)
+
+    def close(self, stats=None):
+        names = list(self._sheets)
+        with zipfile.ZipFile(self._out, 'w', zipfile.ZIP_DEFLATED) as zf:
+            zf.writestr('[Content_Types].xml', _xlsx_content_types(len(names)))
+            zf.writestr('_rels/.rels', _XLSX_ROOT_RELS)
+            zf.writestr('xl/workbook.xml', _xlsx_workbook(names))
+            zf.writestr('xl/_rels/workbook.xml.rels', _xlsx_workbook_rels(len(names)))
+            zf.writestr('xl/styles.xml', _XLSX_STYLES)
+            for i, name in enumerate(names, 1):
+                spool = self._sheets[name]['spool']
+                spool.seek(0)
+                with zf.open(f'xl/worksheets/sheet{i}.xml', 'w', force_zip64=True) as f:
+                    f.write(_XLSX_SHEET_HEAD.encode('utf-8'))
+                    shutil.copyfileobj(spool, f)
+                    f.write(b'</sheetData></worksheet>')
+                spool.close()
+
+
+_XLSX_NS = 'http://schemas.openxmlformats.org'
+_XLSX_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    f'<Relationships xmlns="{_XLSX_NS}/package/2006/relationships">'
+    f'<Relationship Id="rId1" Type="{_XLSX_NS}/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+_XLSX_STYLES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    f'<styleSheet xmlns="{_XLSX_NS}/spreadsheetml/2006/main">'
+    '<fonts count="2"><font><sz val="11"/><name val="Calibri"/></font><font><b/><sz val="11"/><name val="Calibri"/></font></fonts>'
+    '<fills count="2"><fill><patternFill patternType="none"/></fill><fill><patternFill patternType="gray125"/></fill></fills>'
+    '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="2"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+    '<xf numFmtId="0" fontId="1" fillId="0" borderId="0" xfId="0" applyFont="1"/></cellXfs>'
+    '</styleSheet>'
+)
+_XLSX_SHEET_HEAD = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    f'<worksheet xmlns="{_XLSX_NS}/spreadsheetml/2006/main">'
+    '<sheetViews><sheetView workbookViewId="0"><pane ySplit="1" topLeftCell="A2" activePane="bottomLeft" state="frozen"/>'
+    '</sheetView></sheetViews><sheetData>'
+)
+
+
+def _xlsx_content_types(n):
+    sheets = ''.join(
+        f'<Override PartName="/xl/worksheets/sheet{i}.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        for i in range(1, n + 1)
+    )
+    return (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        f'<Types xmlns="{_XLSX_NS}/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/styles.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+        f'{sheets}</Types>'
+    )
+
+
+def _xlsx_workbook(names):
+    sheets = ''.join(
+        f'<sheet name="{escape(name)}" sheetId="{i}" r:id="rId{i}"/>' for i, name in enumerate(names, 1)
+    )
+    return (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        f'<workbook xmlns="{_XLSX_NS}/spreadsheetml/2006/main" '
+        f'xmlns:r="{_XLSX_NS}/officeDocument/2006/relationships"><sheets>{sheets}</sheets></workbook>'
+    )
+
+
+def _xlsx_workbook_rels(n):
+    rels = ''.join(
+        f'<Relationship Id="rId{i}" Type="{_XLSX_NS}/officeDocument/2006/relationships/worksheet" '
+        f'Target="worksheets/sheet{i}.xml"/>'
+        for i in range(1, n + 1)
+    )
+    rels += (f'<Relationship Id="rId{n + 1}" Type="{_XLSX_NS}/officeDocument/2006/relationships/styles" '
+             'Target="styles.xml"/>')
+    return (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        f'<Relationships xmlns="{_XLSX_NS}/package/2006/relationships">{rels}</Relationships>'
+    )
+
+
+def _pdf_string(text):
+    raw = text.replace('₹', 'Rs.').encode('cp1252', errors='replace')
+    return b'(' + raw.replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)') + b')'
+
+
+class PdfBundleWriter:
+    # Streaming PDF writer: A4 pages in Helvetica, each report starting on a
+    # new page. Pages are written as soon as they fill; only their object ids
+    # are kept until close() writes the page tree, a cover page and the xref.
+    PAGE_WIDTH, PAGE_HEIGHT = 595, 842
+    MARGIN = 50
+    FONT_SIZE = 10
+    LEADING = 13
+
+    def __init__(self, out, title='KYC Report Bundle'):
+        self._out = out
+        self.title = title
+        self._offsets = {}
+        self._pages = []
+        self._next_id = 5  # 1 catalog, 2 page tree, 3-4 fonts
+        self._pos = 0
+        self.lines_per_page = (self.PAGE_HEIGHT - 2 * self.MARGIN - 2 * self.LEADING) // self.LEADING
+        self._emit(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+        self._object(3, b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>')
+        self._object(4, b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>')
+
+    def _emit(self, data):
+        self._out.write(data)
+        self._pos += len(data)
+
+    def _object(self, obj_id, body):
+        self._offsets[obj_id] = self._pos
+        self._emit(b'%d 0 obj\n' % obj_id + body + b'\nendobj\n')
+
+    def _allocate(self):
+        obj_id = self._next_id
+        self._next_id += 1
+        return obj_id
+
+    def _page(self, lines, footer):
+        y = self.PAGE_HEIGHT - self.MARGIN
+        ops = [b'BT', b'%d TL' % self.LEADING, b'%d %d Td' % (self.MARGIN, y)]
+        font = None
+        for bold, text in lines:
+            if bold != font:
+                font = bold
+                ops.append(b'/F%d %d Tf' % (2 if bold else 1, self.FONT_SIZE))
+            ops.append(_pdf_string(text) + b' Tj T*')
+        ops.append(b'ET')
+        ops.append(b'BT /F1 8 Tf %d %d Td ' % (self.MARGIN, self.MARGIN // 2) + _pdf_string(footer) + b' Tj ET')
+        content = zlib.compress(b'\n'.join(ops))
+        content_id, page_id = self._allocate(), self._allocate()
+        self._object(content_id, b'<< /Length %d /Filter /FlateDecode >>\nstream\n' % len(content)
+                     + content + b'\nendstream')
+        self._object(page_id, b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %d %d] /Contents %d 0 R '
+                     b'/Resources << /Font << /F1 3 0 R /F2 4 0 R >> >> >>'
+                     % (self.PAGE_WIDTH, self.PAGE_HEIGHT, content_id))
+        return page_id
+
+    def add(self, lines):
+        per_page = self.lines_per_page
+        chunks = [lines[i:i + per_page] for i in range(0, len(lines), per_page)] or [[]]
+        company = lines[0][1] if lines else ''
+        for n, chunk in enumerate(chunks, 1):
+            footer = f'{self.title} - {company} - page {n} of {len(chunks)}'
+            self._pages.append(self._page(chunk, footer))
+
+    def close(self, stats=None):
+        cover = [(True, self.title), (False, time.strftime('Generated %Y-%m-%d %H:%M')), (False, '')]
+        for key, value in (stats or {}).items():
+            if isinstance(value, dict):
+                value = ', '.join(f'{k}: {v}' for k, v in sorted(value.items())) or '-'
+            cover.append((False, f"{key.replace('_', ' ').capitalize()}: {value}"))
+        kids = [self._page(cover[:self.lines_per_page], self.title)] + self._pages
+        self._object(2, b'<< /Type /Pages /Kids [%s] /Count %d >>'
+                     % (b' '.join(b'%d 0 R' % k for k in kids), len(kids)))
+        self._object(1, b'<< /Type /Catalog /Pages 2 0 R >>')
+        info_id = self._allocate()
+        self._object(info_id, b'<< /Title ' + _pdf_string(self.title) + b' /Producer (KYC report_export) >>')
+        xref = self._pos
+        size = self._next_id
+        entries = [b'0000000000 65535 f \n'] + [
+            b'%010d 00000 n \n' % self._offsets[i] if i in self._offsets else b'0000000000 65535 f \n'
+            for i in range(1, size)
+        ]
+        self._emit(b'xref\n0 %d\n' % size + b''.join(entries))
+        self._emit(b'trailer\n<< /Size %d /Root 1 0 R /Info %d 0 R >>\nstartxref\n%d\n%%%%EOF\n'
+                   % (size, info_id, xref))
+
+
+_WRITERS = {'json': JsonLinesWriter, 'excel': XlsxWriter, 'pdf': PdfBundleWriter}
+
+
+def _ordered_results(pool, fn, jobs, window):
+    # Like pool.map, but with at most `window` chunks in flight, so finished
+    # reports never pile up in memory ahead of a slower writer.
+    pending = deque()
+    for job in jobs:
+        pending.append(pool.submit(fn, job))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def write_export(out, fmt, companies, data_dir=None, workers=None, chunksize=32, store_dir=None, progress=None):
+    # Streams reports for `companies` into the binary file object `out`.
+    # `progress(done, total)` is called after every chunk. Returns stats.
+    fmt = export_format(fmt)
+    data_dir = data_dir or onboarding_pipeline.DATA_DIR
+    workers = workers or os.cpu_count() or 1
+    total = len(companies)
+    stats = {'companies': total, 'ok': 0, 'failed': 0, 'risk_levels': {}}
+    writer = _WRITERS[fmt](out)
+    jobs = ((chunk, data_dir, store_dir, fmt) for chunk in batch_screening._chunks(companies, chunksize))
+    if progress:
+        progress(0, total)
+    if workers == 1 or total <= chunksize:
+        _write_chunks(map(_render_chunk, jobs), writer, stats, progress, total)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            _write_chunks(_ordered_results(pool, _render_chunk, jobs, workers * 2), writer, stats, progress, total)
+    writer.close(stats)
+    return stats
+
+
+def _write_chunks(chunks, writer, stats, progress, total):
+    done = 0
+    for rendered in chunks:
+        for meta, payload in rendered:
+            writer.add(payload)
+            if meta['ok']:
+                stats['ok'] += 1
+                level = meta['risk_level']
+                stats['risk_levels'][level] = stats['risk_levels'].get(level, 0) + 1
+            else:
+                stats['failed'] += 1
+        done += len(rendered)
+        if progress:
+            progress(done, total)
+
+
+def export_reports(output_path, fmt, companies=None, data_dir=None, workers=None, chunksize=32,
+                   store_dir=None, progress=None):
+    fmt = export_format(fmt)
+    data_dir = data_dir or onboarding_pipeline.DATA_DIR
+    if companies is None:
+        if store_dir:
+            companies = list(batch_screening._open_store(store_dir).index)
+        else:
+            companies = batch_screening.discover_companies(data_dir)
+    workers = workers or os.cpu_count() or 1
+    start = time.perf_counter()
+    with disk_cache.atomic_write(output_path, 'wb') as out:
+        stats = write_export(out, fmt, companies, data_dir, workers, chunksize, store_dir, progress)
+    elapsed = time.perf_counter() - start
+    stats['format'] = fmt
+    stats['path'] = output_path
+    stats['bytes'] = os.path.getsize(output_path)
+    stats['workers'] = workers
+    stats['elapsed_s'] = round(elapsed, 3)
+    stats['companies_per_s'] = round(len(companies) / elapsed, 1) if elapsed > 0 else 0.0
+    return stats
+
+
+def render_single(record, fmt):
+    # One screening record rendered in-process to bytes (dashboard downloads).
+    fmt = export_format(fmt)
+    out = io.BytesIO()
+    writer = _WRITERS[fmt](out)
+    writer.add(_RENDERERS[fmt](record))
+    writer.close()
+    return out.getvalue()
+
+
+def _print_progress(done, total):
+    print(f'\rExported {done}/{total} companies', end='' if done < total else '\n', file=sys.stderr, flush=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Export KYC reports to Excel, a PDF bundle or gzipped JSON lines.')
+    parser.add_argument('-f', '--format', default='excel', choices=sorted(FORMAT_ALIASES))
+    parser.add_argument('-o', '--output', default=None, help='output file (default: kyc_reports + format extension)')
+    parser.add_argument('-d', '--data-dir', default=onboarding_pipeline.DATA_DIR)
+    parser.add_argument('-w', '--workers', type=int, default=None, help='worker processes (default: CPU count)')
+    parser.add_argument('--chunksize', type=int, default=32, help='companies per task sent to a worker')
+    parser.add_argument('--store', default=None, help='read from a compacted portfolio store instead of data/')
+    parser.add_argument('--companies', nargs='+', default=None, help='export only these company folders')
+    parser.add_argument('-q', '--quiet', action='store_true', help='no progress output')
+    args = parser.parse_args(argv)
+
+    fmt = export_format(args.format)
+    output = args.output or f'kyc_reports{FORMATS[fmt]}'
+    stats = export_reports(output, fmt, args.companies, args.data_dir, args.workers, args.chunksize,
+                           args.store, None if args.quiet else _print_progress)
+    print(json.dumps(stats, ensure_ascii=False))
+    return 0 if stats['failed'] == 0 else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
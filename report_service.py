@@ -0,0 +1,310 @@
+import os
+import re
+import sys
+import json
+import time
+import queue
+import argparse
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, TimeoutError as FutureTimeout
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote
+
+import onboarding_pipeline
+import batch_screening
+
+_COMPANY_RE = re.compile(r'^[A-Za-z0-9][A-Za-z0-9_.-]{0,127}$')
+
+
+class ServiceBusy(Exception):
+    pass
+
+
+def _warm_worker(_):
+    # Running any task forces each worker to start and import this module (and
+    # with it the pipeline and its compiled matcher) before traffic arrives.
+    return os.getpid()
+
+
+class ReportBatcher:
+    # Requests land in a bounded queue; a dispatcher thread drains it in
+    # micro-batches (up to `max_batch` companies or `batch_window_ms`),
+    # de-duplicates companies and ships each batch to the process pool. When
+    # `max_inflight` batches are already running the dispatcher stops
+    # draining, the queue fills, and submit() raises ServiceBusy.
+    def __init__(self, workers=None, data_dir=None, max_queue=4096, batch_window_ms=5.0,
+                 max_batch=64, max_inflight=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.data_dir = data_dir
+        self.batch_window = batch_window_ms / 1000
+        self.max_batch = max_batch
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._inflight = threading.BoundedSemaphore(max_inflight or self.workers * 2)
+        self._pool = None
+        self._thread = None
+        self._stopping = threading.Event()
+        self._stats_lock = threading.Lock()
+        self.stats = {'submitted': 0, 'rejected': 0, 'batches': 0, 'batched_companies': 0,
+                      'completed': 0, 'failed': 0}
+
+    def start(self):
+        self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        # Pre-fork and warm every worker before accepting traffic.
+        list(self._pool.map(_warm_worker, range(self.workers)))
+        self._thread = threading.Thread(target=self._dispatch, name='kyc-batcher', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+
+    def submit(self, company):
+        future = Future()
+        try:
+            self._queue.put_nowait((company, future))
+        except queue.Full:
+            self._count('rejected')
+            raise ServiceBusy('report queue is full')
+        self._count('submitted')
+        return future
+
+    def queue_depth(self):
+        return self._queue.qsize()
+
+    def snapshot(self):
+        with self._stats_lock:
+            stats = dict(self.stats)
+        stats['queue_depth'] = self.queue_depth()
+        stats['workers'] = self.workers
+        return stats
+
+    def _count(self, key, n=1):
+        with self._stats_lock:
+            self.stats[key] += n
+
+    def _dispatch(self):
+        while not self._stopping.is_set():
+            try:
+                first = self._queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            batch = [first]
+            deadline = time.monotonic() + self.batch_window
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            waiters = {}
+            for company, future in batch:
+                waiters.setdefault(company, []).append(future)
+            self._inflight.acquire()
+            self._count('batches')
+            self._count('batched_companies', len(waiters))
+            try:
+                job = self._pool.submit(batch_screening._screen_chunk, (list(waiters), self.data_dir, None))
+            except RuntimeError as e:
+                self._inflight.release()
+                for futures in waiters.values():
+                    for f in futures:
+                        f.set_exception(e)
+                continue
+            job.add_done_callback(lambda job, waiters=waiters: self._resolve(job, waiters))
+
+    def _resolve(self, job, waiters):
+        self._inflight.release()
+        try:
+            records = job.result()
+        except Exception as e:
+            for futures in waiters.values():
+                for f in futures:
+                    f.set_exception(e)
+            return
+        for record in records:
+            self._count('completed' if record['ok'] else 'failed')
+            for f in waiters.get(record['company_id'], ()):
+                f.set_result(record)
+
+
+def _response_record(record):
+    if not record['ok']:
+        return {'company_id': record['company_id'], 'ok': False, 'error': record['error']}
+    return {
+        'company_id': record['company_id'],
+        'ok': True,
+        'json_report': record['report'],
+        'summary': record['summary'],
+        'elapsed_ms': record['elapsed_ms'],
+    }
+
+
+class ReportRequestHandler(BaseHTTPRequestHandler):
+    server_version = 'KYCReportService/1.0'
+    protocol_version = 'HTTP/1.1'
+    # Headers and body go out as two writes; on a keep-alive connection Nagle
+    # would hold the body until the client's delayed ACK (~40 ms).
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _send_json(self, status, payload, headers=None):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_text(self, status, text):
+        body = text.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        path = self.path.split('?', 1)[0]
+        if path == '/health':
+            self._send_json(200, {'status': 'ok', **self.server.batcher.snapshot()})
+        elif path == '/metrics':
+            self._send_text(200, _prometheus(self.server.batcher.snapshot()))
+        elif path.startswith('/reports/'):
+            self._single(unquote(path[len('/reports/'):]))
+        else:
+            self._send_json(404, {'error': 'not found'})
+
+    def do_POST(self):
+        path = self.path.split('?', 1)[0]
+        if path != '/reports':
+            self._send_json(404, {'error': 'not found'})
+            return
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+            payload = json.loads(self.rfile.read(length) or b'{}')
+            companies = payload['companies']
+            if not isinstance(companies, list):
+                raise TypeError('companies must be a list')
+        except (ValueError, KeyError, TypeError) as e:
+            self._send_json(400, {'error': f'invalid request body: {e}'})
+            return
+        if len(companies) > self.server.max_bulk:
+            self._send_json(413, {'error': f'at most {self.server.max_bulk} companies per request'})
+            return
+        self._bulk(companies)
+
+    def _single(self, company):
+        if not _COMPANY_RE.match(company):
+            self._send_json(400, {'error': 'invalid company name'})
+            return
+        try:
+            future = self.server.batcher.submit(company)
+        except ServiceBusy as e:
+            self._send_json(503, {'error': str(e)}, {'Retry-After': '1'})
+            return
+        try:
+            record = future.result(timeout=self.server.request_timeout)
+        except FutureTimeout:
+            self._send_json(504, {'error': 'report timed out'})
+            return
+        except Exception as e:
+            self._send_json(500, {'error': f'{type(e).__name__}: {e}'})
+            return
+        if record['ok']:
+            status = 200
+        elif record['error'].startswith('FileNotFoundError'):
+            status = 404
+        else:
+            status = 500
+        self._send_json(status, _response_record(record))
+
+    def _bulk(self, companies):
+        results = [None] * len(companies)
+        futures = []
+        busy = False
+        for i, company in enumerate(companies):
+            if not isinstance(company, str) or not _COMPANY_RE.match(company):
+                results[i] = {'company_id': company, 'ok': False, 'error': 'invalid company name'}
+                continue
+            try:
+                futures.append((i, self.server.batcher.submit(company)))
+            except ServiceBusy as e:
+                busy = True
+                results[i] = {'company_id': company, 'ok': False, 'error': str(e)}
+        deadline = time.monotonic() + self.server.request_timeout
+        for i, future in futures:
+            try:
+                results[i] = _response_record(future.result(timeout=max(0, deadline - time.monotonic())))
+            except FutureTimeout:
+                results[i] = {'company_id': companies[i], 'ok': False, 'error': 'report timed out'}
+            except Exception as e:
+                results[i] = {'company_id': companies[i], 'ok': False, 'error': f'{type(e).__name__}: {e}'}
+        if busy and not futures:
+            self._send_json(503, {'results': results}, {'Retry-After': '1'})
+        else:
+            self._send_json(200, {'results': results})
+
+
+def _prometheus(stats):
+    lines = []
+    for key, kind in (('submitted', 'counter'), ('rejected', 'counter'), ('batches', 'counter'),
+                      ('batched_companies', 'counter'), ('completed', 'counter'), ('failed', 'counter'),
+                      ('queue_depth', 'gauge'), ('workers', 'gauge')):
+        name = f'kyc_service_{key}' + ('_total' if kind == 'counter' else '')
+        lines.append(f'# TYPE {name} {kind}')
+        lines.append(f'{name} {stats[key]}')
+    return '\n'.join(lines) + '\n'
+
+
+class ReportServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024
+
+    def __init__(self, address, batcher, request_timeout=30.0, max_bulk=1000, verbose=False):
+        super().__init__(address, ReportRequestHandler)
+        self.batcher = batcher
+        self.request_timeout = request_timeout
+        self.max_bulk = max_bulk
+        self.verbose = verbose
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Serve KYC reports over a local HTTP/JSON API.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('-d', '--data-dir', default=onboarding_pipeline.DATA_DIR)
+    parser.add_argument('-w', '--workers', type=int, default=None, help='worker processes (default: CPU count)')
+    parser.add_argument('--max-queue', type=int, default=4096, help='queued companies before returning 503')
+    parser.add_argument('--batch-window-ms', type=float, default=5.0)
+    parser.add_argument('--max-batch', type=int, default=64)
+    parser.add_argument('--max-bulk', type=int, default=1000, help='companies accepted per bulk request')
+    parser.add_argument('--timeout', type=float, default=30.0, help='seconds to wait for a report')
+    parser.add_argument('-v', '--verbose', action='store_true', help='log every request')
+    args = parser.parse_args(argv)
+
+    batcher = ReportBatcher(args.workers, args.data_dir, args.max_queue, args.batch_window_ms, args.max_batch).start()
+    server = ReportServer((args.host, args.port), batcher, args.timeout, args.max_bulk, args.verbose)
+    print(f'Serving reports on http://{args.host}:{args.port} with {batcher.workers} workers', file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        batcher.stop()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,411 @@
+import os
+import sys
+import json
+import math
+import time
+import hashlib
+import operator
+import argparse
+import threading
+
+import numpy as np
+
+DEFAULT_RULES_PATH = os.path.join(os.path.dirname(__file__), 'data', 'risk_rules.json')
+
+# Fields a rule condition or score penalty can reference. Keyword hit
+# counts are also available as 'keyword.<keyword>'.
+FIELDS = ('debt_ratio', 'pending', 'cases', 'flagged_cases', 'watchlist_hits', 'financial_errors')
+
+_SCALAR_OPS = {'>': operator.gt, '>=': operator.ge, '<': operator.lt, '<=': operator.le,
+               '==': operator.eq, '!=': operator.ne}
+_ARRAY_OPS = {'>': np.greater, '>=': np.greater_equal, '<': np.less, '<=': np.less_equal,
+              '==': np.equal, '!=': np.not_equal}
+
+
+class RuleError(ValueError):
+    pass
+
+
+def _compile_condition(cond, thresholds, program, fields):
+    # Appends postfix instructions for `cond` to `program`:
+    #   ('cmp', field, op, value)   push field <op> value (False when unknown)
+    #   ('all', n) / ('any', n)     pop n results, push their conjunction/disjunction
+    #   ('not',)                    negate the top result
+    if not isinstance(cond, dict) or not cond:
+        raise RuleError(f'Condition must be a non-empty object: {cond!r}')
+    terms = 0
+    for key, value in cond.items():
+        if key in ('all', 'any'):
+            if not isinstance(value, list) or not value:
+                raise RuleError(f"'{key}' needs a non-empty list of conditions")
+            for sub in value:
+                _compile_condition(sub, thresholds, program, fields)
+            program.append((key, len(value)))
+        elif key == 'not':
+            _compile_condition(value, thresholds, program, fields)
+            program.append(('not',))
+        else:
+            if key not in FIELDS and not key.startswith('keyword.'):
+                raise RuleError(f'Unknown field: {key!r}')
+            if not isinstance(value, dict) or not value:
+                raise RuleError(f'Field {key!r} needs an object of comparisons, e.g. {{">": 0.7}}')
+            for op, operand in value.items():
+                if op not in _SCALAR_OPS:
+                    raise RuleError(f'Unknown operator {op!r} for field {key!r}')
+                program.append(('cmp', key, op, _resolve(operand, thresholds)))
+                fields.add(key)
+                terms += 1
+            if len(value) > 1:
+                program.append(('all', len(value)))
+                terms -= len(value) - 1
+            continue
+        terms += 1
+    if terms > 1:
+        program.append(('all', terms))
+
+
+def _resolve(operand, thresholds):
+    if isinstance(operand, str) and operand.startswith('$'):
+        try:
+            return float(thresholds[operand[1:]])
+        except KeyError:
+            raise RuleError(f'Unknown threshold: {operand!r}') from None
+    if isinstance(operand, bool) or not isinstance(operand, (int, float)):
+        raise RuleError(f'Comparison values must be numbers or $thresholds: {operand!r}')
+    return float(operand)
+
+
+def _expect(value, kind, what):
+    # Shape check for the parsed file, so a well-formed but wrongly shaped
+    # document fails as a RuleError rather than somewhere inside compilation.
+    if not isinstance(value, kind):
+        names = ' or '.join(k.__name__ for k in (kind if isinstance(kind, tuple) else (kind,)))
+        raise RuleError(f'{what} must be a {names}, got {type(value).__name__}: {value!r:.60}')
+    return value
+
+
+def _known(value):
+    return value is not None and not (isinstance(value, float) and math.isnan(value))
+
+
+class RuleEvaluation:
+    # Result of one evaluate()/evaluate_batch() call. `fired` is a
+    # (rules x records) boolean matrix; levels are codes into rules.levels.
+    __slots__ = ('rules', 'fired', 'risk_level', 'compliance_score', 'score_level', 'elapsed_ms')
+
+    def __init__(self, rules, fired, risk_level, compliance_score, score_level, elapsed_ms):
+        self.rules = rules
+        self.fired = fired
+        self.risk_level = risk_level
+        self.compliance_score = compliance_score
+        self.score_level = score_level
+        self.elapsed_ms = elapsed_ms
+
+    def __len__(self):
+        return len(self.risk_level)
+
+    def fired_rules(self, i=0):
+        return [r['id'] for r, hit in zip(self.rules.rules, self.fired[:, i]) if hit]
+
+    def flags(self, i=0):
+        return [r['flag'] for r, hit in zip(self.rules.rules, self.fired[:, i]) if hit and r['flag']]
+
+    def level_name(self, i=0):
+        return self.rules.levels[self.risk_level[i]]
+
+    def score_level_name(self, i=0):
+        return self.rules.levels[self.score_level[i]]
+
+    def fire_counts(self):
+        return {r['id']: int(np.count_nonzero(row)) for r, row in zip(self.rules.rules, self.fired)}
+
+    def to_dict(self, i=0):
+        return {
+            'risk_level': self.level_name(i),
+            'compliance_score': int(self.compliance_score[i]),
+            'score_level': self.score_level_name(i),
+            'fired': self.fired_rules(i),
+            'flags': self.flags(i),
+            'elapsed_ms': self.elapsed_ms,
+        }
+
+
+class CompiledRules:
+    # A rules file compiled once into flat postfix programs. The same program
+    # runs on one record (plain Python, no array overhead) or on a whole
+    # portfolio of column arrays (NumPy). A record's risk level is the highest
+    # level among the rules it fires, so no rule can lower another's verdict.
+    def __init__(self, config, source=None, digest=None):
+        _expect(config, dict, 'The rules file')
+        self.source = source
+        self.digest = digest or hashlib.sha256(json.dumps(config, sort_keys=True).encode('utf-8')).hexdigest()
+        self.version = config.get('version', 1)
+        self.keywords = [str(k) for k in _expect(config.get('keywords', []), list, "'keywords'")]
+        self.levels = tuple(_expect(config.get('levels', ['Low', 'Medium', 'High']), (list, tuple), "'levels'"))
+        if not self.levels:
+            raise RuleError('At least one risk level is required')
+        self.thresholds = {}
+        for name, value in _expect(config.get('thresholds', {}), dict, "'thresholds'").items():
+            self.thresholds[name] = _resolve(value, {})
+
+        self.rules = []
+        self.fields = set()
+        seen = set()
+        for rule in _expect(config.get('rules', []), list, "'rules'"):
+            _expect(rule, dict, 'Each rule')
+            rule_id = rule.get('id')
+            if not rule_id or rule_id in seen:
+                raise RuleError(f'Every rule needs a unique id: {rule_id!r}')
+            seen.add(rule_id)
+            program = []
+            _compile_condition(rule.get('when'), self.thresholds, program, self.fields)
+            self.rules.append({
+                'id': rule_id,
+                'flag': rule.get('flag'),
+                'level': self._level_code(rule.get('level', self.levels[0])),
+                'program': program,
+            })
+
+        score = _expect(config.get('score', {}), dict, "'score'")
+        self.score_base = float(score.get('base', 100))
+        self.score_min = float(score.get('min', 0))
+        self.score_max = float(score.get('max', 100))
+        self.penalties = {}
+        for field, weight in _expect(score.get('penalties', {}), dict, "'score.penalties'").items():
+            if field not in FIELDS and not field.startswith('keyword.'):
+                raise RuleError(f'Unknown score field: {field!r}')
+            self.penalties[field] = _resolve(weight, self.thresholds)
+        # (minimum score, level code), highest minimum first; the last
+        # entry without a minimum catches everything below.
+        bands = [_expect(s, dict, "Each 'score.levels' entry")
+                 for s in _expect(score.get('levels', []), list, "'score.levels'")]
+        self.score_levels = sorted(
+            ((_resolve(s['min'], self.thresholds) if 'min' in s else -math.inf, self._level_code(s.get('level')))
+             for s in bands),
+            key=lambda t: -t[0],
+        ) or [(-math.inf, 0)]
+
+        self._lock = threading.Lock()
+        self.evaluations = 0
+        self.records = 0
+        self.total_ms = 0.0
+        self.fire_totals = {r['id']: 0 for r in self.rules}
+
+    def _level_code(self, name):
+        try:
+            return self.levels.index(name)
+        except ValueError:
+            raise RuleError(f'Unknown risk level: {name!r}') from None
+
+    def threshold(self, name, default=None):
+        return self.thresholds.get(name, default)
+
+    def _run_scalar(self, program, record):
+        stack = []
+        for ins in program:
+            kind = ins[0]
+            if kind == 'cmp':
+                value = record.get(ins[1])
+                stack.append(_known(value) and _SCALAR_OPS[ins[2]](value, ins[3]))
+            elif kind == 'not':
+                stack.append(not stack.pop())
+            else:
+                n = ins[1]
+                args = stack[-n:]
+                del stack[-n:]
+                stack.append(all(args) if kind == 'all' else any(args))
+        return stack[0]
+
+    def _run_batch(self, program, columns, n, cache):
+        stack = []
+        for ins in program:
+            kind = ins[0]
+            if kind == 'cmp':
+                result = cache.get(ins)
+                if result is None:
+                    col = columns.get(ins[1])
+                    if col is None:
+                        result = np.zeros(n, dtype=bool)
+                    else:
+                        # NaN already compares False except under '!='.
+                        result = _ARRAY_OPS[ins[2]](col, ins[3])
+                        if ins[2] == '!=':
+                            result &= ~np.isnan(col)
+                    cache[ins] = result
+                stack.append(result)
+            elif kind == 'not':
+                stack.append(~stack.pop())
+            else:
+                n_args = ins[1]
+                args = stack[-n_args:]
+                del stack[-n_args:]
+                stack.append(np.logical_and.reduce(args) if kind == 'all' else np.logical_or.reduce(args))
+        return stack[0]
+
+    def evaluate(self, record):
+        # One record: a mapping of FIELDS (and 'keyword.*') to numbers or None.
+        start = time.perf_counter()
+        fired = [self._run_scalar(r['program'], record) for r in self.rules]
+        level = 0
+        for rule, hit in zip(self.rules, fired):
+            if hit and rule['level'] > level:
+                level = rule['level']
+        score = self.score_base
+        for field, weight in self.penalties.items():
+            value = record.get(field)
+            if _known(value):
+                score -= math.trunc(value * weight)
+        score = int(min(max(score, self.score_min), self.score_max))
+        score_level = next((code for minimum, code in self.score_levels if score >= minimum), self.score_levels[-1][1])
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        fired = np.array(fired, dtype=bool).reshape(len(self.rules), 1)
+        self._account(fired, 1, elapsed_ms)
+        return RuleEvaluation(self, fired, np.array([level], dtype=np.int8), np.array([score]),
+                              np.array([score_level], dtype=np.int8), elapsed_ms)
+
+    def evaluate_batch(self, columns):
+        # Column arrays of equal length (scalars broadcast); missing columns
+        # and NaN entries never satisfy a comparison.
+        start = time.perf_counter()
+        arrays = {k: np.asarray(v, dtype=np.float64) for k, v in columns.items() if v is not None}
+        n = max((a.size for a in arrays.values()), default=0)
+        arrays = {k: a if a.shape == (n,) else np.broadcast_to(a, (n,)) for k, a in arrays.items()}
+        cache = {}
+        fired = np.zeros((len(self.rules), n), dtype=bool)
+        level = np.zeros(n, dtype=np.int8)
+        for i, rule in enumerate(self.rules):
+            fired[i] = self._run_batch(rule['program'], arrays, n, cache)
+            if rule['level']:
+                np.maximum(level, fired[i] * np.int8(rule['level']), out=level)
+        score = np.full(n, self.score_base)
+        for field, weight in self.penalties.items():
+            col = arrays.get(field)
+            if col is not None:
+                score -= np.trunc(np.where(np.isnan(col), 0.0, col) * weight)
+        score = np.clip(score, self.score_min, self.score_max).astype(np.int64)
+        score_level = np.full(n, self.score_levels[-1][1], dtype=np.int8)
+        for minimum, code in reversed(self.score_levels):
+            score_level[score >= minimum] = code
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        self._account(fired, n, elapsed_ms)
+        return RuleEvaluation(self, fired, level, score, score_level, elapsed_ms)
+
+    def _account(self, fired, n, elapsed_ms):
+        counts = [np.count_nonzero(row) for row in fired]
+        with self._lock:
+            self.evaluations += 1
+            self.records += n
+            self.total_ms += elapsed_ms
+            for rule, count in zip(self.rules, counts):
+                self.fire_totals[rule['id']] += int(count)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'source': self.source,
+                'digest': self.digest[:12],
+                'rules': len(self.rules),
+                'evaluations': self.evaluations,
+                'records': self.records,
+                'total_ms': round(self.total_ms, 3),
+                'mean_us_per_record': round(self.total_ms * 1000 / self.records, 3) if self.records else 0.0,
+                'fired': dict(self.fire_totals),
+            }
+
+
+def load_rules(path=None):
+    path = path or DEFAULT_RULES_PATH
+    with open(path, 'rb') as f:
+        raw = f.read()
+    if path.endswith(('.yaml', '.yml')):
+        import yaml
+        config = yaml.safe_load(raw)
+    else:
+        config = json.loads(raw)
+    return CompiledRules(config, source=path, digest=hashlib.sha256(raw).hexdigest())
+
+
+class RulesLoader:
+    # Hot reload: the rules file is stat()ed at most every `check_interval`
+    # seconds and recompiled only when its (mtime, size) changes. A file that
+    # fails to compile leaves the previous rules in force; the error is kept
+    # in `last_error`.
+    def __init__(self, path=None, check_interval=1.0):
+        self.path = path or os.environ.get('KYC_RISK_RULES_PATH') or DEFAULT_RULES_PATH
+        self.check_interval = check_interval
+        self.last_error = None
+        self.reloads = 0
+        self._lock = threading.Lock()
+        self._rules = None
+        self._signature = None
+        self._checked = 0.0
+
+    def _stat(self):
+        st = os.stat(self.path)
+        return st.st_mtime_ns, st.st_size
+
+    def get(self):
+        now = time.monotonic()
+        rules = self._rules
+        if rules is not None and now - self._checked < self.check_interval:
+            return rules
+        with self._lock:
+            self._checked = now
+            try:
+                signature = self._stat()
+            except OSError as e:
+                if self._rules is None:
+                    raise
+                self.last_error = f'{type(e).__name__}: {e}'
+                return self._rules
+            if signature == self._signature:
+                return self._rules
+            try:
+                self._rules = load_rules(self.path)
+                self._signature = signature
+                self.reloads += 1
+                self.last_error = None
+            except Exception as e:
+                # Any failure, not just the expected RuleError/OSError: the
+                # signature still advances so a bad file is reported once and
+                # the previous rules stay in force.
+                if self._rules is None:
+                    raise
+                self._signature = signature
+                self.last_error = f'{type(e).__name__}: {e}'
+                print(f'risk_rules: keeping previous rules, {self.path} failed to load: {self.last_error}',
+                      file=sys.stderr)
+            return self._rules
+
+
+_loader = None
+_loader_lock = threading.Lock()
+
+
+def get_rules():
+    global _loader
+    if _loader is None:
+        with _loader_lock:
+            if _loader is None:
+                _loader = RulesLoader(check_interval=float(os.environ.get('KYC_RISK_RULES_CHECK_S', '1.0')))
+    return _loader.get()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Validate a risk rules file and evaluate it on one record.')
+    parser.add_argument('path', nargs='?', default=DEFAULT_RULES_PATH)
+    parser.add_argument('--record', default=None, help='JSON object of field values to evaluate')
+    args = parser.parse_args(argv)
+    try:
+        rules = load_rules(args.path)
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        print(f'{args.path}: {type(e).__name__}: {e}', file=sys.stderr)
+        return 1
+    print(f"{args.path}: {len(rules.rules)} rules, levels {', '.join(rules.levels)}", file=sys.stderr)
+    if args.record:
+        print(json.dumps(rules.evaluate(json.loads(args.record)).to_dict(), ensure_ascii=False))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,91 @@
+import numpy as np
+
+import risk_rules
+
+# Thresholds, flags, score weights and levels live in the rules file
+# (data/risk_rules.json, see risk_rules); this module only derives the
+# inputs and runs the compiled rules over them.
+
+
+def _as_float(values):
+    return np.asarray(values, dtype=np.float64)
+
+
+def debt_ratios(assets, liabilities):
+    # Amounts in paise (see financial_parser), so the ratio is the same float
+    # debt_ratio() gets from the integers. NaN where either side is unknown;
+    # 0 for zero assets, as assess_risk did.
+    assets = _as_float(assets)
+    liabilities = _as_float(liabilities)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratio = np.where(assets != 0, liabilities / np.where(assets != 0, assets, 1.0), 0.0)
+    return np.where(np.isnan(assets) | np.isnan(liabilities), np.nan, ratio)
+
+
+def debt_ratio(assets, liabilities):
+    if assets is None or liabilities is None:
+        return None
+    return liabilities / assets if assets else 0.0
+
+
+def rule_columns(rules, assets, liabilities, pending, watchlist_hits=0, cases=None, flagged_cases=None,
+                 financial_errors=0, keyword_counts=None):
+    # The one place the rules' input fields are built, for a whole portfolio
+    # (arrays) or a single company (length-1 arrays). Every keyword in the
+    # rules gets a 'keyword.<kw>' column, 0 where it was not matched; fields
+    # passed as None are unknown and satisfy no comparison.
+    pending = np.asarray(pending, dtype=np.int64)
+    columns = {
+        'debt_ratio': debt_ratios(assets, liabilities),
+        'pending': pending,
+        'watchlist_hits': np.broadcast_to(np.asarray(watchlist_hits, dtype=np.int64), pending.shape),
+        'cases': cases,
+        'flagged_cases': flagged_cases,
+        'financial_errors': financial_errors,
+    }
+    keyword_counts = keyword_counts or {}
+    for keyword in rules.keywords:
+        columns[f'keyword.{keyword}'] = keyword_counts.get(keyword.lower(), 0)
+    return columns
+
+
+def score_portfolio(assets, liabilities, pending, watchlist_hits=0, rules=None, **fields):
+    # One vectorized pass over a whole portfolio; every argument is an array
+    # (or a scalar broadcast against the others). `fields` are the remaining
+    # rule_columns() arguments: cases, flagged_cases, financial_errors and
+    # keyword_counts ({keyword: counts}).
+    rules = rules or risk_rules.get_rules()
+    columns = rule_columns(rules, assets, liabilities, pending, watchlist_hits, **fields)
+    evaluation = rules.evaluate_batch(columns)
+    return {
+        'debt_ratio': columns['debt_ratio'],
+        'risk_level': evaluation.risk_level,
+        'compliance_score': evaluation.compliance_score,
+        'score_level': evaluation.score_level,
+        'evaluation': evaluation,
+    }
+
+
+def level_names(codes, rules=None):
+    rules = rules or risk_rules.get_rules()
+    return np.asarray(rules.levels, dtype=object)[np.asarray(codes)]
+
+
+def score_company(assets, liabilities, pending, watchlist_hits=0, rules=None, keyword_counts=None, **fields):
+    # Single-company path: score_portfolio on length-1 columns, so a report,
+    # the dashboard and a portfolio scan can never disagree. Amounts are
+    # paise or None.
+    fields = {k: None if v is None else [v] for k, v in fields.items()}
+    keyword_counts = {k: [n] for k, n in (keyword_counts or {}).items()}
+    scored = score_portfolio([np.nan if assets is None else assets], [np.nan if liabilities is None else liabilities],
+                             [pending], [watchlist_hits], rules, keyword_counts=keyword_counts, **fields)
+    evaluation = scored['evaluation']
+    return {
+        'debt_ratio': debt_ratio(assets, liabilities),
+        'risk_level': evaluation.level_name(),
+        'compliance_score': int(evaluation.compliance_score[0]),
+        'score_level': evaluation.score_level_name(),
+        'fired': evaluation.fired_rules(),
+        'flags': evaluation.flags(),
+        'elapsed_ms': evaluation.elapsed_ms,
+    }
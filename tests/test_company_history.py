@@ -0,0 +1,40 @@
+import math
+
+import company_history
+
+
+def _company(tmp_path):
+    folder = tmp_path / 'Acme'
+    folder.mkdir()
+    (folder / 'financials.txt').write_text(
+        'Year: 2022\nAssets: ₹10Cr\nLiabilities: ₹5Cr\n'
+        'Year: 2024\nAssets: ₹10Cr\nLiabilities: ₹8Cr\n', encoding='utf-8')
+    (folder / 'court_cases.txt').write_text(
+        'Delhi HC | Pending | Case 2023/DEL/1 | Tax default\n'
+        'NCLT Mumbai | Closed | Case 2024/NCLT/2 | Settled\n', encoding='utf-8')
+    return folder
+
+
+def test_history_series_share_one_year_axis(tmp_path):
+    _company(tmp_path)
+    history = company_history.build_history('Acme', str(tmp_path))
+    assert history.years.tolist() == [2022, 2023, 2024]
+    assert history.assets.tolist()[0] == 10.0 and math.isnan(history.assets[1])
+    assert history.debt_ratio[0] == 0.5 and history.debt_ratio[2] == 0.8
+    assert round(history.debt_ratio_change[2], 10) == 0.3
+    assert history.cases_filed.tolist() == [0, 1, 1]
+    assert history.pending_backlog.tolist() == [0, 1, 1]
+
+
+def test_history_cache_is_keyed_on_input_fingerprints(tmp_path):
+    folder = _company(tmp_path)
+    cache = company_history.HistoryCache(maxsize=2)
+    first = cache.get('Acme', str(tmp_path))
+    assert cache.get('Acme', str(tmp_path)) is first
+    assert (cache.stats()['hits'], cache.stats()['misses']) == (1, 1)
+
+    with open(folder / 'court_cases.txt', 'a', encoding='utf-8') as f:
+        f.write('Pune DC | Pending | Case 2024/PUN/3 | Default\n')
+    second = cache.get('Acme', str(tmp_path))
+    assert second is not first and second.pending_backlog.tolist() == [0, 1, 2]
+    assert cache.stats()['misses'] == 2 and cache.stats()['entries'] == 2
@@ -0,0 +1,55 @@
+import pytest
+
+import company_search
+from company_search import normalize_name
+
+RECORDS = [
+    {'folder': 'CompanyA', 'cin': 'U01122MH2010PTC123456', 'full_name': 'CompanyA Pvt Ltd'},
+    {'folder': 'CompanyB', 'cin': 'L17110DL1995PLC654321', 'full_name': 'Company B Limited'},
+    {'folder': 'TriveniAgro', 'cin': 'U01400UP2001PTC026543', 'full_name': 'Triveni Agro Products Pvt Ltd'},
+    {'folder': 'AcmeCo', 'cin': 'AAB-1234', 'full_name': 'Acme & Co'},
+]
+
+
+@pytest.mark.parametrize('name, key', [
+    ('CompanyA', 'company a'),
+    ('CompanyA Pvt Ltd', 'company a'),
+    ('Company B Limited', 'company b'),
+    ('Acme & Co', 'acme and'),
+    ('Private Company Ltd', 'private'),
+    ('Ltd', 'ltd'),
+])
+def test_only_the_trailing_legal_form_is_stripped(name, key):
+    assert normalize_name(name) == key
+
+
+@pytest.fixture(scope='module')
+def index():
+    return company_search.CompanySearchIndex(RECORDS)
+
+
+def _folders(results):
+    return [r['folder'] for r in results]
+
+
+@pytest.mark.parametrize('query, expected', [
+    ('Comp', ['CompanyA', 'CompanyB']),
+    ('company', ['CompanyA', 'CompanyB']),
+    ('Company A', ['CompanyA']),
+    ('a', ['AcmeCo', 'CompanyA', 'TriveniAgro']),
+    ('b', ['CompanyB']),
+    ('agro', ['TriveniAgro']),
+    ('Triveni Agro Products Pvt L', ['TriveniAgro']),
+    ('u01122', ['CompanyA']),
+])
+def test_prefix_matches_partial_and_single_letter_queries(index, query, expected):
+    assert sorted(_folders(index.prefix(query))) == expected
+
+
+def test_search_ranks_exact_before_prefix(index):
+    results = index.search('CompanyA Private Limited')
+    assert results[0]['folder'] == 'CompanyA' and results[0]['match'] == 'exact'
+    assert index.search('aab 1234')[0]['folder'] == 'AcmeCo'
+    assert [r['match'] for r in index.search('Comp')] == ['prefix', 'prefix']
+    fuzzy = index.search('Trivenni Agro')
+    assert _folders(fuzzy) == ['TriveniAgro'] and fuzzy[0]['match'] == 'fuzzy'
@@ -0,0 +1,57 @@
+import director_index
+import onboarding_pipeline
+
+
+def _index(tmp_path):
+    return director_index.DirectorIndex(str(tmp_path))
+
+
+def test_shared_din_keeps_name_keys_of_remaining_companies(tmp_path):
+    index = _index(tmp_path)
+    index.update_company('A', [{'din': '1234567', 'name': 'Rajesh Verma'}])
+    index.update_company('B', [{'din': '01234567', 'name': 'R Verma'}])
+    assert index.dins_for_name('Rajesh Verma') == index.dins_for_name('r verma') == ['01234567']
+
+    index.remove_company('A')
+    assert index.dins_for_name('Rajesh Verma') == []
+    assert index.dins_for_name('R Verma') == ['01234567']
+    assert index.din_names['01234567'] == 'R Verma'
+
+    index.remove_company('B')
+    assert index.name_dins == {} and index.din_companies == {} and index.din_names == {}
+
+
+def test_screen_watchlist_reports_only_indexed_companies(tmp_path):
+    index = _index(tmp_path)
+    index.update_company('A', [{'din': '1', 'name': 'Meena Rathi'}, {'din': '2', 'name': 'Arun Rao'}])
+    index.update_company('B', [{'din': '1', 'name': 'Dr. Meena Rathi'}])
+    watchlist = director_index.Watchlist(['MEENA  RATHI'])
+    assert index.screen_watchlist(watchlist) == [{'din': '00000001', 'name': 'Meena Rathi', 'companies': ['A', 'B']}]
+    index.remove_company('A')
+    index.remove_company('B')
+    assert index.screen_watchlist(watchlist) == []
+
+
+def test_watchlist_is_cached_until_the_file_changes(tmp_path):
+    path = tmp_path / 'watchlist.txt'
+    path.write_text('# names\nMeena Rathi\n', encoding='utf-8')
+    first = director_index.get_watchlist(str(path))
+    assert director_index.get_watchlist(str(path)) is first
+    path.write_text('Meena Rathi\nRitika Shah\nArun Rao\n', encoding='utf-8')
+    second = director_index.get_watchlist(str(path))
+    assert second is not first and len(second) == 3 and 'arun rao' in second
+
+
+def test_report_is_scored_with_watchlist_hits(tmp_path, monkeypatch):
+    path = tmp_path / 'watchlist.txt'
+    path.write_text('Meena Rathi\n', encoding='utf-8')
+    monkeypatch.setenv('KYC_WATCHLIST_PATH', str(path))
+    cache = onboarding_pipeline.ReportCache(maxsize=4)
+    flagged = cache.get('CompanyA').json_report
+    assert flagged['watchlist_hits'] == ['Meena Rathi']
+    assert f"Compliance score {flagged['compliance_score']}/100 ({flagged['score_level']})" in cache.get('CompanyA').summary
+
+    path.write_text('Someone Else\n', encoding='utf-8')
+    clean = cache.get('CompanyA').json_report
+    assert clean['watchlist_hits'] == [] and cache.stats()['misses'] == 2
+    assert clean['compliance_score'] - flagged['compliance_score'] == 20
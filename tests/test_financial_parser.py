@@ -0,0 +1,55 @@
+import pytest
+
+import financial_parser
+from financial_parser import CRORE_PAISE, LAKH_PAISE, parse_amount
+
+
+@pytest.mark.parametrize('text, paise', [
+    ('₹12.5Cr', 125 * CRORE_PAISE // 10),
+    ('₹9.8 Cr', 98 * CRORE_PAISE // 10),
+    ('Rs. 12,50,000', 1250000 * 100),
+    ('INR 1,23,45,678.50', 1234567850),
+    ('₹4,000', 4000 * 100),
+    ('1,250,000', 1250000 * 100),
+    ('₹3.2 Lakh', 32 * LAKH_PAISE // 10),
+    ('2 crores', 2 * CRORE_PAISE),
+    ('0', 0),
+])
+def test_indian_amounts_parse_to_exact_paise(text, paise):
+    assert parse_amount(text) == paise
+
+
+@pytest.mark.parametrize('text, paise', [
+    ('(₹1.1Cr)', -11 * CRORE_PAISE // 10),
+    ('( Rs 2,50,000 )', -250000 * 100),
+    ('-₹3.2 Lakh', -32 * LAKH_PAISE // 10),
+    ('₹-5Cr', -5 * CRORE_PAISE),
+])
+def test_parenthesised_and_signed_amounts_are_negative(text, paise):
+    assert parse_amount(text) == paise
+
+
+@pytest.mark.parametrize('text', [
+    'lots', '', None, '₹', '(₹1.1Cr', '₹1.1Cr)', '12,5,000', '1,2345', '₹12.5 billion',
+])
+def test_unrecognised_amounts_raise(text):
+    with pytest.raises(financial_parser.FinancialParseError):
+        parse_amount(text)
+
+
+def test_ratio_in_paise_is_exact():
+    # 9.8/14 in float crores is 0.7000000000000001; in paise it is exactly 0.7.
+    assert parse_amount('₹9.8Cr') / parse_amount('₹14Cr') == 0.7
+
+
+def test_statement_keeps_unparseable_lines_as_errors():
+    statement = financial_parser.parse_statement_lines([
+        'Year: 2023', 'Assets: ₹10Cr', 'Liabilities: ₹8Cr',
+        'Year: 2024', 'Assets: lots', 'Liabilities: ₹9Cr',
+    ])
+    assert statement.years() == [2023, 2024]
+    assert statement.latest.assets is None and statement.latest.raw['assets'] == 'lots'
+    assert statement.errors == [{'line': 5, 'field': 'assets', 'value': 'lots',
+                                 'error': "Unrecognised amount: 'lots'"}]
+    with pytest.raises(financial_parser.FinancialParseError, match='line 5'):
+        financial_parser.parse_statement_lines(['Assets: ₹1Cr'] * 4 + ['Assets: lots'], strict=True)
@@ -0,0 +1,60 @@
+import os
+import shutil
+
+import pytest
+
+import incremental_screening
+import onboarding_pipeline
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    data = tmp_path / 'data'
+    data.mkdir()
+    for company in ('CompanyA', 'CompanyB', 'ZenithInfra'):
+        shutil.copytree(os.path.join(onboarding_pipeline.DATA_DIR, company), data / company)
+    return data
+
+
+def _run(tmp_path, data_dir):
+    return incremental_screening.run_incremental(str(tmp_path / 'manifest.json'), str(data_dir))
+
+
+def test_delta_reports_added_changed_and_deleted_companies(tmp_path, data_dir):
+    delta, stats = _run(tmp_path, data_dir)
+    assert sorted(d['company_id'] for d in delta) == ['CompanyA', 'CompanyB', 'ZenithInfra']
+    assert {d['change'] for d in delta} == {'added'} and all(d['old_risk'] is None for d in delta)
+    assert stats['stage_runs'] == {'directors': 3, 'financials': 3, 'litigation': 3}
+
+    delta, stats = _run(tmp_path, data_dir)
+    assert delta == [] and stats['recomputed'] == 0
+
+    (data_dir / 'CompanyB' / 'court_cases.txt').write_text(
+        'Delhi HC | Pending | Case 2025/DEL/9 | Loan default\n', encoding='utf-8')
+    shutil.rmtree(data_dir / 'ZenithInfra')
+    delta, stats = _run(tmp_path, data_dir)
+    by_company = {d['company_id']: d for d in delta}
+    assert sorted(by_company) == ['CompanyB', 'ZenithInfra']
+    changed = by_company['CompanyB']
+    assert changed['change'] == 'changed' and changed['stages'] == ['litigation']
+    assert changed['new_risk'] == onboarding_pipeline.generate_report('CompanyB', str(data_dir))[0]['risk_level']
+    assert changed['risk_changed'] == (changed['old_risk'] != changed['new_risk'])
+    deleted = by_company['ZenithInfra']
+    assert (deleted['change'], deleted['new_risk'], deleted['risk_changed']) == ('deleted', None, True)
+    assert stats['stage_runs'] == {'directors': 0, 'financials': 0, 'litigation': 1}
+    assert (stats['recomputed'], stats['deleted']) == (1, 1)
+
+
+def test_touched_but_identical_file_is_not_recomputed(tmp_path, data_dir):
+    _run(tmp_path, data_dir)
+    path = data_dir / 'CompanyA' / 'directors.csv'
+    os.utime(path, ns=(path.stat().st_atime_ns, path.stat().st_mtime_ns + 10**9))
+    delta, stats = _run(tmp_path, data_dir)
+    assert delta == [] and stats['stage_runs']['directors'] == 0
+
+
+def test_manifest_reports_match_full_screening(tmp_path, data_dir):
+    _run(tmp_path, data_dir)
+    manifest = incremental_screening.load_manifest(str(tmp_path / 'manifest.json'))
+    for company, entry in manifest['companies'].items():
+        assert entry['json_report'] == onboarding_pipeline.generate_report(company, str(data_dir))[0]
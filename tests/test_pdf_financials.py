@@ -0,0 +1,117 @@
+import zlib
+import asyncio
+
+import pytest
+
+import pdf_financials
+import onboarding_pipeline
+import async_ingest
+from financial_parser import CRORE_PAISE
+
+
+def _pdf(content, filters=b'/Filter /FlateDecode'):
+    # Minimal one-page PDF around a single content stream.
+    body = zlib.compress(content) if b'Flate' in filters else content
+    return b''.join([
+        b'%PDF-1.4\n',
+        b'1 0 obj << /Type /Catalog /Pages 2 0 R >> endobj\n',
+        b'2 0 obj << /Type /Pages /Kids [3 0 R] /Count 1 >> endobj\n',
+        b'3 0 obj << /Type /Page /Parent 2 0 R /Contents 4 0 R >> endobj\n',
+        b'4 0 obj << /Length ' + str(len(body)).encode() + b' ' + filters + b' >> stream\n',
+        body,
+        b'\nendstream endobj\ntrailer << /Root 1 0 R >>\n%%EOF\n',
+    ])
+
+
+# "Assets: ₹12.5Cr" as a UTF-16BE hex string (₹ is not in WinAnsi), the rest
+# as literal strings laid out with Td, TJ kerning and T*.
+FILING = (
+    b'BT /F1 12 Tf 14 TL 72 720 Td\n'
+    b'(Financial Statement FY 2024) Tj 0 -14 Td\n'
+    b'<FEFF 0041 0073 0073 0065 0074 0073 003A 0020 20B9 0031 0032 002E 0035 0043 0072> Tj 0 -14 Td\n'
+    b'[(Liabi) -20 (lities:) -400 (Rs 9.8 Cr)] TJ T*\n'
+    b'(Net Worth: \\(Rs 2.7 Cr\\)) Tj T*\n'
+    b'(Year: 2024) Tj ET'
+)
+
+
+def test_flate_compressed_text_layer_is_extracted_line_by_line():
+    text = pdf_financials.extract_text(_pdf(FILING))
+    assert text.splitlines() == [
+        'Financial Statement FY 2024',
+        'Assets: ₹12.5Cr',
+        'Liabilities: Rs 9.8 Cr',
+        'Net Worth: (Rs 2.7 Cr)',
+        'Year: 2024',
+    ]
+    record = pdf_financials.statement_from_text(text).latest
+    assert record.year == 2024
+    assert record.assets == 125 * CRORE_PAISE // 10
+    assert record.liabilities == 98 * CRORE_PAISE // 10
+    assert record.net_worth == -27 * CRORE_PAISE // 10
+
+
+def test_plain_text_exports_are_returned_as_is():
+    assert pdf_financials.extract_text('Assets: ₹10Cr\n'.encode('utf-8')) == 'Assets: ₹10Cr\n'
+
+
+@pytest.mark.parametrize('data', [
+    _pdf(FILING).replace(b'trailer <<', b'trailer << /Encrypt 5 0 R'),
+    b'\xff\xfe\x00 binary',
+])
+def test_unreadable_files_raise(data):
+    with pytest.raises(pdf_financials.PdfExtractError):
+        pdf_financials.extract_text(data)
+
+
+def test_scanned_pdf_falls_back_to_financials_txt(tmp_path):
+    folder = tmp_path / 'Scanned'
+    folder.mkdir()
+    (folder / 'financials.txt').write_text('Assets: ₹50Cr\nLiabilities: ₹41Cr\n', encoding='utf-8')
+    (folder / 'financials.pdf').write_bytes(_pdf(b'q 100 0 0 100 0 0 cm /Im1 Do Q'))
+    assert pdf_financials.extract_text((folder / 'financials.pdf').read_bytes()) == ''
+    assert onboarding_pipeline.financials_path(str(folder)).endswith('financials.txt')
+
+    (folder / 'financials.pdf').write_bytes(_pdf(FILING))
+    assert onboarding_pipeline.financials_path(str(folder)).endswith('financials.pdf')
+
+
+def test_extraction_cache_persists_by_content_digest(tmp_path):
+    path = tmp_path / 'filing.pdf'
+    path.write_bytes(_pdf(FILING))
+    cache = pdf_financials.ExtractionCache(persist_dir=str(tmp_path / 'cache'))
+    text = cache.text(str(path))
+    assert cache.text(str(path)) == text
+    assert (cache.stats()['misses'], cache.stats()['hits']) == (1, 1)
+
+    fresh = pdf_financials.ExtractionCache(persist_dir=str(tmp_path / 'cache'))
+    assert fresh.text_for_bytes(path.read_bytes()) == text
+    assert fresh.stats()['disk_hits'] == 1
+
+
+def test_async_ingest_reads_each_source_once_and_matches_financials_path(tmp_path, monkeypatch):
+    folder = tmp_path / 'Scanned'
+    folder.mkdir()
+    (folder / 'directors.csv').write_text('din,name\n1,Arun Rao\n', encoding='utf-8')
+    (folder / 'court_cases.txt').write_text('', encoding='utf-8')
+    (folder / 'financials.txt').write_text('Assets: ₹50Cr\nLiabilities: ₹41Cr\n', encoding='utf-8')
+    (folder / 'financials.pdf').write_bytes(_pdf(b'q 100 0 0 100 0 0 cm /Im1 Do Q'))
+    reads = []
+    read_bytes = async_ingest._read_bytes
+    monkeypatch.setattr(async_ingest, '_read_bytes', lambda path: reads.append(path) or read_bytes(path))
+
+    def financials():
+        reads.clear()
+        return asyncio.run(async_ingest.read_company_files('Scanned', str(tmp_path)))[1]
+
+    assert financials() == (folder / 'financials.txt').read_text(encoding='utf-8')
+    assert sorted(map(str, reads)) == sorted(str(folder / n) for n in (
+        'court_cases.txt', 'directors.csv', 'financials.pdf', 'financials.txt'))
+
+    (folder / 'financials.pdf').write_bytes(_pdf(FILING))
+    assert financials() == pdf_financials.extract_text(_pdf(FILING))
+    assert reads.count(str(folder / 'financials.pdf')) == 1 and str(folder / 'financials.txt') not in reads
+
+    (folder / 'financials.txt').unlink()
+    (folder / 'financials.pdf').write_bytes(_pdf(b'q 100 0 0 100 0 0 cm /Im1 Do Q'))
+    assert financials() == ''
@@ -0,0 +1,43 @@
+import os
+import shutil
+
+import onboarding_pipeline
+
+
+def _data(tmp_path):
+    data = tmp_path / 'data'
+    shutil.copytree(os.path.join(onboarding_pipeline.DATA_DIR, 'CompanyA'), data / 'CompanyA')
+    return data
+
+
+def test_cache_hits_until_an_input_file_changes(tmp_path):
+    data = _data(tmp_path)
+    cache = onboarding_pipeline.ReportCache(maxsize=4)
+    first = cache.get('CompanyA', str(data))
+    assert cache.get('CompanyA', str(data)) is first
+    assert (cache.stats()['hits'], cache.stats()['misses']) == (1, 1)
+
+    with open(data / 'CompanyA' / 'court_cases.txt', 'a', encoding='utf-8') as f:
+        f.write('Pune DC | Pending | Case 2025/PUN/1 | Recovery suit\n')
+    second = cache.get('CompanyA', str(data))
+    assert second is not first and cache.stats()['misses'] == 2
+    assert second.json_report['litigation']['pending'] == first.json_report['litigation']['pending'] + 1
+
+
+def test_identical_content_in_another_folder_is_a_separate_entry(tmp_path):
+    data = _data(tmp_path)
+    shutil.copytree(data / 'CompanyA', data / 'CompanyACopy')
+    cache = onboarding_pipeline.ReportCache(maxsize=4)
+    cache.get('CompanyA', str(data))
+    copy = cache.get('CompanyACopy', str(data))
+    assert copy.json_report['company'] == 'CompanyACopy Pvt Ltd' and cache.stats()['misses'] == 2
+
+
+def test_persisted_entries_survive_a_new_process(tmp_path):
+    data = _data(tmp_path)
+    persist = str(tmp_path / 'cache')
+    built = onboarding_pipeline.ReportCache(maxsize=4, persist_dir=persist).get('CompanyA', str(data))
+    fresh = onboarding_pipeline.ReportCache(maxsize=4, persist_dir=persist)
+    loaded = fresh.get('CompanyA', str(data))
+    assert fresh.stats()['disk_hits'] == 1 and fresh.stats()['misses'] == 0
+    assert loaded.json_report == built.json_report and loaded.summary == built.summary
@@ -0,0 +1,34 @@
+import gzip
+import json
+import zipfile
+
+import pytest
+
+import report_export
+import onboarding_pipeline
+
+
+def test_json_export_streams_one_record_per_company(tmp_path):
+    path = tmp_path / 'out.jsonl.gz'
+    progress = []
+    stats = report_export.export_reports(str(path), 'JSON', ['CompanyA', 'Missing', 'CompanyB'], workers=1,
+                                         progress=lambda done, total: progress.append((done, total)))
+    assert (stats['ok'], stats['failed'], stats['format']) == (2, 1, 'json')
+    assert progress[0] == (0, 3) and progress[-1] == (3, 3)
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        records = [json.loads(line) for line in f]
+    assert [r['company_id'] for r in records] == ['CompanyA', 'Missing', 'CompanyB']
+    assert records[0]['report'] == onboarding_pipeline.generate_report('CompanyA')[0]
+    assert not records[1]['ok'] and records[1]['error'].startswith('FileNotFoundError')
+
+
+@pytest.mark.parametrize('fmt, magic', [('excel', b'PK'), ('pdf', b'%PDF-')])
+def test_binary_exports_are_complete_files(tmp_path, fmt, magic):
+    path = tmp_path / f'out{report_export.FORMATS[fmt]}'
+    stats = report_export.export_reports(str(path), fmt, ['CompanyA', 'CompanyB'], workers=1)
+    data = path.read_bytes()
+    assert stats['ok'] == 2 and stats['bytes'] == len(data) and data.startswith(magic)
+    if fmt == 'excel':
+        assert 'xl/workbook.xml' in zipfile.ZipFile(path).namelist()
+    else:
+        assert data.rstrip().endswith(b'%%EOF')
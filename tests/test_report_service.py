@@ -0,0 +1,61 @@
+import json
+import time
+import threading
+import http.client
+
+import pytest
+
+import report_service
+
+
+@pytest.fixture(scope='module')
+def server():
+    batcher = report_service.ReportBatcher(workers=1, batch_window_ms=1.0).start()
+    server = report_service.ReportServer(('127.0.0.1', 0), batcher, request_timeout=30.0, max_bulk=3)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    batcher.stop()
+
+
+def _get(conn, path):
+    conn.request('GET', path)
+    resp = conn.getresponse()
+    return resp.status, json.loads(resp.read())
+
+
+def test_keep_alive_responses_are_not_delayed(server):
+    # Headers and body are separate writes; with Nagle on, every response
+    # after the first on a connection waits ~40 ms for the delayed ACK.
+    conn = http.client.HTTPConnection(*server.server_address, timeout=10)
+    _get(conn, '/health')
+    timings = []
+    for _ in range(10):
+        start = time.perf_counter()
+        status, _ = _get(conn, '/health')
+        timings.append(time.perf_counter() - start)
+        assert status == 200
+    conn.close()
+    assert sorted(timings)[len(timings) // 2] < 0.02
+
+
+def test_single_and_bulk_reports(server):
+    conn = http.client.HTTPConnection(*server.server_address, timeout=30)
+    status, record = _get(conn, '/reports/CompanyA')
+    assert status == 200 and record['ok'] and record['json_report']['company'] == 'CompanyA Pvt Ltd'
+    assert _get(conn, '/reports/NoSuchCompany')[0] == 404
+    assert _get(conn, '/reports/..%2Fetc')[0] == 400
+
+    conn.request('POST', '/reports', json.dumps({'companies': ['CompanyA', '../x']}))
+    resp = conn.getresponse()
+    results = json.loads(resp.read())['results']
+    assert resp.status == 200
+    assert [r['ok'] for r in results] == [True, False] and results[1]['error'] == 'invalid company name'
+
+    conn.request('POST', '/reports', json.dumps({'companies': ['CompanyA'] * 4}))
+    resp = conn.getresponse()
+    resp.read()
+    assert resp.status == 413
+    conn.close()
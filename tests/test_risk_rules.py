@@ -0,0 +1,173 @@
+import os
+import json
+import math
+import shutil
+
+import numpy as np
+import pytest
+
+import risk_rules
+import risk_scoring
+import portfolio_store
+import onboarding_pipeline
+
+BASE_RULES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'risk_rules.json')
+
+
+def _config(rules, **extra):
+    config = {
+        'keywords': ['fraud', 'default'],
+        'levels': ['Low', 'Medium', 'High'],
+        'thresholds': {'warn': 0.7},
+        'rules': rules,
+        'score': {
+            'penalties': {'debt_ratio': 50, 'pending': 10, 'watchlist_hits': 20},
+            'levels': [{'level': 'Low', 'min': 70}, {'level': 'Medium', 'min': 41}, {'level': 'High'}],
+        },
+    }
+    config.update(extra)
+    return config
+
+
+# Values each field takes in the parity grid; None and NaN are "unknown".
+_VALUES = {
+    'debt_ratio': [None, math.nan, 0.0, 0.5, 0.7, 0.7000000000000001, 1.0, 2.5],
+    'pending': [None, 0, 1, 3],
+}
+
+
+def _records():
+    for ratio in _VALUES['debt_ratio']:
+        for pending in _VALUES['pending']:
+            yield {'debt_ratio': ratio, 'pending': pending, 'keyword.fraud': pending}
+
+
+def _columns(records):
+    columns = {}
+    for key in records[0]:
+        columns[key] = np.array([np.nan if r[key] is None else r[key] for r in records], dtype=np.float64)
+    return columns
+
+
+def _assert_parity(rules):
+    records = list(_records())
+    batch = rules.evaluate_batch(_columns(records))
+    for i, record in enumerate(records):
+        scalar = rules.evaluate(record)
+        assert scalar.fired[:, 0].tolist() == batch.fired[:, i].tolist(), record
+        assert scalar.level_name() == batch.level_name(i), record
+        assert int(scalar.compliance_score[0]) == int(batch.compliance_score[i]), record
+        assert scalar.score_level_name() == batch.score_level_name(i), record
+
+
+@pytest.mark.parametrize('op', ['>', '>=', '<', '<=', '==', '!='])
+def test_scalar_and_batch_agree_for_each_operator(op):
+    rules = risk_rules.CompiledRules(_config([
+        {'id': 'ratio', 'when': {'debt_ratio': {op: '$warn'}}, 'level': 'High'},
+        {'id': 'pending', 'when': {'pending': {op: 1}}, 'level': 'Medium'},
+        {'id': 'keyword', 'when': {'keyword.fraud': {op: 0}}, 'level': 'Medium'},
+    ]))
+    _assert_parity(rules)
+
+
+def test_scalar_and_batch_agree_for_nested_conditions():
+    rules = risk_rules.CompiledRules(_config([
+        {'id': 'all', 'when': {'all': [{'debt_ratio': {'>': 0.5}}, {'pending': {'>=': 1}}]}, 'level': 'High'},
+        {'id': 'any', 'when': {'any': [{'debt_ratio': {'>': 1}}, {'pending': {'>': 2}}]}, 'level': 'Medium'},
+        {'id': 'not', 'when': {'not': {'debt_ratio': {'<=': 0.7}}}, 'level': 'Medium'},
+        {'id': 'range', 'when': {'debt_ratio': {'>': 0.5, '<': 1.0}}, 'level': 'Medium'},
+    ]))
+    _assert_parity(rules)
+
+
+def test_unknown_values_never_satisfy_a_comparison():
+    rules = risk_rules.CompiledRules(_config([
+        {'id': 'ne', 'when': {'debt_ratio': {'!=': 0.7}}, 'level': 'High'},
+    ]))
+    for ratio in (None, math.nan):
+        assert not rules.evaluate({'debt_ratio': ratio}).fired.any()
+    assert not rules.evaluate_batch({'debt_ratio': [math.nan]}).fired.any()
+    # A missing column is unknown too, but `not` of it holds in both evaluators.
+    negated = risk_rules.CompiledRules(_config([
+        {'id': 'not', 'when': {'not': {'pending': {'>': 0}}}, 'level': 'High'},
+    ]))
+    assert negated.evaluate({}).fired.all()
+    assert negated.evaluate_batch({'debt_ratio': [0.1]}).fired.all()
+
+
+def test_score_company_is_one_row_of_score_portfolio():
+    rules = risk_rules.load_rules(BASE_RULES)
+    assets = [14 * 10**9, 10**9, None, 0]
+    liabilities = [98 * 10**8, 2 * 10**9, 10**9, 10]
+    pending = [0, 2, 1, 0]
+    portfolio = risk_scoring.score_portfolio([np.nan if a is None else a for a in assets], liabilities, pending,
+                                             rules=rules, cases=[1, 3, 1, 0], flagged_cases=[0, 1, 0, 0])
+    for i in range(len(assets)):
+        one = risk_scoring.score_company(assets[i], liabilities[i], pending[i], rules=rules,
+                                         cases=[1, 3, 1, 0][i], flagged_cases=[0, 1, 0, 0][i])
+        assert one['risk_level'] == portfolio['evaluation'].level_name(i)
+        assert one['compliance_score'] == int(portfolio['compliance_score'][i])
+        assert one['fired'] == portfolio['evaluation'].fired_rules(i)
+    # 9.8Cr / 14Cr is exactly the 0.7 threshold in paise, so it is not "high".
+    assert portfolio['evaluation'].fired_rules(0) == []
+
+
+@pytest.mark.parametrize('config', [
+    ['not', 'an', 'object'],
+    _config(['oops']),
+    _config({'id': 'x'}),
+    _config([{'id': 'x', 'when': 'debt_ratio > 1'}]),
+    _config([{'id': 'x', 'when': {'debt_ratio': {'~': 1}}}]),
+    _config([{'id': 'x', 'when': {'no_such_field': {'>': 1}}}]),
+    _config([{'id': 'x', 'when': {'debt_ratio': {'>': '$missing'}}}]),
+    _config([{'id': 'x', 'when': {'debt_ratio': {'>': 1}}, 'level': 'Severe'}]),
+    _config([{'id': 'x', 'when': {'pending': {'>': 0}}}, {'id': 'x', 'when': {'pending': {'>': 1}}}]),
+    _config([], score=[]),
+    _config([], thresholds={'warn': 'high'}),
+    _config([], keywords='fraud'),
+])
+def test_malformed_rules_raise_rule_error(config):
+    with pytest.raises(risk_rules.RuleError):
+        risk_rules.CompiledRules(config)
+
+
+def test_loader_keeps_previous_rules_when_the_file_breaks(tmp_path):
+    path = tmp_path / 'rules.json'
+    config = json.loads(open(BASE_RULES, encoding='utf-8').read())
+    path.write_text(json.dumps(config), encoding='utf-8')
+    loader = risk_rules.RulesLoader(str(path), check_interval=0)
+    good = loader.get()
+
+    config['rules'].append('oops')
+    path.write_text(json.dumps(config), encoding='utf-8')
+    for _ in range(3):
+        assert loader.get() is good
+    assert 'RuleError' in loader.last_error
+
+    path.write_text('{"rules": [', encoding='utf-8')
+    assert loader.get() is good
+
+    config['rules'].pop()
+    config['thresholds']['debt_ratio_warning'] = 0.5
+    path.write_text(json.dumps(config), encoding='utf-8')
+    reloaded = loader.get()
+    assert reloaded is not good and reloaded.threshold('debt_ratio_warning') == 0.5
+    assert loader.last_error is None
+
+
+def test_report_and_portfolio_store_agree_on_keyword_rules(tmp_path, monkeypatch):
+    data_dir = tmp_path / 'data'
+    shutil.copytree(os.path.dirname(BASE_RULES), data_dir)
+    config = json.loads(open(BASE_RULES, encoding='utf-8').read())
+    config['rules'].append({'id': 'fraud', 'when': {'keyword.fraud': {'>': 0}}, 'flag': 'Fraud', 'level': 'High'})
+    rules_path = tmp_path / 'rules.json'
+    rules_path.write_text(json.dumps(config), encoding='utf-8')
+    monkeypatch.setattr(risk_rules, '_loader', risk_rules.RulesLoader(str(rules_path), check_interval=0))
+
+    portfolio_store.compact(str(tmp_path / 'store'), str(data_dir))
+    store = portfolio_store.PortfolioStore(str(tmp_path / 'store'))
+    levels = risk_scoring.level_names(store.score()['risk_level'])
+    for company, i in store.index.items():
+        report, _ = onboarding_pipeline.generate_report(company, str(data_dir))
+        assert report['risk_level'] == levels[i], company
+    assert levels[store.index['CompanyA']] == 'High'